@@ -0,0 +1,90 @@
+# analyze_exposure.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - FED of asphyxiant gases (fed_dose.py) for every DAQ test & every    #
+#       MultiRAE logging session (burns & post-burn days) in one batch  #
+#       + DAQ: each gas location (analyzer chart group), dose from      #
+#           fed_start (s, relative to ignition)                         #
+#       + MultiRAE: each session (rae_loader.py) from its first         #
+#           reading, using Avg readings of CO & HCN (no CO2/O2 sensors  #
+#           on these units, so V_CO2 = 1 & no O2 term)                  #
+# - Saved to 05_Charts/Exposure/:                                       #
+#       + FED_Summary.csv (& .parquet): one row per DAQ location &      #
+#           MultiRAE session (peaks, doses, FED, times to thresholds)   #
+#       + <test>_FED.csv: FED of each location of a DAQ test            #
+#       + RAE/<burn>/<session>.csv: doses & FED of each session         #
+# - Exports also saved as .xlsx are read from the text copy; Excel-only #
+#       exports are read with openpyxl (slowest part of the batch)      #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import pandas as pd
+
+from project_paths import info_dir, data_dir, chart_dir
+from exp_processing import ProcessedExp
+from exp_config import read_exp_info
+from summary_metrics import save_table
+from rae_loader import find_rae_logs
+from fed_dose import compute_rae_fed
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+save_dir = f'{chart_dir}Exposure/'
+rae_dir = f'{data_dir}RAE/'
+
+# Read in & check exp info file & channel lists
+exp_info = read_exp_info(info_dir)
+
+# ----------------------- #
+# Set Exposure Parameters #
+# ----------------------- #
+compact_dtypes = True # if true, load channel data as float32
+screen_sensors = True # if true, mask samples outside DAQ range & skip failed gas analyzers (sensor_health.py)
+fed_start = 0 # start of FED dose for DAQ tests (s, relative to ignition)
+fed_thresholds = [0.3, 1.0] # FED for time to incapacitation
+rae_measure = 'Avg' # MultiRAE reading used for dose (Min, Avg, Max or Real)
+
+# ----------------------------------- #
+# Start Code Used to Compute Exposure #
+# ----------------------------------- #
+if not os.path.exists(save_dir):
+    os.makedirs(save_dir)
+
+summaries = []
+
+# DAQ tests: FED at each gas location
+test_names = [t for t in exp_info.test_names if os.path.exists(f'{data_dir}{t}.csv')]
+for test_name in test_names:
+    test = ProcessedExp(exp_info[test_name], data_dir, compact_dtypes, screen_sensors=screen_sensors)
+    test.add_fed_channels(fed_start, fed_thresholds)
+    if test.fed_summary is None:
+        print(f'    No gas locations in {test_name}')
+        continue
+    fed_channels = test.group_channels('FED')
+    pd.DataFrame({c: test.processed_data[c] for c in fed_channels}).to_csv(f'{save_dir}{test_name}_FED.csv')
+    summaries.append(test.fed_summary.reset_index().assign(Source='DAQ', Test=test_name))
+
+# MultiRAE sessions: FED of each instrument
+if os.path.exists(rae_dir):
+    print('Loading MultiRAE logs...')
+    for log in find_rae_logs(rae_dir):
+        fed, summary = compute_rae_fed(log, rae_measure, fed_thresholds)
+        if fed is None:
+            continue
+        file_loc = f'{save_dir}RAE/{log.name}.csv'
+        if not os.path.exists(os.path.dirname(file_loc)):
+            os.makedirs(os.path.dirname(file_loc))
+        fed.to_csv(file_loc)
+        summary['Start'] = log.begin
+        summary['Unit_SN'] = log.info.get('Unit SN', '')
+        summaries.append(summary.reset_index().assign(Source='RAE', Test=log.name.split('/')[0]))
+        print(f'    {log.name}: FED {summary["FED"].iloc[0]:.3f}')
+
+if summaries:
+    all_exposure = pd.concat(summaries, ignore_index=True).set_index(['Source', 'Test', 'Location'])
+    save_table(all_exposure, f'{save_dir}FED_Summary.csv')
+    print(f'Saved FED of {len(all_exposure)} locations & sessions to {save_dir}FED_Summary.csv')
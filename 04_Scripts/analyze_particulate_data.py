@@ -10,21 +10,22 @@
 # -------------- #
 import os
 import pandas as pd
-import numpy as np
+
+from project_paths import info_dir, data_dir, chart_dir
+from exp_config import read_particulate_info
 
 # ---------------------------------- #
 # Define Subdirectories & Info Files #
 # ---------------------------------- #
-info_dir = '../03_Info/'
-data_dir = '../02_Data/Particulate/'
-results_dir = '../05_Charts/'
+particulate_dir = f'{data_dir}Particulate/'
+results_dir = chart_dir
 
 # Create results directory if necessary
-if not os.path.exists(results_dir):
-	os.makedirs(results_dir)
+if not os.path.exists(f'{results_dir}Particulate/'):
+	os.makedirs(f'{results_dir}Particulate/')
 
-# Read in exp info file
-exp_info = pd.read_csv(info_dir + 'Particulate_Info.csv', index_col='Test_Name')
+# Read in & check particulate info file (rows to skip in each test)
+skip_lines = read_particulate_info(info_dir)
 
 # create dataframe for max values
 summDataHeaders = ['Test_Name',
@@ -43,11 +44,11 @@ summData = pd.DataFrame(columns=summDataHeaders)
 # Determine which test data to plot
 data_file_ls = []
 # loop through 02_Data/Particulate/ directory
-for f in os.listdir(data_dir):
+for f in os.listdir(particulate_dir):
 	if not f.startswith('Burn'): continue
 
 	# file path to sub directories (i.e. 02_Data/Particulate/Burn1_29SEP2020/)
-	exp_dir = os.path.join(data_dir,f)
+	exp_dir = os.path.join(particulate_dir,f)
 
 	# loop through subdirectory
 	for ff in os.listdir(exp_dir):
@@ -70,37 +71,16 @@ for f in os.listdir(data_dir):
 
 # Loop through test data files
 for f in data_file_ls:
-	filepath = f.split('/')[2:-1]
-	filepath = '/'.join(filepath)
-
 	# Get test name from file
-	Test_Name = f.split('/')[-1][:-5]
+	Test_Name = os.path.basename(f)[:-5]
 
 	# Read in data for experiment
 	Exp_Data = pd.read_excel(f, skiprows=28, usecols=[1,2,3,4,5,6], names=['Timestamp','PM1','PM2.5','RESP','PM10','TOTAL'])
 	print ('--- Loaded data file for '+Test_Name+' ---')
 
-	# check exp_info file to see if need to skip lines in data 
-	# skip_lines format must be comma separated and splices separated by colon
-	if Test_Name in exp_info.index.values:
-		# import Skip_Lines values from exp_info file
-		skip_str = exp_info['Skip_Lines'][Test_Name]
-
-		# split comma separated values if possible
-		try: skip_list = skip_str.split(',')
-		except: skip_list = [skip_str]
-
-		# loop through Skip_Lines values
-		for i in skip_list:
-			# split colon separated values if possible
-			try: 
-				j,k = i.split(':')
-				skip_idx = list(range(int(j),int(k)+1))
-			except:
-				skip_idx = [int(i)]
-			
-			# remove rows from data frame according to Skip_Lines values
-			Exp_Data.drop(skip_idx, inplace=True)
+	# Remove rows listed in Skip_Lines of particulate info file
+	if Test_Name in skip_lines:
+		Exp_Data.drop(sorted(set(skip_lines[Test_Name])), inplace=True)
 
 
 	# add desired values to summary dataframe
@@ -110,7 +90,7 @@ for f in data_file_ls:
 		max(Exp_Data['PM10']), Exp_Data['PM10'].mean(),
 		max(Exp_Data['TOTAL']), Exp_Data['TOTAL'].mean(),
 		Exp_Data['TOTAL'].idxmax()]
-	summData = summData.append(pd.DataFrame([rowData], columns=summDataHeaders)) 
+	summData = pd.concat([summData, pd.DataFrame([rowData], columns=summDataHeaders)])
 # avg values
 
 # sort and index dataframe
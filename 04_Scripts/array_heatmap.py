@@ -0,0 +1,58 @@
+# array_heatmap.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Height x time grids of sensor arrays (e.g. thermocouple trees,      #
+#       pressure probes at several heights) for raster heatmap charts   #
+#       in plot.py (imshow) & plot_html.py (Bokeh image)                #
+#       + array: chart group whose channels all have heights in their   #
+#           labels (e.g. '5ft Above Floor') at min_heights or more      #
+#           different heights                                           #
+#       + each channel is interpolated onto n_times times between       #
+#           chart x limits, then all times are interpolated between     #
+#           sensor heights onto n_heights heights at once               #
+#       + grid size is fixed, so chart render time & file size do not  #
+#           depend on number of samples                                 #
+#       + grid spans lowest to highest sensor (no extrapolation); nan   #
+#           where a channel has no data                                 #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+
+from bdp_flow import label_to_height
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_array_heights(test, group, min_heights=3):
+    # Channels & heights (m) of group sorted by height if group is an array
+    #   (ProcessedExp test); None otherwise
+    channels = test.group_channels(group)
+    heights = np.array([label_to_height(test.channel_label(c)) for c in channels])
+    if len(channels) < min_heights or np.any(np.isnan(heights)):
+        return(None)
+    if len(np.unique(heights)) < min_heights or len(np.unique(heights)) < len(heights):
+        return(None)
+    order = np.argsort(heights)
+    return([channels[i] for i in order], heights[order])
+
+def height_time_grid(channel_data, heights, t_start, t_end, n_times=1000, n_heights=100):
+    # Grid (height x time) of channel data (list of series sorted by height);
+    #   returns times, grid heights & grid values
+    times = np.linspace(t_start, t_end, n_times)
+    values = np.full((len(channel_data), n_times), np.nan)
+    for i, data in enumerate(channel_data):
+        x = np.asarray(data.index.values, dtype=np.float64)
+        y = np.asarray(data.values, dtype=np.float64)
+        keep = ~np.isnan(x) & ~np.isnan(y)
+        if np.any(keep):
+            values[i] = np.interp(times, x[keep], y[keep], left=np.nan, right=np.nan)
+
+    # Linear interpolation between sensors below & above each grid height
+    grid_heights = np.linspace(heights[0], heights[-1], n_heights)
+    k = np.clip(np.searchsorted(heights, grid_heights, side='right') - 1, 0, len(heights) - 2)
+    w = ((grid_heights - heights[k]) / (heights[k + 1] - heights[k]))[:, np.newaxis]
+    grid = (1. - w) * values[k] + w * values[k + 1]
+    return(times, grid_heights, grid)
@@ -0,0 +1,66 @@
+# baseline_stats.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Baseline (background) statistics for every channel over a window    #
+#       computed in one reduction over the 2-D data array               #
+#       + Mean, Std, Min, Max, Range (max - min), Drift (slope of       #
+#           linear fit, units/s) & Count (number of valid samples)      #
+#       + statistics are for scaled data (scale & offset from channel   #
+#           list); only rows in window are scaled                       #
+# - Windows:                                                            #
+#       + pre-ignition: all data before ignition (time < 0)             #
+#       + per test: 'Baseline_Window' column in exp_info.csv as         #
+#           start|end (s, relative to ignition); 'None' = pre-ignition  #
+#           (parsed with test config, exp_config.py)                    #
+#       + pre-gas-on: background before gas on event for each gas      #
+#           analyzer (gas_lag_times.py)                                 #
+# - Results are computed once per test & reused by every transform      #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def compute_baseline_stats(data, start, end, scale=1., offset=0., include_end=False):
+    # Compute baseline statistics for every column of data (df indexed by
+    #   time) over window [start, end); window includes end if include_end
+    time = data.index.values
+    if include_end:
+        in_window = (time >= start) & (time <= end)
+    else:
+        in_window = (time >= start) & (time < end)
+
+    # Scale rows in window; scale & offset can be scalars or per-column arrays
+    scale = np.asarray(scale, dtype=np.float64)
+    offset = np.asarray(offset, dtype=np.float64)
+    values = data.to_numpy(dtype=np.float64)[in_window] * scale + offset
+    t = time[in_window].astype(np.float64)
+
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(values, axis=0) / count
+        std = np.sqrt(np.nansum((values - mean)**2, axis=0) / count)
+        minimum = np.where(count > 0, np.min(np.where(valid, values, np.inf), axis=0, initial=np.inf), np.nan)
+        maximum = np.where(count > 0, np.max(np.where(valid, values, -np.inf), axis=0, initial=-np.inf), np.nan)
+
+        # Least squares slope for each column using only valid samples
+        t_2d = np.where(valid, t[:, np.newaxis], np.nan)
+        t_mean = np.nansum(t_2d, axis=0) / count
+        t_dev = np.where(valid, t_2d - t_mean, 0.)
+        drift = np.sum(t_dev * np.where(valid, values - mean, 0.), axis=0) / np.sum(t_dev**2, axis=0)
+
+    return(pd.DataFrame({'Mean': mean, 'Std': std, 'Min': minimum, 'Max': maximum,
+                         'Range': maximum - minimum, 'Drift': drift, 'Count': count},
+                        index=data.columns))
+
+def compute_test_baselines(exp_data, channel_list, channels, window):
+    # Baseline statistics of scaled data for channels over test's window
+    channels = [c for c in channels if c in exp_data.columns]
+    return(compute_baseline_stats(exp_data[channels], window[0], window[1],
+        channel_list.loc[channels, 'Scale'].values, channel_list.loc[channels, 'Offset'].values))
@@ -0,0 +1,121 @@
+# bdp_flow.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Velocity & vent flow from bidirectional probe (BDP) arrays          #
+# - Probe pairs (pressure channel 'xBDPVn' & thermocouple 'xBDPTn') are #
+#       resolved once from the channel list; probes in the same chart   #
+#       group make up one array in a vent & heights are read from the   #
+#       channel labels (e.g. '6ft 8in Above Floor')                     #
+# - Velocities for all probes are computed as one 2-D array operation:  #
+#       v = sign(dP) * 0.0698 * sqrt(T * |dP|)                          #
+#       + dP is zeroed with baseline mean (default: data before         #
+#           ignition, time < 0)                                         #
+#       + T is the probe thermocouple temperature in K                  #
+# - Vent flows integrate velocity profiles over probe heights:          #
+#       + volume flow = W * integral(v dz)                              #
+#       + mass flow = W * integral(rho * v dz), rho = 353 / T           #
+#       + positive velocities are out of the vent, negative are in      #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import re
+import numpy as np
+import pandas as pd
+
+from daq_loader import scale_channels
+from baseline_stats import compute_test_baselines
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def label_to_height(label):
+    # Convert label such as '7ft 11in Above Floor' to height in m; nan if
+    #   label doesn't include a height
+    feet = re.search(r'(\d+(?:\.\d+)?)\s*ft', label)
+    inches = re.search(r'(\d+(?:\.\d+)?)\s*in\b', label)
+    if feet is None and inches is None:
+        return(np.nan)
+    height = 0.
+    if feet is not None:
+        height += float(feet.group(1)) * 0.3048
+    if inches is not None:
+        height += float(inches.group(1)) * 0.0254
+    return(height)
+
+def get_probe_pairs(channel_list, channels=None):
+    # Return df indexed by BDP velocity channel with paired TC channel,
+    #   array (chart group) & height (m); probes sorted by array & height
+    probe_list = channel_list[channel_list['Type'] == 'Velocity']
+    if channels is not None:
+        probe_list = probe_list[probe_list.index.isin(channels)]
+
+    probes = probe_list.index.values
+    tcs = [p.replace('BDPV', 'BDPT', 1) for p in probes]
+    missing_tcs = [tc for tc in tcs if tc not in channel_list.index]
+    if missing_tcs:
+        raise ValueError(f"Thermocouples for bidirectional probes missing from channel list: {', '.join(missing_tcs)}")
+
+    probe_pairs = pd.DataFrame({'TC': tcs,
+                                'Array': probe_list['Chart'].values,
+                                'Height': [label_to_height(l) for l in probe_list['Label'].values]},
+                               index=pd.Index(probes, name='Probe'))
+
+    return(probe_pairs.sort_values(['Array', 'Height']))
+
+def compute_probe_velocities(exp_data, channel_list, probe_pairs, baselines=None):
+    # Compute velocity (m/s) for every probe at once; pressure is zeroed with
+    #   baseline means (default: data before ignition, time < 0)
+    probes = probe_pairs.index.tolist()
+    if baselines is None:
+        baselines = compute_test_baselines(exp_data, channel_list, probes, [-np.inf, 0.])
+    baseline_means = baselines.loc[probes, 'Mean'].to_numpy()
+    if np.any(np.isnan(baseline_means)):
+        raise ValueError('No baseline data to zero bidirectional probes')
+
+    pressure = scale_channels(exp_data, channel_list, probes)
+    pressure -= baseline_means
+    temperature = scale_channels(exp_data, channel_list, probe_pairs['TC'].tolist()) + 273.15
+
+    velocity = np.sign(pressure) * 0.0698 * np.sqrt(temperature * np.abs(pressure))
+
+    velocity = pd.DataFrame(velocity, index=exp_data.index, columns=probes)
+    temperature = pd.DataFrame(temperature, index=exp_data.index, columns=probes)
+    return(velocity, temperature)
+
+def integrate_profile(values, heights, bottom=None, top=None):
+    # Trapezoidal integral of (time x height) array over heights; values at
+    #   lowest/highest probe are extended to vent bottom/top if given
+    if bottom is not None:
+        heights = np.concatenate([[bottom], heights])
+        values = np.concatenate([values[:, :1], values], axis=1)
+    if top is not None:
+        heights = np.concatenate([heights, [top]])
+        values = np.concatenate([values, values[:, -1:]], axis=1)
+    dz = np.diff(heights)
+    return(np.sum(0.5 * (values[:, 1:] + values[:, :-1]) * dz, axis=1))
+
+def compute_vent_flows(velocity, temperature, probe_pairs, vent_dims=None):
+    # Volume (m3/s) & mass (kg/s) flow in & out of each vent; vent_dims maps
+    #   array name to [width, bottom, top] (m); width defaults to 1 m
+    #   (flow per unit width) & profile ends at lowest/highest probe
+    if vent_dims is None:
+        vent_dims = {}
+    v = velocity.to_numpy()
+    rho_v = 353. / temperature.to_numpy() * v
+
+    flows = {}
+    for array, array_probes in probe_pairs.groupby('Array', sort=False):
+        cols = velocity.columns.get_indexer(array_probes.index)
+        heights = array_probes['Height'].to_numpy()
+        if np.any(np.isnan(heights)):
+            raise ValueError(f'Probe heights missing from channel list labels for {array}')
+        width, bottom, top = vent_dims.get(array, [1., None, None])
+
+        flows[f'{array}_Volume_Out'] = width * integrate_profile(np.fmax(v[:, cols], 0), heights, bottom, top)
+        flows[f'{array}_Volume_In'] = -width * integrate_profile(np.fmin(v[:, cols], 0), heights, bottom, top)
+        flows[f'{array}_Mass_Out'] = width * integrate_profile(np.fmax(rho_v[:, cols], 0), heights, bottom, top)
+        flows[f'{array}_Mass_In'] = -width * integrate_profile(np.fmin(rho_v[:, cols], 0), heights, bottom, top)
+
+    return(pd.DataFrame(flows, index=velocity.index))
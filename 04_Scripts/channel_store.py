@@ -0,0 +1,102 @@
+# channel_store.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Persistent store of processed channel data for every test           #
+#       + one dir per test with time.npy (s, relative to ignition) &    #
+#           one .npy file per channel (float32) on the same time grid   #
+#       + channels.csv in each test dir lists channel, chart group,     #
+#           type & label                                                #
+# - Arrays are opened as memory maps so only data that is used is read  #
+# - Query API (ChannelStore.get) returns views of the stored arrays for #
+#       a set of tests & channels between t0 & t1 (no copies)           #
+# - Written by plot.py (store_channels = True); used by plot_overlay.py #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import numpy as np
+import pandas as pd
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def write_test(store_dir, test_name, time, channel_data, channel_list):
+    # Save processed data for test; channel_data is a dict of series, any
+    #   series not on time grid (e.g. shifted gas data) is interpolated onto it
+    test_dir = os.path.join(store_dir, test_name)
+    if not os.path.exists(test_dir):
+        os.makedirs(test_dir)
+
+    time = np.asarray(time, dtype=np.float64)
+    np.save(os.path.join(test_dir, 'time.npy'), time)
+
+    for channel, series in channel_data.items():
+        index = np.asarray(series.index.values, dtype=np.float64)
+        values = np.asarray(series.values, dtype=np.float64)
+        if len(index) != len(time) or not np.array_equal(index, time):
+            values = np.interp(time, index, values, left=np.nan, right=np.nan)
+        np.save(os.path.join(test_dir, f'{channel}.npy'), values.astype(np.float32))
+
+    channels = list(channel_data.keys())
+    channel_info = pd.DataFrame({'Channel': channels,
+                                 'Chart': channel_list.loc[channels, 'Chart'].values,
+                                 'Type': channel_list.loc[channels, 'Type'].values,
+                                 'Label': channel_list.loc[channels, 'Label'].values})
+    channel_info.to_csv(os.path.join(test_dir, 'channels.csv'), index=False)
+
+class ChannelStore:
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.maps = {}
+        self.index = self.read_index()
+
+    def read_index(self):
+        # Combine channels.csv of every test into one table
+        tables = []
+        if os.path.exists(self.store_dir):
+            for test_name in sorted(os.listdir(self.store_dir)):
+                info_loc = os.path.join(self.store_dir, test_name, 'channels.csv')
+                if os.path.isfile(info_loc):
+                    channel_info = pd.read_csv(info_loc)
+                    channel_info.insert(0, 'Test', test_name)
+                    tables.append(channel_info)
+        if not tables:
+            return(pd.DataFrame(columns=['Test', 'Channel', 'Chart', 'Type', 'Label']))
+        return(pd.concat(tables, ignore_index=True))
+
+    def tests(self):
+        return(self.index['Test'].unique().tolist())
+
+    def channels(self, tests=None, group=None, data_type=None):
+        # Channels in store, optionally limited to tests, chart group or data type
+        rows = self.index
+        if tests is not None:
+            rows = rows[rows['Test'].isin(tests)]
+        if group is not None:
+            rows = rows[rows['Chart'] == group]
+        if data_type is not None:
+            rows = rows[rows['Type'] == data_type]
+        return(list(dict.fromkeys(rows['Channel'])))
+
+    def memmap(self, test_name, name):
+        # Open stored array as read-only memory map (cached)
+        key = (test_name, name)
+        if key not in self.maps:
+            self.maps[key] = np.load(os.path.join(self.store_dir, test_name, f'{name}.npy'), mmap_mode='r')
+        return(self.maps[key])
+
+    def get(self, tests, channels, t0=None, t1=None):
+        # Return {test: (time, {channel: data})} for t0 <= time <= t1; arrays
+        #   are views of memory maps; channels missing from a test are skipped
+        results = {}
+        for test_name in tests:
+            time = self.memmap(test_name, 'time')
+            i0 = 0 if t0 is None else np.searchsorted(time, t0, side='left')
+            i1 = len(time) if t1 is None else np.searchsorted(time, t1, side='right')
+
+            test_channels = set(self.index.loc[self.index['Test'] == test_name, 'Channel'])
+            data = {c: self.memmap(test_name, c)[i0:i1] for c in channels if c in test_channels}
+            results[test_name] = (time[i0:i1], data)
+        return(results)
@@ -0,0 +1,341 @@
+# chart_service.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Local http service that renders charts & returns processed data on  #
+#       demand instead of pre-rendering every chart in 05_Charts        #
+#       + GET /tests                          tests with data files     #
+#       + GET /tests/<test>                   chart groups & channels   #
+#       + GET /chart/<test>/<group>.pdf|.png  chart from plot.py        #
+#       + GET /bokeh/<test>/<group>.json      Bokeh json item (embed    #
+#           with Bokeh.embed.embed_item) from plot_html.py              #
+#       + GET /data/<test>/<channel>.json|.csv?t0=&t1=                  #
+#           processed channel data (optional time range, s)             #
+#       + GET /html/<test>/                   html dashboard; min/max   #
+#           pyramid tiles are served from the same path                 #
+#           + each version is built in a temp dir & renamed to          #
+#               Service/<test>/<build>/, so files being served are      #
+#               never deleted by a rebuild                              #
+# - Loaded tests (ProcessedExp) & rendered outputs are kept in bounded  #
+#       LRU caches; entries are tied to the modification times of the   #
+#       test's data file, exp_info.csv, channel list & chart scripts,   #
+#       so editing any of them invalidates cached results               #
+# - Requests are handled by a pool of worker threads; each output is    #
+#       rendered by one request at a time; matplotlib (pyplot) charts   #
+#       are drawn one at a time                                         #
+# - Run with 'pfe serve' & open http://127.0.0.1:8050/tests             #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import io
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import mimetypes
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+import pandas as pd
+import matplotlib
+# Charts are only drawn to memory (no windows) & from worker threads
+matplotlib.use('Agg')
+
+from project_paths import info_dir, data_dir, chart_dir
+from exp_processing import ProcessedExp
+from exp_config import read_exp_info
+import plot
+import plot_html
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+service_dir = f'{chart_dir}Service/'
+exp_info_file = f'{info_dir}exp_info.csv'
+
+# Chart settings come from these scripts; editing them invalidates cached outputs
+config_files = [os.path.abspath(plot.__file__), os.path.abspath(plot_html.__file__)]
+
+# ---------------------- #
+# Set Service Parameters #
+# ---------------------- #
+host = '127.0.0.1'
+port = 8050
+workers = 4 # worker threads handling requests
+max_tests = 4 # loaded tests kept in memory
+max_outputs = 64 # rendered charts kept in memory
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+class LRUCache:
+    def __init__(self, max_items):
+        # Thread-safe least recently used cache; each entry stores the version
+        #   (source/config file times) it was built from
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        # Cached value for key if built from version; stale entries are dropped
+        with self.lock:
+            if key not in self.items:
+                return(None)
+            entry_version, value = self.items[key]
+            if entry_version != version:
+                del self.items[key]
+                return(None)
+            self.items.move_to_end(key)
+            return(value)
+
+    def put(self, key, version, value):
+        with self.lock:
+            self.items[key] = (version, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+class ChartService:
+    def __init__(self, max_tests=4, max_outputs=64):
+        self.tests = LRUCache(max_tests)
+        self.outputs = LRUCache(max_outputs)
+        self.exp_info = None
+        self.exp_info_time = None
+        self.load_locks = {}
+        self.output_locks = {}
+        self.lock = threading.Lock()
+        # pyplot keeps global state, so pdf/png charts are drawn one at a time
+        self.render_lock = threading.Lock()
+
+    def info_times(self):
+        # Modification times of exp_info.csv & channel lists it uses
+        files = [exp_info_file]
+        if self.exp_info is not None:
+            files += sorted(set(self.exp_info[t].channels.file_loc for t in self.exp_info))
+        return(tuple(os.path.getmtime(f) for f in files))
+
+    def get_exp_info(self):
+        # Re-read & check exp_info.csv & channel lists (ExpInfo) if any changed
+        with self.lock:
+            if self.info_times() != self.exp_info_time:
+                self.exp_info = read_exp_info(info_dir)
+                self.exp_info_time = self.info_times()
+            return(self.exp_info)
+
+    def test_names(self):
+        exp_info = self.get_exp_info()
+        return([t for t in exp_info.test_names if os.path.exists(f'{data_dir}{t}.csv')])
+
+    def version(self, test_name):
+        # Modification times of every file results for test depend on
+        exp_info = self.get_exp_info()
+        if test_name not in exp_info:
+            raise KeyError(f'Unknown test: {test_name}')
+        files = [f'{data_dir}{test_name}.csv', exp_info_file, exp_info[test_name].channels.file_loc] + config_files
+        return(tuple(os.path.getmtime(f) for f in files))
+
+    def get_test(self, test_name):
+        # Loaded & processed test from cache (loaded once even if requested by several workers)
+        version = self.version(test_name)
+        test = self.tests.get(test_name, version)
+        if test is not None:
+            return(test, version)
+        with self.lock:
+            load_lock = self.load_locks.setdefault(test_name, threading.Lock())
+        with load_lock:
+            test = self.tests.get(test_name, version)
+            if test is None:
+                test = ProcessedExp(self.get_exp_info()[test_name], data_dir, plot.compact_dtypes, plot.filter_data, plot.screen_sensors)
+                if plot.layer_analysis:
+                    test.add_layer_channels(plot.layer_method, plot.layer_percent, plot.ceiling_heights)
+                if plot.fed_analysis:
+                    test.add_fed_channels(plot.fed_start)
+                test.process_channels()
+                self.tests.put(test_name, version, test)
+        return(test, version)
+
+    def cached_output(self, key, test_name, render):
+        # Rendered output from cache or render(test) (rendered once even if
+        #   requested by several workers)
+        test, version = self.get_test(test_name)
+        output = self.outputs.get(key, version)
+        if output is not None:
+            return(output)
+        with self.lock:
+            output_lock = self.output_locks.setdefault(key, threading.Lock())
+        with output_lock:
+            output = self.outputs.get(key, version)
+            if output is None:
+                output = render(test)
+                self.outputs.put(key, version, output)
+        return(output)
+
+    def test_info(self, test_name):
+        test, version = self.get_test(test_name)
+        return({'test': test_name, 'groups': {g: test.group_channels(g) for g in test.groups()}})
+
+    def render_chart(self, test, group, file_format):
+        # pdf/png chart of group from plot.py
+        if group not in test.groups():
+            raise KeyError(f'Unknown group: {group}')
+        chart = ChartBuffer(file_format)
+        with self.render_lock:
+            plot.plot_group(test, group, '', chart)
+        return(chart.buffer.getvalue())
+
+    def render_bokeh(self, test, group):
+        # Bokeh json item of group from plot_html.py with data in its sources
+        from bokeh.embed import json_item
+        if group not in test.groups():
+            raise KeyError(f'Unknown group: {group}')
+        p, sources, channel_data, layout = plot_html.plot_group(test, group)
+        return(json.dumps(json_item(p)).encode('utf-8'))
+
+    def render_dashboard(self, test):
+        # Html dashboard of test (page & pyramid tiles) in a build dir of
+        #   its version; built in a temp dir & renamed into place, so a
+        #   finished build is never changed (reused if cache entry was
+        #   dropped) & builds of older versions are removed afterwards
+        test_dir = f'{service_dir}{test.test_name}/'
+        build = hashlib.sha1(repr(self.version(test.test_name)).encode('utf-8')).hexdigest()[:12]
+        save_dir = f'{test_dir}{build}/'
+        if not os.path.isdir(save_dir):
+            os.makedirs(test_dir, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix='.build_', dir=test_dir)
+            try:
+                plot_html.save_html_dashboard(test, f'{temp_dir}/')
+                os.rename(temp_dir, save_dir)
+            finally:
+                if os.path.exists(temp_dir):
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+        for name in os.listdir(test_dir):
+            if name != build:
+                shutil.rmtree(os.path.join(test_dir, name), ignore_errors=True)
+        return(save_dir)
+
+    def channel_data(self, test_name, channel, file_format, t0=None, t1=None):
+        # Processed data of channel between t0 & t1 as json or csv
+        test, version = self.get_test(test_name)
+        if channel not in test.processed_data:
+            raise KeyError(f'Unknown channel: {channel}')
+        data = test.processed_data[channel]
+        data = data[(data.index >= (t0 if t0 is not None else -float('inf'))) &
+                    (data.index <= (t1 if t1 is not None else float('inf')))]
+        if file_format == 'csv':
+            return(data.rename(channel).to_csv(index_label='Time').encode('utf-8'))
+        return(json.dumps({'channel': channel, 'time': data.index.tolist(),
+                           'values': [None if pd.isna(v) else v for v in data.tolist()]}).encode('utf-8'))
+
+class ChartBuffer:
+    def __init__(self, file_format):
+        # Stands in for PdfPages in plot.format_and_save_plot; chart is saved to memory
+        self.file_format = file_format
+        self.buffer = io.BytesIO()
+
+    def savefig(self, fig, dpi=None):
+        fig.savefig(self.buffer, format=self.file_format, dpi=dpi)
+
+class PooledHTTPServer(HTTPServer):
+    def __init__(self, address, handler, service, workers=4):
+        # Http server handing each request to a fixed pool of worker threads
+        super().__init__(address, handler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+class ChartRequestHandler(BaseHTTPRequestHandler):
+    content_types = {'json': 'application/json', 'csv': 'text/csv', 'pdf': 'application/pdf', 'png': 'image/png'}
+
+    def send_bytes(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, value, status=200):
+        self.send_bytes(json.dumps(value).encode('utf-8'), 'application/json', status)
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        query = {k: float(v[0]) for k, v in parse_qs(url.query).items() if k in ['t0', 't1']}
+        try:
+            if parts == ['tests']:
+                self.send_json(service.test_names())
+            elif len(parts) == 2 and parts[0] == 'tests':
+                self.send_json(service.test_info(parts[1]))
+            elif len(parts) == 3 and parts[0] == 'chart' and parts[2].endswith(('.pdf', '.png')):
+                test_name, (group, file_format) = parts[1], parts[2].rsplit('.', 1)
+                body = service.cached_output(('chart', test_name, group, file_format), test_name,
+                                             lambda test: service.render_chart(test, group, file_format))
+                self.send_bytes(body, self.content_types[file_format])
+            elif len(parts) == 3 and parts[0] == 'bokeh' and parts[2].endswith('.json'):
+                test_name, group = parts[1], parts[2][:-5]
+                body = service.cached_output(('bokeh', test_name, group), test_name,
+                                             lambda test: service.render_bokeh(test, group))
+                self.send_bytes(body, self.content_types['json'])
+            elif len(parts) == 3 and parts[0] == 'data' and parts[2].endswith(('.json', '.csv')):
+                channel, file_format = parts[2].rsplit('.', 1)
+                body = service.channel_data(parts[1], channel, file_format, query.get('t0'), query.get('t1'))
+                self.send_bytes(body, self.content_types[file_format])
+            elif len(parts) >= 2 and parts[0] == 'html':
+                self.send_dashboard_file(service, parts[1], parts[2:])
+            else:
+                self.send_json({'error': f'Unknown request: {url.path}'}, 404)
+        except (KeyError, FileNotFoundError) as e:
+            self.send_json({'error': str(e).strip("'")}, 404)
+        except Exception as e:
+            self.send_json({'error': f'{type(e).__name__}: {e}'}, 500)
+
+    def send_dashboard_file(self, service, test_name, file_parts):
+        # Dashboard page (built on first request for each version) or one of its data tiles
+        if not file_parts and not self.path.endswith('/'):
+            # Tile paths in page are relative to the dashboard dir
+            self.send_response(301)
+            self.send_header('Location', f'{self.path}/')
+            self.end_headers()
+            return
+        save_dir = service.cached_output(('html', test_name), test_name, service.render_dashboard)
+        file_loc = os.path.realpath(os.path.join(save_dir, *file_parts) if file_parts else f'{save_dir}{test_name}.html')
+        if not file_loc.startswith(os.path.realpath(save_dir)) or not os.path.isfile(file_loc):
+            raise FileNotFoundError(f"Not found: {'/'.join(file_parts)}")
+        with open(file_loc, 'rb') as f:
+            body = f.read()
+        self.send_bytes(body, mimetypes.guess_type(file_loc)[0] or 'application/octet-stream')
+
+    def log_message(self, format, *args):
+        print(f'    {self.address_string()} {format % args}')
+
+# ------------------ #
+# Start Chart Server #
+# ------------------ #
+if __name__ == '__main__':
+    server = PooledHTTPServer((host, port), ChartRequestHandler, ChartService(max_tests, max_outputs), workers)
+    print(f'Serving charts for {info_dir} at http://{host}:{port}/tests (Ctrl+C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,209 @@
+# chunked_processing.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Out-of-core processing of DAQ data files too large for memory       #
+#       (multi-day monitoring, high-rate runs); file is streamed in     #
+#       blocks of chunk_rows rows, so peak memory is set by chunk_rows  #
+#       & not by length of file                                         #
+# - Test is read in three passes:                                       #
+#       1. time & event columns only -> event index & ignition time     #
+#       2. rows in baseline window -> baseline statistics (stops once   #
+#           window end is passed)                                       #
+#       3. all active channels -> converted data & running reductions   #
+# - Time is seconds from midnight of first day in file (same as         #
+#       plot.py for single day tests; keeps counting past midnight)     #
+# - Blocks overlap so windowed transforms see the rows they need:       #
+#       + centered rolling filters need filter_rows // 2 rows on each   #
+#           side of an output row                                       #
+#       + delay-corrected gas channels need rows up to the largest      #
+#           transport delay after an output row (+ filter rows)         #
+#       + output rows match processing the whole file at once           #
+# - Running reductions (RunningStats) combine blocks exactly: count,    #
+#       mean, min, max & time of max, trapezoidal integral (carries     #
+#       last row of previous block across block boundaries)             #
+# - lowess filters (plot.py) use a fraction of the whole test & can't   #
+#       be streamed; chunked filtering is a centered rolling mean       #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+from daq_loader import iter_daq_chunks, scale_channels, event_column
+from event_index import EventIndex
+from baseline_stats import compute_test_baselines
+from gas_alignment import align_gas_to_grid
+from bdp_flow import compute_probe_velocities
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def chunk_time(timestamps, day_start):
+    # Seconds since day_start for 'Time' column of a block
+    return((pd.to_datetime(timestamps) - day_start).dt.total_seconds().to_numpy())
+
+def read_chunked_events(file_loc, chunk_rows=100000):
+    # Pass 1: event index (time since midnight of first day), start of first
+    #   day & sample interval read from time & event columns only
+    event_times, event_labels = [], []
+    day_start, sample_dt = None, np.nan
+    for chunk in iter_daq_chunks(file_loc, channels=[], chunk_rows=chunk_rows):
+        if day_start is None:
+            day_start = pd.to_datetime(chunk['Time'].iloc[0]).normalize()
+        time = chunk_time(chunk['Time'], day_start)
+        if len(time) > 1:
+            sample_dt = np.nanmin([sample_dt, np.min(np.diff(time))])
+        if event_column in chunk.columns:
+            has_event = pd.notna(chunk[event_column]).values
+            event_times.extend(time[has_event])
+            event_labels.extend(chunk[event_column].values[has_event].astype(str))
+    if day_start is None:
+        raise ValueError(f'No data rows in {file_loc}')
+    return(EventIndex(event_times, event_labels), day_start, sample_dt)
+
+def read_chunked_baselines(file_loc, channel_list, channels, window, day_start, ignition_time,
+                           chunk_rows=100000, use_float32=False):
+    # Pass 2: baseline statistics from rows in [start, end) of window; only
+    #   rows in window are kept & reading stops after window end
+    window_rows = []
+    for chunk in iter_daq_chunks(file_loc, channels, chunk_rows, use_float32):
+        time = chunk_time(chunk['Time'], day_start) - ignition_time
+        if time[0] >= window[1]:
+            break
+        in_window = (time >= window[0]) & (time < window[1])
+        chunk.index = time
+        window_rows.append(chunk.loc[in_window, [c for c in channels if c in chunk.columns]])
+    window_data = pd.concat(window_rows)
+    return(compute_test_baselines(window_data, channel_list, channels, window))
+
+def iter_blocks(chunks, before=0, after=0):
+    # Combine consecutive chunks into overlapping blocks; yields (block, i0, i1)
+    #   where rows [i0, i1) of block are output rows with at least `before`
+    #   rows before & `after` rows after them in block (fewer at file ends)
+    carry, n_done = None, 0
+    for chunk in chunks:
+        block = chunk if carry is None else pd.concat([carry, chunk])
+        i0 = n_done
+        i1 = max(len(block) - after, i0)
+        if i1 > i0:
+            yield(block, i0, i1)
+
+        # Keep rows not yet output & context rows ahead of them for next block
+        keep = max(i1 - before, 0)
+        carry, n_done = block.iloc[keep:], i1 - keep
+
+    if carry is not None and len(carry) > n_done:
+        yield(carry, n_done, len(carry))
+
+def get_context_rows(filter_rows, gas_delays, sample_dt):
+    # Rows needed before & after each output row by chunked transforms
+    half_window = filter_rows // 2 if filter_rows else 0
+    gas_rows = 0
+    if len(gas_delays) > 0 and sample_dt > 0:
+        gas_rows = int(np.ceil(gas_delays.max() / sample_dt)) + 1
+    # Filter is applied after gas alignment, so gas rows add to filter window
+    return(half_window, half_window + gas_rows)
+
+def convert_block(block, channel_list, channels, baselines, gas_delays, probe_pairs, filter_rows=0):
+    # Convert data of channels in block (indexed by time) with the same
+    #   transforms as plot.py; gas channels are interpolated onto block time
+    types = channel_list.loc[channels, 'Type']
+    means = baselines['Mean'].reindex(channels)
+    converted = pd.DataFrame(scale_channels(block, channel_list, channels), index=block.index, columns=channels)
+
+    # Zero heat flux & pressure with baseline mean
+    zeroed = types.index[types.isin(['Heat_Flux', 'Pressure'])]
+    converted[zeroed] = converted[zeroed] - means[zeroed]
+
+    # Delay-corrected gas channels zeroed to 0 (CO/CO2) or 20.95 (O2)
+    if len(gas_delays) > 0:
+        gas_channels = gas_delays.index
+        aligned = align_gas_to_grid(block, channel_list, gas_delays)
+        gas_zero = np.where(gas_channels.str.contains('CO'), 0., 20.95)
+        converted[gas_channels] = aligned - (means[gas_channels].to_numpy() - gas_zero)
+
+    if len(probe_pairs) > 0:
+        velocity, temperature = compute_probe_velocities(block, channel_list, probe_pairs, baselines)
+        converted[velocity.columns] = velocity
+
+    # Centered rolling mean (rows at ends of file without full window are nan)
+    if filter_rows:
+        converted = converted.rolling(window=filter_rows, center=True).mean()
+
+    return(converted)
+
+class RunningStats:
+    def __init__(self, n_columns, start=-np.inf, end=np.inf):
+        # Running reductions of every column for rows with start <= time <= end
+        self.start = start
+        self.end = end
+        self.rows = 0
+        self.count = np.zeros(n_columns, dtype=np.int64)
+        self.total = np.zeros(n_columns)
+        self.minimum = np.full(n_columns, np.inf)
+        self.maximum = np.full(n_columns, -np.inf)
+        self.max_time = np.full(n_columns, np.nan)
+        self.integral = np.zeros(n_columns)
+        self.last_time = None
+        self.last_row = None
+
+    def update(self, time, values):
+        # Add block of rows (time array, 2-D values array) in time order
+        i0 = np.searchsorted(time, self.start, side='left')
+        i1 = np.searchsorted(time, self.end, side='right')
+        if i1 <= i0:
+            return
+        t = time[i0:i1].astype(np.float64)
+        y = values[i0:i1].astype(np.float64)
+        valid = ~np.isnan(y)
+        self.rows += len(t)
+        self.count += valid.sum(axis=0)
+        self.total += np.nansum(y, axis=0)
+        self.minimum = np.minimum(self.minimum, np.min(np.where(valid, y, np.inf), axis=0))
+
+        # Max of block replaces running max only if larger (keeps first time of peak)
+        max_row = np.argmax(np.where(valid, y, -np.inf), axis=0)
+        block_max = y[max_row, np.arange(y.shape[1])]
+        larger = valid.any(axis=0) & (block_max > self.maximum)
+        self.maximum[larger] = block_max[larger]
+        self.max_time[larger] = t[max_row][larger]
+
+        # Trapezoidal integral including segment from last row of previous block
+        if self.last_time is not None:
+            t = np.concatenate([[self.last_time], t])
+            y = np.vstack([self.last_row, y])
+        segments = 0.5 * (y[1:] + y[:-1]) * np.diff(t)[:, np.newaxis]
+        self.integral += np.nansum(segments, axis=0)
+        self.last_time, self.last_row = t[-1], y[-1]
+
+    def results(self):
+        # Dict of arrays: Count, Mean, Min, Max, Time_of_Max & Integral (nan for
+        #   columns without valid rows)
+        has_data = self.count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.total / self.count
+        return({'Count': self.count,
+                'Mean': np.where(has_data, mean, np.nan),
+                'Min': np.where(has_data, self.minimum, np.nan),
+                'Max': np.where(has_data, self.maximum, np.nan),
+                'Time_of_Max': np.where(has_data, self.max_time, np.nan),
+                'Integral': np.where(has_data, self.integral, np.nan)})
+
+def running_window_table(window_stats, channels):
+    # Event window table in same format as event_index.window_stats from dict
+    #   of name: RunningStats
+    window_tables = []
+    for name, stats in window_stats.items():
+        results = stats.results()
+        if stats.rows == 0:
+            continue
+        window_tables.append(pd.DataFrame({'Window': name, 'Channel': channels,
+                                           'Start': stats.start, 'End': stats.end,
+                                           'Peak': results['Max'], 'Time_to_Peak': results['Time_of_Max'] - stats.start,
+                                           'Mean': results['Mean'], 'Integral': results['Integral']}))
+
+    if not window_tables:
+        return(pd.DataFrame(columns=['Window', 'Channel', 'Start', 'End', 'Peak', 'Time_to_Peak', 'Mean', 'Integral']))
+    return(pd.concat(window_tables, ignore_index=True))
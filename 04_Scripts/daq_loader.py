@@ -0,0 +1,132 @@
+# daq_loader.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Loader for exp data acquired via NI DAQ (.csv written by LabVIEW)   #
+# - Preamble ('Test Name', 'Engineer', 'Location', 'Test Info') is read #
+#       once & the header row is located without reparsing the file    #
+# - Only the columns needed for the active channel list are loaded      #
+#       (plus 'Time', 'Elapsed Time' & 'Event')                         #
+#       + channel data can be stored as float32 to halve memory         #
+#       + 'Event' column is stored as a categorical                     #
+# - Files too large for memory can be read in blocks of rows            #
+#       (iter_daq_chunks; see chunked_processing.py)                    #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+# ------------------------- #
+# Define Loader Information #
+# ------------------------- #
+# Keys that may appear in the preamble written ahead of the header row
+preamble_keys = ['Test Name', 'Engineer', 'Location', 'Test Info']
+
+# Non-channel columns always loaded when present in the data file
+time_columns = ['Time', 'Elapsed Time']
+event_column = 'Event'
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def read_daq_header(file_loc):
+    # Read preamble lines & locate header row; returns preamble dict,
+    #   number of physical lines ahead of the header & list of column names
+    preamble = {}
+    with open(file_loc, 'r', newline='') as f:
+        for line_num, line in enumerate(f):
+            line = line.rstrip('\r\n')
+            # Skip blank lines between preamble & header
+            if not line.strip(','):
+                continue
+
+            fields = line.split(',')
+            if fields[0] in preamble_keys:
+                preamble[fields[0]] = ','.join(fields[1:]).strip()
+                continue
+
+            # First line that isn't blank or part of preamble is header row
+            return(preamble, line_num, fields)
+
+    raise ValueError(f'No header row found in {file_loc}')
+
+def get_active_channels(channel_list, excluded_groups=(), excluded_channels=()):
+    # Return list of channels in channel list that will be used; channels
+    #   required to compute other channels (e.g. BDP temperatures) are kept
+    excluded_groups = set(excluded_groups)
+    excluded_channels = set(excluded_channels)
+
+    active_channels = []
+    for channel, group in zip(channel_list.index.values, channel_list['Chart'].values):
+        if group in excluded_groups or channel in excluded_channels:
+            continue
+        active_channels.append(channel)
+
+        # Bidirectional probes need paired thermocouple to compute velocity
+        if 'BDPV' in channel:
+            active_channels.append(channel.replace('BDPV', 'BDPT', 1))
+
+    # Remove duplicates while preserving channel list order
+    return(list(dict.fromkeys(active_channels)))
+
+def get_read_args(file_loc, channels=None, use_float32=False):
+    # Header row, columns & data types to read from DAQ data file; if channels
+    #   is None every column in file is read, otherwise only those channels +
+    #   time/event columns
+    preamble, header_row, columns = read_daq_header(file_loc)
+
+    # Determine columns to read; warn about channels missing from file
+    if channels is None:
+        usecols = columns
+    else:
+        column_set = set(columns)
+        missing_channels = [c for c in channels if c not in column_set]
+        if missing_channels:
+            print(f"    Channels not found in {file_loc}: {', '.join(missing_channels)}")
+        keep = set(channels) | set(time_columns) | {event_column}
+        usecols = [c for c in columns if c in keep]
+
+    # Set data types for each column
+    data_dtype = 'float32' if use_float32 else 'float64'
+    dtypes = {}
+    for c in usecols:
+        if c in time_columns:
+            dtypes[c] = str
+        elif c == event_column:
+            dtypes[c] = 'category'
+        else:
+            dtypes[c] = data_dtype
+
+    return(preamble, header_row, usecols, dtypes)
+
+def load_daq_data(file_loc, channels=None, use_float32=False):
+    # Read DAQ data file in one pass; if channels is None every column in
+    #   file is loaded, otherwise only those channels + time/event columns
+    preamble, header_row, usecols, dtypes = get_read_args(file_loc, channels, use_float32)
+
+    # Read data starting at header row; blank cells are read as nan values
+    exp_data = pd.read_csv(file_loc, skiprows=header_row, header=0, usecols=usecols,
+        dtype=dtypes, skipinitialspace=True)
+    exp_data.attrs['preamble'] = preamble
+
+    return(exp_data)
+
+def iter_daq_chunks(file_loc, channels=None, chunk_rows=100000, use_float32=False):
+    # Read DAQ data file in blocks of chunk_rows rows (same columns & types as
+    #   load_daq_data); only one block is held in memory at a time
+    preamble, header_row, usecols, dtypes = get_read_args(file_loc, channels, use_float32)
+
+    with pd.read_csv(file_loc, skiprows=header_row, header=0, usecols=usecols, dtype=dtypes,
+                     skipinitialspace=True, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            chunk.attrs['preamble'] = preamble
+            yield chunk
+
+def scale_channels(exp_data, channel_list, channels):
+    # Return 2-D array (time x channel) of data for channels scaled with
+    #   scale & offset from channel list
+    scale = channel_list.loc[channels, 'Scale'].to_numpy(dtype=np.float64)
+    offset = channel_list.loc[channels, 'Offset'].to_numpy(dtype=np.float64)
+    return(exp_data[channels].to_numpy(dtype=np.float64) * scale + offset)
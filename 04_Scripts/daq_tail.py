@@ -0,0 +1,315 @@
+# daq_tail.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Follows a DAQ .csv file that is still being written during a burn   #
+# - Only rows completed since the last update are parsed; the saved     #
+#       byte offset marks where the next update starts                  #
+#       + channel arrays are extended in place (capacity doubles when   #
+#           full) so refresh cost is proportional to the new data       #
+#       + baselines (mean of data before ignition), running max &       #
+#           event list are updated from the new rows only               #
+#       + ignition is event number ignition_event (Ignition_Event of    #
+#           exp_info) if given, else first event labeled ignition_label #
+# - If a checkpoint dir is given, new rows are appended to one binary   #
+#       file per column & the offset/state is saved to state.json so    #
+#       ingestion resumes after a crash without reparsing the file      #
+# - Run from 04_Scripts to follow a file from the command line:         #
+#       python daq_tail.py ../02_Data/PFE_2.csv                         #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import io
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+
+from daq_loader import read_daq_header, time_columns, event_column
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def timestamps_to_seconds(timestamps):
+    # Convert 'YYYY-MM-DD hh:mm:ss' timestamps to seconds since epoch
+    timestamps = pd.to_datetime(pd.Series(timestamps))
+    return(timestamps.values.astype('datetime64[s]').astype(np.float64))
+
+def write_json_atomic(file_loc, data):
+    # Write json file via temp file so partial state file is never left behind
+    temp_loc = f'{file_loc}.tmp'
+    with open(temp_loc, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_loc, file_loc)
+
+class DAQTail:
+    def __init__(self, file_loc, channels=None, use_float32=True, checkpoint_dir=None, ignition_label='Ignition',
+                 ignition_event=None):
+        self.file_loc = file_loc
+        self.dtype = np.float32 if use_float32 else np.float64
+        self.checkpoint_dir = checkpoint_dir
+        self.ignition_label = ignition_label
+        self.ignition_event = ignition_event
+
+        # Locate header row & byte offset of first data row
+        preamble, header_row, columns = read_daq_header(file_loc)
+        self.preamble = preamble
+        self.header_columns = columns
+        with open(file_loc, 'rb') as f:
+            for _ in range(header_row + 1):
+                f.readline()
+            self.data_offset = f.tell()
+
+        # Channels to store; time & event columns are handled separately
+        if channels is None:
+            channels = [c for c in columns if c not in time_columns and c != event_column]
+        self.channels = [c for c in channels if c in columns]
+
+        self.reset()
+
+        if checkpoint_dir is not None:
+            if not os.path.exists(checkpoint_dir):
+                os.makedirs(checkpoint_dir)
+            self.load_checkpoint()
+
+    def reset(self):
+        # Clear stored data & incremental state
+        self.offset = self.data_offset
+        self.n_rows = 0
+        self.capacity = 0
+        self.time = np.empty(0, dtype=np.float64)
+        self.data = {c: np.empty(0, dtype=self.dtype) for c in self.channels}
+        self.events = []
+        self.ignition_time = np.nan
+        self.baseline_sum = np.zeros(len(self.channels))
+        self.baseline_count = np.zeros(len(self.channels))
+        self.running_max = np.full(len(self.channels), -np.inf)
+
+    # Data stored so far; arrays are views (no copies) of first n_rows
+    def get_time(self, relative_to_ignition=True):
+        t = self.time[:self.n_rows]
+        if relative_to_ignition and not np.isnan(self.ignition_time):
+            return(t - self.ignition_time)
+        return(t)
+
+    def get_channel(self, channel):
+        return(self.data[channel][:self.n_rows])
+
+    def window_start(self, window_length):
+        # First stored row of last window_length seconds (from Time column,
+        #   so rows kept follow the file's sample rate)
+        if self.n_rows == 0:
+            return(0)
+        t = self.time[:self.n_rows]
+        return(int(np.searchsorted(t, t[-1] - window_length, side='left')))
+
+    def get_baselines(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return(pd.Series(self.baseline_sum / self.baseline_count, index=self.channels))
+
+    def get_running_max(self):
+        return(pd.Series(self.running_max, index=self.channels))
+
+    def to_dataframe(self, relative_to_ignition=True):
+        df = pd.DataFrame({c: self.get_channel(c) for c in self.channels},
+            index=pd.Index(self.get_time(relative_to_ignition), name='Time'))
+        return(df)
+
+    def grow(self, n_new):
+        # Increase capacity of stored arrays (amortized doubling) to fit new rows
+        n_needed = self.n_rows + n_new
+        if n_needed <= self.capacity:
+            return
+        capacity = max(n_needed, 2 * self.capacity, 1024)
+        new_time = np.empty(capacity, dtype=np.float64)
+        new_time[:self.n_rows] = self.time[:self.n_rows]
+        self.time = new_time
+        for c in self.channels:
+            new_data = np.empty(capacity, dtype=self.dtype)
+            new_data[:self.n_rows] = self.data[c][:self.n_rows]
+            self.data[c] = new_data
+        self.capacity = capacity
+
+    def read_new_rows(self):
+        # Read bytes written since last offset; only keep completed rows
+        with open(self.file_loc, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            file_size = f.tell()
+            # File was truncated/replaced; start over from data offset
+            if file_size < self.offset:
+                self.reset()
+                if self.checkpoint_dir is not None:
+                    self.clear_checkpoint()
+            f.seek(self.offset)
+            chunk = f.read(file_size - self.offset)
+
+        last_newline = chunk.rfind(b'\n')
+        if last_newline == -1:
+            return(None, 0)
+        chunk = chunk[:last_newline + 1]
+
+        # Parse new rows using column names from header row
+        usecols = ['Time'] + self.channels
+        if event_column in self.header_columns:
+            usecols.append(event_column)
+        dtypes = {c: self.dtype for c in self.channels}
+        dtypes['Time'] = str
+        dtypes[event_column] = str
+        new_rows = pd.read_csv(io.BytesIO(chunk), header=None, names=self.header_columns, usecols=usecols,
+            dtype=dtypes, skipinitialspace=True)
+
+        return(new_rows, len(chunk))
+
+    def update(self):
+        # Ingest newly completed rows; returns number of rows added
+        new_rows, n_bytes = self.read_new_rows()
+        if new_rows is None or len(new_rows) == 0:
+            return(0)
+
+        n_new = len(new_rows)
+        start = self.n_rows
+        self.grow(n_new)
+
+        # Extend stored arrays in place
+        new_time = timestamps_to_seconds(new_rows['Time'])
+        self.time[start:start + n_new] = new_time
+        new_data = new_rows[self.channels].to_numpy(dtype=self.dtype)
+        for i, c in enumerate(self.channels):
+            self.data[c][start:start + n_new] = new_data[:, i]
+
+        # Add new events; ignition time is set by first ignition event
+        n_pre_ignition = n_new if np.isnan(self.ignition_time) else 0
+        if event_column in new_rows.columns:
+            event_labels = new_rows[event_column].values
+            for row in np.flatnonzero(new_rows[event_column].notna().values):
+                self.events.append((float(new_time[row]), event_labels[row]))
+                if np.isnan(self.ignition_time) and self.is_ignition(len(self.events) - 1, event_labels[row]):
+                    self.ignition_time = float(new_time[row])
+                    n_pre_ignition = row
+
+        # Update baselines (data before ignition) & running max with new rows only
+        if n_pre_ignition > 0:
+            pre_data = new_data[:n_pre_ignition]
+            self.baseline_sum += np.nansum(pre_data, axis=0)
+            self.baseline_count += np.sum(~np.isnan(pre_data), axis=0)
+        with np.errstate(invalid='ignore'):
+            self.running_max = np.fmax(self.running_max, np.nanmax(new_data, axis=0, initial=-np.inf))
+
+        self.n_rows += n_new
+        self.offset += n_bytes
+
+        if self.checkpoint_dir is not None:
+            self.save_checkpoint(start)
+
+        return(n_new)
+
+    def is_ignition(self, event_number, label):
+        # Ignition is event number ignition_event if set, else labeled ignition_label
+        if self.ignition_event is not None:
+            return(event_number == self.ignition_event)
+        return(label == self.ignition_label)
+
+    # Checkpoint files: one binary file per column + state.json
+    def column_file(self, column):
+        return(os.path.join(self.checkpoint_dir, f'{column}.bin'))
+
+    def save_checkpoint(self, start):
+        # Append new rows to column files, then save state
+        with open(self.column_file('_time'), 'ab') as f:
+            self.time[start:self.n_rows].tofile(f)
+        for c in self.channels:
+            with open(self.column_file(c), 'ab') as f:
+                self.data[c][start:self.n_rows].tofile(f)
+
+        state = {'file_loc': os.path.abspath(self.file_loc),
+                 'header_columns': self.header_columns,
+                 'channels': self.channels,
+                 'dtype': np.dtype(self.dtype).name,
+                 'offset': self.offset,
+                 'n_rows': self.n_rows,
+                 'events': self.events,
+                 'ignition_time': self.ignition_time,
+                 'baseline_sum': self.baseline_sum.tolist(),
+                 'baseline_count': self.baseline_count.tolist(),
+                 'running_max': self.running_max.tolist()}
+        write_json_atomic(os.path.join(self.checkpoint_dir, 'state.json'), state)
+
+    def clear_checkpoint(self):
+        for c in ['_time'] + self.channels:
+            if os.path.exists(self.column_file(c)):
+                os.remove(self.column_file(c))
+        if os.path.exists(os.path.join(self.checkpoint_dir, 'state.json')):
+            os.remove(os.path.join(self.checkpoint_dir, 'state.json'))
+
+    def load_checkpoint(self):
+        # Resume from saved state if it matches current file & channels
+        state_loc = os.path.join(self.checkpoint_dir, 'state.json')
+        if not os.path.exists(state_loc):
+            self.clear_checkpoint()
+            return(False)
+
+        with open(state_loc, 'r') as f:
+            state = json.load(f)
+
+        if (state['file_loc'] != os.path.abspath(self.file_loc) or state['header_columns'] != self.header_columns
+                or state['channels'] != self.channels or state['dtype'] != np.dtype(self.dtype).name
+                or os.path.getsize(self.file_loc) < state['offset']):
+            print(f'    Checkpoint in {self.checkpoint_dir} does not match {self.file_loc}; starting over')
+            self.clear_checkpoint()
+            return(False)
+
+        # Read column files & trim any rows appended after state was saved
+        n_rows = state['n_rows']
+        self.grow(n_rows)
+        for c in ['_time'] + self.channels:
+            dtype = np.float64 if c == '_time' else self.dtype
+            values = np.fromfile(self.column_file(c), dtype=dtype)
+            if len(values) < n_rows:
+                print(f'    Checkpoint in {self.checkpoint_dir} is incomplete; starting over')
+                self.reset()
+                self.clear_checkpoint()
+                return(False)
+            if len(values) > n_rows:
+                with open(self.column_file(c), 'r+b') as f:
+                    f.truncate(n_rows * np.dtype(dtype).itemsize)
+            if c == '_time':
+                self.time[:n_rows] = values[:n_rows]
+            else:
+                self.data[c][:n_rows] = values[:n_rows]
+
+        self.n_rows = n_rows
+        self.offset = state['offset']
+        self.events = [tuple(e) for e in state['events']]
+        self.ignition_time = state['ignition_time'] if state['ignition_time'] is not None else np.nan
+        self.baseline_sum = np.asarray(state['baseline_sum'])
+        self.baseline_count = np.asarray(state['baseline_count'])
+        self.running_max = np.asarray(state['running_max'])
+        print(f'    Resumed {self.file_loc} from checkpoint ({n_rows} rows)')
+        return(True)
+
+def follow(file_loc, channels=None, interval=1.0, checkpoint_dir=None):
+    # Poll growing data file & print latest values for each channel
+    tail = DAQTail(file_loc, channels, checkpoint_dir=checkpoint_dir)
+    print(f'--- Following {file_loc} ---')
+    try:
+        while True:
+            n_events = len(tail.events)
+            n_new = tail.update()
+            if n_new > 0:
+                t = tail.get_time()[-1]
+                latest = ', '.join([f'{c}: {tail.get_channel(c)[-1]:.2f}' for c in tail.channels])
+                print(f'  t = {t:.0f} s (+{n_new} rows) | {latest}')
+                for event_time, label in tail.events[n_events:]:
+                    print(f'  Event: {label}')
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
+    return(tail)
+
+if __name__ == '__main__':
+    data_file = sys.argv[1]
+    checkpoint_dir = f'{data_file[:-4]}_checkpoint/'
+    follow(data_file, checkpoint_dir=checkpoint_dir)
@@ -0,0 +1,265 @@
+# decay_models.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Post-burn decay of particulate (DustTrak DRX) & gas (MultiRAE)      #
+#       readings across the burn day & Day 1/3/5 sessions of each burn  #
+#       + sessions are put on one timeline per burn: hours from first   #
+#           reading of burn-day Post sessions (first post-burn session  #
+#           if a burn has no Post session)                              #
+#       + day of a session from its dir ('1 Day Post', 'Day 3'; burn    #
+#           day if none), session from file name (Pre, Post, AM, PM,    #
+#           60min); Pre sessions are not fit                            #
+#       + readings of each session are binned (median of bin_minutes)   #
+#           so long & short sessions & spikes (e.g. people in the room) #
+#           do not drive fits                                           #
+# - Burns of DRX & MultiRAE dirs matched by burn number (Burn_05)       #
+# - Series: each size fraction/gas of each instrument (serial number)   #
+#       of a burn; AM/PM & 60min sessions are separate instruments      #
+# - Models fit to log of readings (bins at or below 0 are dropped) for  #
+#       all series at once by least squares on padded (series x bin)    #
+#       arrays:                                                         #
+#       + exponential: C = C_ref exp(-Rate t), Half_Life = ln 2 / Rate  #
+#           (none if Rate <= 0, i.e. readings rising)                   #
+#       + power law: C = C_ref t^-Rate (C_ref at t = 1 h)               #
+#       + standard errors from residuals; 95% intervals are +/- 1.96 SE #
+#           (bins are not independent, so intervals are a lower bound)  #
+# - Series need min_points bins from min_sessions sessions & readings   #
+#       that change (flat series, e.g. gas at one count, are not fit)   #
+# - compare_decay: inverse-variance weighted mean rate of each group of #
+#       burns (fuel package, or burn if burns are not grouped)          #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from rae_loader import find_rae_files, read_rae_file
+from trakpro_loader import find_trakpro_files, read_trakpro_file
+
+# ---------------------------- #
+# Define Default Decay Options #
+# ---------------------------- #
+# bin_minutes: length of bins readings are reduced to (median)
+# min_points/min_sessions: bins & sessions a series needs to be fit
+# rae_measure: MultiRAE reading (Min, Avg, Max or Real)
+default_decay_options = {'bin_minutes': 15., 'min_points': 6, 'min_sessions': 2, 'rae_measure': 'Avg'}
+
+decay_model_names = ['Exponential', 'Power_Law']
+
+# Two-sided 95% normal quantile for rate intervals
+z_95 = 1.959964
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_burn(name):
+    # Burn of log name from its burn dir ('Burn5_09OCT2020' & '09OCT2020_Burn_05'
+    #   are both Burn_05); burn dir if it has no burn number
+    match = re.search(r'Burn_?(\d+)', name.split('/')[0], re.IGNORECASE)
+    return(f'Burn_{int(match.group(1)):02d}' if match else name.split('/')[0])
+
+def get_session_day(name):
+    # Days after burn from day dir of log name (0 for burn day)
+    for part in name.split('/')[1:-1]:
+        match = re.search(r'(\d+)\s*Day|Day\s*(\d+)', part, re.IGNORECASE)
+        if match:
+            return(int(match.group(1) or match.group(2)))
+    return(0)
+
+def get_session_label(name):
+    # Session of log from file name: 60min, AM, PM, Pre or Post
+    stem = name.split('/')[-1]
+    if re.search(r'_60(min)?(_|$)', stem, re.IGNORECASE):
+        return('60min')
+    for label in ['AM', 'PM', 'Pre', 'Post']:
+        if re.search(rf'_{label}(_\d+)?$', stem, re.IGNORECASE):
+            return(label)
+    return('')
+
+def bin_readings(readings, bin_minutes):
+    # Median time & readings of bins of bin_minutes from first reading
+    #   (readings: df indexed by Date/Time)
+    elapsed = (readings.index - readings.index[0]).total_seconds().to_numpy()
+    bins = (elapsed // (60. * bin_minutes)).astype(np.int64)
+    binned = readings.groupby(bins).median()
+    binned.index = pd.DatetimeIndex(pd.Series(readings.index).groupby(bins).median().to_numpy(), name='Date/Time')
+    return(binned)
+
+def read_session_bins(source, name, file_loc, options=default_decay_options, skip_lines={}):
+    # Read export of source ('DRX' or 'RAE') & bin its readings (run in
+    #   worker processes); returns list of (instrument & first reading,
+    #   session info, binned readings, units of each column)
+    stem = name.split('/')[-1]
+    if source == 'DRX':
+        log = read_trakpro_file(file_loc, name, skip_lines.get(stem, ()))
+        logs = [] if log is None else [log]
+    else:
+        logs = read_rae_file(file_loc, name)
+
+    sessions = []
+    for log in logs:
+        if source == 'DRX':
+            instrument = log.info.get('Serial Number', '')
+            readings, units = log.data, {c: 'mg/m^3' for c in log.data.columns}
+        else:
+            instrument = log.info.get('Unit SN', '')
+            readings = log.readings(options['rae_measure']).astype(np.float64)
+            units = log.sensors['Units'].to_dict()
+        if len(readings) == 0:
+            continue
+        info = {'Source': source, 'Burn': get_burn(name), 'Instrument': instrument, 'Log': log.name,
+                'Day': get_session_day(name), 'Session': get_session_label(log.name),
+                'Begin': readings.index[0], 'End': readings.index[-1]}
+        sessions.append(((source, instrument, log.begin), info, bin_readings(readings, options['bin_minutes']), units))
+    return(sessions)
+
+def load_session_bins(particulate_dir=None, rae_dir=None, options=default_decay_options, skip_lines={}, workers=None,
+                      skip_dirs=['OLDignore']):
+    # Binned readings of every DRX & MultiRAE session with workers processes
+    #   (None: one per CPU, 1: in this process); copies of a session (same
+    #   instrument & first reading) are kept once, in file order
+    tasks = []
+    if particulate_dir is not None:
+        tasks += [('DRX', n, f) for n, f in find_trakpro_files(particulate_dir, skip_dirs).items()]
+    if rae_dir is not None:
+        tasks += [('RAE', n, f) for n, f in find_rae_files(rae_dir, skip_dirs).items()]
+    if workers == 1:
+        file_sessions = [read_session_bins(s, n, f, options, skip_lines) for s, n, f in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(read_session_bins, s, n, f, options, skip_lines) for s, n, f in tasks]
+            file_sessions = [future.result() for future in futures]
+
+    sessions, seen = [], set()
+    for key, info, binned, units in [s for results in file_sessions for s in results]:
+        if key in seen:
+            continue
+        seen.add(key)
+        sessions.append((info, binned, units))
+    return(sessions)
+
+def burn_timelines(session_info):
+    # Start (t = 0) of each burn's timeline: first reading of burn-day Post
+    #   sessions, else first reading of any post-burn session
+    post = session_info[session_info['Session'] != 'Pre']
+    burn_day_post = post[(post['Day'] == 0) & (post['Session'] == 'Post')]
+    starts = post.groupby('Burn')['Begin'].min()
+    starts.update(burn_day_post.groupby('Burn')['Begin'].min())
+    return(starts)
+
+def stitch_sessions(sessions):
+    # Long table of binned readings of post-burn sessions on each burn's
+    #   timeline: Source, Burn, Instrument, Channel, Units, Log, Day,
+    #   Session, Date/Time, Time (h from burn start) & Value
+    session_info = pd.DataFrame([info for info, binned, units in sessions])
+    if len(session_info) == 0:
+        return(pd.DataFrame(), session_info)
+    starts = burn_timelines(session_info)
+    session_info['Burn_Start'] = session_info['Burn'].map(starts)
+
+    parts = []
+    for (info, binned, units), burn_start in zip(sessions, session_info['Burn_Start']):
+        if info['Session'] == 'Pre':
+            continue
+        long = binned.reset_index().melt(id_vars='Date/Time', var_name='Channel', value_name='Value')
+        long['Time'] = (long['Date/Time'] - burn_start).dt.total_seconds() / 3600.
+        long['Units'] = long['Channel'].map(units)
+        parts.append(long.assign(**{k: info[k] for k in ['Source', 'Burn', 'Instrument', 'Log', 'Day', 'Session']}))
+    columns = ['Source', 'Burn', 'Instrument', 'Channel', 'Units', 'Log', 'Day', 'Session', 'Date/Time', 'Time', 'Value']
+    return(pd.concat(parts, ignore_index=True)[columns], session_info)
+
+def fit_log_linear(x, y):
+    # Least squares line y = a + b x for each row of (series x point) arrays
+    #   (nan where a series has no point); returns a, b, SE of a & b, R^2,
+    #   RMSE & number of points of each row
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    n = valid.sum(axis=1)
+    x0, y0 = np.where(valid, x, 0.), np.where(valid, y, 0.)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean, y_mean = x0.sum(axis=1) / n, y0.sum(axis=1) / n
+        dx = np.where(valid, x0 - x_mean[:, np.newaxis], 0.)
+        dy = np.where(valid, y0 - y_mean[:, np.newaxis], 0.)
+        s_xx, s_xy, s_yy = (dx * dx).sum(axis=1), (dx * dy).sum(axis=1), (dy * dy).sum(axis=1)
+        b = s_xy / s_xx
+        a = y_mean - b * x_mean
+        rss = ((dy - b[:, np.newaxis] * dx)**2).sum(axis=1)
+        s2 = rss / (n - 2)
+        se_b = np.sqrt(s2 / s_xx)
+        se_a = np.sqrt(s2 * (1. / n + x_mean**2 / s_xx))
+        r2 = 1. - rss / s_yy
+        rmse = np.sqrt(rss / n)
+    return(a, b, se_a, se_b, r2, rmse, n)
+
+def half_life(rate, no_decay=np.nan):
+    # Half life (h) of exponential rate (1/h); no_decay where rate <= 0
+    with np.errstate(divide='ignore'):
+        return(np.where(rate > 0, np.log(2.) / rate, no_decay))
+
+def fit_decay(series, options=default_decay_options):
+    # Exponential & power law fits of every series of stitched readings
+    #   (stitch_sessions); returns one row per series & model
+    keys = ['Source', 'Burn', 'Instrument', 'Channel', 'Units']
+    usable = series[(series['Value'] > 0) & (series['Time'] > 0)].copy()
+    usable['N_Sessions'] = usable.groupby(keys)['Log'].transform('nunique')
+    usable['N_Points'] = usable.groupby(keys)['Value'].transform('size')
+    changing = usable.groupby(keys)['Value'].transform('nunique') > 1
+    usable = usable[(usable['N_Sessions'] >= options['min_sessions']) & (usable['N_Points'] >= options['min_points']) & changing]
+    if len(usable) == 0:
+        return(pd.DataFrame())
+
+    # Padded (series x point) arrays of time & log of readings
+    groups = usable.groupby(keys, sort=True)
+    row = groups.ngroup().to_numpy()
+    column = groups.cumcount().to_numpy()
+    shape = (row.max() + 1, column.max() + 1)
+    t = np.full(shape, np.nan)
+    log_c = np.full(shape, np.nan)
+    t[row, column] = usable['Time'].to_numpy()
+    log_c[row, column] = np.log(usable['Value'].to_numpy())
+    first = groups.agg(N_Sessions=('N_Sessions', 'first'), N_Points=('N_Points', 'first'),
+                       First_Day=('Day', 'min'), Last_Day=('Day', 'max'),
+                       Start=('Time', 'min'), End=('Time', 'max')).reset_index()
+
+    fits = []
+    for model, x in zip(decay_model_names, [t, np.log(t)]):
+        a, b, se_a, se_b, r2, rmse, n = fit_log_linear(x, log_c)
+        fit = first.assign(Model=model, C_ref=np.exp(a), Rate=-b, Rate_SE=se_b,
+                           Rate_Low=-b - z_95 * se_b, Rate_High=-b + z_95 * se_b,
+                           R2=r2, RMSE_Log=rmse)
+        if model == 'Exponential':
+            fit['Half_Life'] = half_life(fit['Rate'])
+            fit['Half_Life_Low'] = half_life(fit['Rate_High'])
+            fit['Half_Life_High'] = half_life(fit['Rate_Low'], np.inf)
+        fits.append(fit)
+    fits = pd.concat(fits, ignore_index=True)
+
+    # Model with lowest RMSE of log readings for each series
+    best = fits.groupby(keys)['RMSE_Log'].transform('min')
+    fits['Best'] = fits['RMSE_Log'] == best
+    return(fits.sort_values(keys + ['Model']).set_index(keys + ['Model']))
+
+def compare_decay(fits, fuel_packages={}):
+    # Inverse-variance weighted mean rate (& SE) of each source, channel,
+    #   model & group of burns (fuel_packages: {burn: fuel package}; burns
+    #   not listed are their own group), with spread of burn rates
+    if len(fits) == 0:
+        return(pd.DataFrame())
+    table = fits.reset_index()
+    table = table[table['Rate_SE'] > 0]
+    table['Group'] = [fuel_packages.get(b, b) for b in table['Burn']]
+    table['Weight'] = 1. / table['Rate_SE']**2
+    table['Weighted_Rate'] = table['Weight'] * table['Rate']
+    keys = ['Source', 'Channel', 'Units', 'Model', 'Group']
+    groups = table.groupby(keys)
+    comparison = groups.agg(N_Series=('Rate', 'size'), Burns=('Burn', lambda b: '|'.join(sorted(set(b)))),
+                            Rate_Min=('Rate', 'min'), Rate_Max=('Rate', 'max'),
+                            Weight=('Weight', 'sum'), Weighted_Rate=('Weighted_Rate', 'sum'))
+    comparison['Rate'] = comparison['Weighted_Rate'] / comparison['Weight']
+    comparison['Rate_SE'] = 1. / np.sqrt(comparison['Weight'])
+    comparison['Rate_Low'] = comparison['Rate'] - z_95 * comparison['Rate_SE']
+    comparison['Rate_High'] = comparison['Rate'] + z_95 * comparison['Rate_SE']
+    return(comparison.drop(columns=['Weight', 'Weighted_Rate']))
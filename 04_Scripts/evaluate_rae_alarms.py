@@ -0,0 +1,78 @@
+# evaluate_rae_alarms.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Rolling STEL & TWA, alarm & exposure limit checks & calibration     #
+#       ages (rae_alarms.py) for every MultiRAE session in 02_Data/RAE  #
+#       + limits: each log's own alarm limits & NIOSH/OSHA limits in    #
+#           03_Info/Exposure_Limits.csv                                 #
+#       + exports are read & evaluated in parallel (workers processes;  #
+#           None = one per CPU)                                         #
+# - Saved to 05_Charts/Exposure/:                                       #
+#       + RAE_Limit_Checks.csv: peak, peak-to-limit ratio, time over    #
+#           limit & number of exceedances of each log, sensor & limit   #
+#       + RAE_Exceedances.csv: start, end, duration & peak of each      #
+#           exceedance interval                                         #
+#       + RAE_Calibration.csv: calibration time, age & warning of each  #
+#           log & sensor                                                #
+#       + RAE/<burn>/<session>_STEL_TWA.csv: rolling STEL & TWA         #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+
+from project_paths import info_dir, data_dir, chart_dir
+from exp_config import read_exposure_limits
+from summary_metrics import save_table
+from rae_alarms import evaluate_rae_logs
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+save_dir = f'{chart_dir}Exposure/'
+rae_dir = f'{data_dir}RAE/'
+
+# -------------------- #
+# Set Alarm Parameters #
+# -------------------- #
+stel_minutes = 15 # STEL window (min)
+twa_hours = 8 # TWA window (h)
+calibration_days = 30 # calibration age (days) before warning
+workers = None # processes reading & evaluating exports (None: one per CPU, 1: no worker processes)
+save_rolling = True # if true, save rolling STEL & TWA of each session
+
+# ---------------------------------- #
+# Start Code Used to Evaluate Alarms #
+# ---------------------------------- #
+if __name__ == '__main__':
+    # Read in & check exposure limits
+    limits = read_exposure_limits(info_dir)
+    options = {'stel_window': stel_minutes * 60., 'twa_window': twa_hours * 3600., 'calibration_days': calibration_days}
+
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+
+    print('Evaluating MultiRAE logs...')
+    rolling, checks, intervals, calibration = evaluate_rae_logs(rae_dir, limits, options, workers)
+
+    save_table(checks, f'{save_dir}RAE_Limit_Checks.csv')
+    save_table(intervals, f'{save_dir}RAE_Exceedances.csv')
+    save_table(calibration, f'{save_dir}RAE_Calibration.csv')
+    if save_rolling:
+        for name, log_rolling in rolling.items():
+            file_loc = f'{save_dir}RAE/{name}_STEL_TWA.csv'
+            if not os.path.exists(os.path.dirname(file_loc)):
+                os.makedirs(os.path.dirname(file_loc))
+            log_rolling.to_csv(file_loc)
+
+    # Print limits exceeded & calibration warnings of each log
+    exceeded = checks[checks['Exceedances'] > 0] if len(checks) > 0 else checks
+    for (log_name, sensor, source, limit), row in exceeded.iterrows():
+        print(f'    {log_name}: {sensor} over {source} {limit} ({row["Value"]:g}) for {row["Time_Over"]:.1f} min, '
+              f'peak {row["Peak_Ratio"]:.2f}x limit')
+    warned = calibration[calibration['Warning'] != ''] if len(calibration) > 0 else calibration
+    for (log_name, sensor), row in warned.iterrows():
+        print(f'    {log_name}: {sensor} {row["Warning"]}')
+    print(f'Evaluated {len(rolling)} MultiRAE logs: {len(exceeded)} limits exceeded, '
+          f'{len(warned)} calibration warnings; tables saved to {save_dir}')
@@ -0,0 +1,111 @@
+# event_index.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Sorted index of events for a test (times & labels held in numpy     #
+#       arrays); built once per test & queried with searchsorted        #
+#       + events in a time range (chart event lines & labels)           #
+#       + time of an event by label (e.g. 'Ignition', 'Suppression')    #
+#       + intervals between two labeled events or event k & k+1         #
+# - Window statistics for every channel at once: peak, time to peak     #
+#       (from window start), mean & integral (trapezoidal, units*s)     #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+class EventIndex:
+    def __init__(self, times, labels):
+        # Sort events by time; stable sort keeps order of simultaneous events
+        times = np.asarray(times, dtype=np.float64)
+        order = np.argsort(times, kind='stable')
+        self.times = times[order]
+        self.labels = np.asarray(labels, dtype=object)[order]
+
+    @classmethod
+    def from_data(cls, exp_data, event_column='Event'):
+        # Build index from event column of data indexed by time
+        has_event = pd.notna(exp_data[event_column]).values
+        return(cls(exp_data.index.values[has_event], exp_data[event_column].values[has_event].astype(str)))
+
+    def shift(self, offset):
+        # New index with all event times shifted by offset
+        return(EventIndex(self.times + offset, self.labels))
+
+    def __len__(self):
+        return(len(self.times))
+
+    def in_range(self, start, end):
+        # Times & labels of events with start <= time <= end
+        i0 = np.searchsorted(self.times, start, side='left')
+        i1 = np.searchsorted(self.times, end, side='right')
+        return(self.times[i0:i1], self.labels[i0:i1])
+
+    def find(self, label, occurrence=0):
+        # Time of nth occurrence of event label; nan if not found
+        matches = np.flatnonzero(self.labels == label)
+        if len(matches) <= occurrence:
+            return(np.nan)
+        return(self.times[matches[occurrence]])
+
+    def interval(self, start_label, end_label):
+        # [start, end] between first start_label event & first end_label event after it
+        start = self.find(start_label)
+        if np.isnan(start):
+            return([np.nan, np.nan])
+        i0 = np.searchsorted(self.times, start, side='left')
+        matches = np.flatnonzero(self.labels[i0:] == end_label)
+        end = self.times[i0 + matches[0]] if len(matches) > 0 else np.nan
+        return([start, end])
+
+    def phase(self, k):
+        # [start, end] from event k to event k + 1
+        return([self.times[k], self.times[k + 1]])
+
+    def phases(self):
+        # Dict of intervals between consecutive events, named 'k: label k to label k+1'
+        return({f'{k}: {self.labels[k]} to {self.labels[k + 1]}': self.phase(k) for k in range(len(self.times) - 1)})
+
+def window_stats(data, windows):
+    # Statistics for every column of data (df indexed by time) in each window;
+    #   windows is a dict of name: [start, end]; returns long format df
+    time = data.index.values.astype(np.float64)
+    values = data.to_numpy(dtype=np.float64)
+
+    window_tables = []
+    for name, (start, end) in windows.items():
+        if np.isnan(start) or np.isnan(end):
+            continue
+        i0 = np.searchsorted(time, start, side='left')
+        i1 = np.searchsorted(time, end, side='right')
+        if i1 - i0 == 0:
+            continue
+        t = time[i0:i1]
+        y = values[i0:i1]
+        valid = ~np.isnan(y)
+        count = valid.sum(axis=0)
+
+        # Peak & time of peak relative to window start
+        peak_row = np.argmax(np.where(valid, y, -np.inf), axis=0)
+        peak = np.where(count > 0, y[peak_row, np.arange(y.shape[1])], np.nan)
+        time_to_peak = np.where(count > 0, t[peak_row] - start, np.nan)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(y, axis=0) / count
+            # Trapezoidal integral; intervals with a nan end point are skipped
+            segments = 0.5 * (y[1:] + y[:-1]) * np.diff(t)[:, np.newaxis]
+            integral = np.where(count > 0, np.nansum(segments, axis=0), np.nan)
+
+        window_tables.append(pd.DataFrame({'Window': name, 'Channel': data.columns,
+                                           'Start': start, 'End': end,
+                                           'Peak': peak, 'Time_to_Peak': time_to_peak,
+                                           'Mean': mean, 'Integral': integral}))
+
+    if not window_tables:
+        return(pd.DataFrame(columns=['Window', 'Channel', 'Start', 'End', 'Peak', 'Time_to_Peak', 'Mean', 'Integral']))
+    return(pd.concat(window_tables, ignore_index=True))
@@ -0,0 +1,341 @@
+# exp_config.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Compiles info files in 03_Info once into read-only config objects;  #
+#       every file is checked before any test data is loaded            #
+#       + exp_info.csv: ExpInfo with a TestConfig for each test         #
+#       + channel_list_*.csv: ChannelConfig (one per file, shared by    #
+#           all tests that use it)                                      #
+#       + Particulate_Info.csv: rows to skip in each particulate test   #
+#       + Exposure_Limits.csv: NIOSH/OSHA TWA, STEL & ceiling limits of #
+#           each gas sensor (empty cell = no limit)                     #
+# - TestConfig: excluded groups & channels (sets), active channels,     #
+#       chart groups to plot, gas analyzer transport delays             #
+#       ({Description: Transport Time}), ignition event, end time &     #
+#       baseline window                                                 #
+#       + 'Baseline_Window' (optional) is start|end (s, relative to     #
+#           ignition); 'None' = all data before ignition                #
+# - ChannelConfig: position of each channel in channel list, scale &    #
+#       offset arrays, positions of channels of each chart group & of   #
+#       each type; table is the channel list df used by processing      #
+#       functions (indexed by Channel_Name, do not modify)              #
+# - Cells are read as text, so 'None' stays 'None' (pandas reads it as  #
+#       nan); 'None' or empty lists (e.g. Excluded_Groups) are empty    #
+# - All errors in a file are raised together; each names the file &     #
+#       row (line in file) with the test or channel                     #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+
+from daq_loader import get_active_channels
+
+# Columns each info file must have
+channel_list_columns = ['Channel_Name', 'Scale', 'Offset', 'Label', 'Type', 'Chart']
+exp_info_columns = ['Test_Name', 'Channel List', 'Transport Time', 'Description', 'End_Time',
+                    'Excluded_Groups', 'Excluded_Channels', 'Ignition_Event']
+particulate_info_columns = ['Test_Name', 'Skip_Lines']
+exposure_limit_columns = ['Sensor', 'Agency', 'TWA', 'STEL', 'Ceiling', 'Units']
+
+# Channel types corrected for gas analyzer transport time
+gas_types = ['Percent']
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def read_info_table(file_loc, columns):
+    # Read info file with every cell as stripped text; check required columns
+    if not os.path.exists(file_loc):
+        raise FileNotFoundError(f'Info file not found: {file_loc}')
+    table = pd.read_csv(file_loc, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    table.columns = [c.strip() for c in table.columns]
+    missing = [c for c in columns if c not in table.columns]
+    if missing:
+        raise ValueError(f"{file_loc}: missing column(s) {', '.join(missing)}")
+    return(table.apply(lambda column: column.str.strip()))
+
+def split_cell(value, sep='|'):
+    # List of values in delimited cell; 'None' or empty cell is an empty list
+    if value in ['', 'None']:
+        return([])
+    return([v.strip() for v in value.split(sep)])
+
+def read_only(array):
+    array = np.array(array)
+    array.flags.writeable = False
+    return(array)
+
+def raise_errors(file_loc, errors):
+    if errors:
+        raise ValueError(f'Errors in {os.path.basename(file_loc)}:\n    ' + '\n    '.join(errors))
+
+def check_channel_list(table, file_loc):
+    # Errors in channel list table (one message per problem, naming row)
+    errors = []
+    for i in np.flatnonzero(table['Channel_Name'].duplicated(keep='first')):
+        errors.append(f"{file_loc}: row {i + 2}: channel {table.at[i, 'Channel_Name']} is listed more than once")
+
+    channel_names = set(table['Channel_Name'])
+    for i, row in table.iterrows():
+        channel = row['Channel_Name']
+        where = f'{file_loc}: row {i + 2} ({channel})'
+        if channel == '':
+            errors.append(f'{file_loc}: row {i + 2}: no Channel_Name')
+        for column in ['Scale', 'Offset']:
+            try:
+                float(row[column])
+            except ValueError:
+                errors.append(f"{where}: {column} '{row[column]}' is not a number")
+        for column in ['Type', 'Chart']:
+            if row[column] == '':
+                errors.append(f'{where}: no {column}')
+        # Bidirectional probes need paired thermocouple to compute velocity
+        if 'BDPV' in channel and channel.replace('BDPV', 'BDPT', 1) not in channel_names:
+            errors.append(f"{where}: no thermocouple {channel.replace('BDPV', 'BDPT', 1)} for bidirectional probe")
+    return(errors)
+
+def read_channel_list(file_loc):
+    # Compiled channel list (ChannelConfig); raises all errors in file together
+    table = read_info_table(file_loc, channel_list_columns)
+    raise_errors(file_loc, check_channel_list(table, file_loc))
+    return(ChannelConfig(table, file_loc))
+
+class ChannelConfig:
+    def __init__(self, table, file_loc):
+        # Compile checked channel list table (see check_channel_list)
+        table = table.copy()
+        table[['Scale', 'Offset']] = table[['Scale', 'Offset']].astype(np.float64)
+        self.file_loc = file_loc
+        self.table = table.set_index('Channel_Name')
+        self.names = tuple(table['Channel_Name'])
+        self.index = MappingProxyType({channel: i for i, channel in enumerate(self.names)})
+        self.scale = read_only(table['Scale'].to_numpy(dtype=np.float64))
+        self.offset = read_only(table['Offset'].to_numpy(dtype=np.float64))
+        self.labels = tuple(table['Label'])
+        self.types = tuple(table['Type'])
+        self.charts = tuple(table['Chart'])
+
+        # Positions of channels of each chart group (sorted by group name) & of each type
+        charts = np.array(self.charts, dtype=object)
+        types = np.array(self.types, dtype=object)
+        self.group_index = MappingProxyType({g: read_only(np.flatnonzero(charts == g)) for g in sorted(set(self.charts))})
+        self.type_index = MappingProxyType({t: read_only(np.flatnonzero(types == t)) for t in sorted(set(self.types))})
+
+    def positions(self, channels):
+        # Positions of channels in channel list (e.g. for scale & offset arrays)
+        return(np.array([self.index[c] for c in channels], dtype=np.intp))
+
+    def channel_type(self, channel):
+        return(self.types[self.index[channel]])
+
+    def label(self, channel):
+        return(self.labels[self.index[channel]])
+
+    def chart(self, channel):
+        return(self.charts[self.index[channel]])
+
+    def channels_of_type(self, data_type):
+        return([self.names[i] for i in self.type_index.get(data_type, [])])
+
+class TestConfig:
+    def __init__(self, test_name, channels, excluded_groups, excluded_channels, analyzer_delays,
+                 ignition_event, end_time, baseline_window):
+        # Config of one test (row of exp_info.csv) with its compiled channel list
+        self.test_name = test_name
+        self.channels = channels
+        self.excluded_groups = frozenset(excluded_groups)
+        self.excluded_channels = frozenset(excluded_channels)
+        self.analyzer_delays = MappingProxyType(dict(analyzer_delays))
+        self.ignition_event = ignition_event
+        self.end_time = end_time
+        self.baseline_window = tuple(baseline_window)
+
+        # Channels read from data file & channels of each chart group to plot
+        self.active_channels = tuple(get_active_channels(channels.table, self.excluded_groups, self.excluded_channels))
+        self.groups = tuple(g for g in channels.group_index if g not in self.excluded_groups)
+        self.group_channels = MappingProxyType({g: tuple(channels.names[i] for i in channels.group_index[g]
+                                                         if channels.names[i] not in self.excluded_channels)
+                                                for g in self.groups})
+
+    @property
+    def channel_list(self):
+        # Channel list df (indexed by Channel_Name) for processing functions
+        return(self.channels.table)
+
+    def missing_delays(self, channels):
+        # Gas channels in channels without a transport time for their analyzer (chart)
+        return([c for c in channels if self.channels.channel_type(c) in gas_types
+                and self.channels.chart(c) not in self.analyzer_delays])
+
+    def gas_delays(self, channels):
+        # Series of transport delay (s) for each gas channel in channels
+        gas_channels = [c for c in channels if self.channels.channel_type(c) in gas_types]
+        missing = self.missing_delays(gas_channels)
+        if missing:
+            raise ValueError(f"{self.test_name}: no transport time in exp_info.csv for gas channels {', '.join(missing)}")
+        return(pd.Series([self.analyzer_delays[self.channels.chart(c)] for c in gas_channels],
+                         index=gas_channels, dtype=np.float64))
+
+class ExpInfo:
+    def __init__(self, tests, file_loc):
+        # Compiled exp_info.csv: TestConfig of each test (in file order)
+        self.file_loc = file_loc
+        self.tests = MappingProxyType(dict(tests))
+        self.test_names = tuple(self.tests)
+
+    def __getitem__(self, test_name):
+        return(self.tests[test_name])
+
+    def __contains__(self, test_name):
+        return(test_name in self.tests)
+
+    def __iter__(self):
+        return(iter(self.test_names))
+
+    def __len__(self):
+        return(len(self.test_names))
+
+def parse_number(value, column, where, errors, integer=False):
+    # Number in cell (nan & error added if not a number)
+    try:
+        return(int(value) if integer else float(value))
+    except ValueError:
+        errors.append(f"{where}: {column} '{value}' is not {'an integer' if integer else 'a number'}")
+        return(np.nan)
+
+def parse_baseline_window(value, where, errors):
+    # [start, end] of baseline window; all data before ignition if 'None'
+    if value in ['', 'None']:
+        return([-np.inf, 0.])
+    bounds = split_cell(value)
+    if len(bounds) != 2:
+        errors.append(f"{where}: Baseline_Window '{value}' is not start|end")
+        return([-np.inf, 0.])
+    start = parse_number(bounds[0], 'Baseline_Window start', where, errors)
+    end = parse_number(bounds[1], 'Baseline_Window end', where, errors)
+    if start >= end:
+        errors.append(f"{where}: Baseline_Window start {start} is not before end {end}")
+    return([start, end])
+
+def read_exp_info(info_dir, file_name='exp_info.csv'):
+    # Compile exp_info.csv & channel list of every test (ExpInfo); all errors
+    #   in exp_info & its channel lists are raised together
+    file_loc = f'{info_dir}{file_name}'
+    table = read_info_table(file_loc, exp_info_columns)
+    has_baseline = 'Baseline_Window' in table.columns
+
+    errors = []
+    channel_lists = {}
+    tests = {}
+    for i in np.flatnonzero(table['Test_Name'].duplicated(keep='first')):
+        errors.append(f"{file_loc}: row {i + 2}: test {table.at[i, 'Test_Name']} is listed more than once")
+
+    for i, row in table.iterrows():
+        test_name = row['Test_Name']
+        where = f'{file_loc}: row {i + 2} ({test_name})'
+        if test_name == '':
+            errors.append(f'{file_loc}: row {i + 2}: no Test_Name')
+            continue
+
+        # Channel list (compiled once for all tests using it)
+        list_file = row['Channel List']
+        if list_file not in channel_lists:
+            list_loc = f'{info_dir}{list_file}'
+            if list_file == '' or not os.path.exists(list_loc):
+                errors.append(f"{where}: channel list '{list_file}' not found in {info_dir}")
+                channel_lists[list_file] = None
+            else:
+                list_table = read_info_table(list_loc, channel_list_columns)
+                list_errors = check_channel_list(list_table, list_loc)
+                errors.extend(list_errors)
+                channel_lists[list_file] = None if list_errors else ChannelConfig(list_table, list_loc)
+        channels = channel_lists[list_file]
+
+        # Transport time of each gas analyzer
+        delays = [parse_number(d, 'Transport Time', where, errors) for d in split_cell(row['Transport Time'])]
+        analyzers = split_cell(row['Description'])
+        if len(delays) != len(analyzers):
+            errors.append(f"{where}: 'Transport Time' has {len(delays)} values but 'Description' has {len(analyzers)} analyzers")
+
+        ignition_event = parse_number(row['Ignition_Event'], 'Ignition_Event', where, errors, integer=True)
+        if isinstance(ignition_event, int) and ignition_event < 0:
+            errors.append(f'{where}: Ignition_Event {ignition_event} is negative')
+        end_time = parse_number(row['End_Time'], 'End_Time', where, errors)
+        baseline_window = parse_baseline_window(row['Baseline_Window'] if has_baseline else '', where, errors)
+        excluded_groups = split_cell(row['Excluded_Groups'])
+        excluded_channels = split_cell(row['Excluded_Channels'])
+        if channels is None:
+            continue
+
+        # Exclusions must name groups & channels in channel list
+        unknown_groups = [g for g in excluded_groups if g not in channels.group_index]
+        if unknown_groups:
+            errors.append(f"{where}: excluded group(s) {', '.join(unknown_groups)} not in {list_file}")
+        unknown_channels = [c for c in excluded_channels if c not in channels.index]
+        if unknown_channels:
+            errors.append(f"{where}: excluded channel(s) {', '.join(unknown_channels)} not in {list_file}")
+
+        test = TestConfig(test_name, channels, excluded_groups, excluded_channels, zip(analyzers, delays),
+                          ignition_event, end_time, baseline_window)
+        missing = test.missing_delays(test.active_channels)
+        if missing:
+            errors.append(f"{where}: no transport time for gas channels {', '.join(missing)} (analyzer 'Description' must match 'Chart')")
+        tests[test_name] = test
+
+    raise_errors(file_loc, errors)
+    return(ExpInfo(tests, file_loc))
+
+def read_particulate_info(info_dir, file_name='Particulate_Info.csv'):
+    # Rows to skip in data of each particulate test: {test: tuple of rows};
+    #   Skip_Lines is comma separated rows or first:last ranges
+    file_loc = f'{info_dir}{file_name}'
+    table = read_info_table(file_loc, particulate_info_columns)
+
+    errors = []
+    skip_lines = {}
+    for i in np.flatnonzero(table['Test_Name'].duplicated(keep='first')):
+        errors.append(f"{file_loc}: row {i + 2}: test {table.at[i, 'Test_Name']} is listed more than once")
+    for i, row in table.iterrows():
+        where = f"{file_loc}: row {i + 2} ({row['Test_Name']})"
+        rows = []
+        for part in split_cell(row['Skip_Lines'], ','):
+            try:
+                if ':' in part:
+                    first, last = part.split(':')
+                    rows.extend(range(int(first), int(last) + 1))
+                else:
+                    rows.append(int(part))
+            except ValueError:
+                errors.append(f"{where}: Skip_Lines '{part}' is not a row or first:last range")
+        skip_lines[row['Test_Name']] = tuple(rows)
+
+    raise_errors(file_loc, errors)
+    return(MappingProxyType(skip_lines))
+
+def read_exposure_limits(info_dir, file_name='Exposure_Limits.csv'):
+    # Df of TWA, STEL & Ceiling limits (nan = no limit) & Units indexed by
+    #   (Sensor, Agency)
+    file_loc = f'{info_dir}{file_name}'
+    table = read_info_table(file_loc, exposure_limit_columns)
+
+    errors = []
+    for i in np.flatnonzero(table.duplicated(subset=['Sensor', 'Agency'], keep='first')):
+        errors.append(f"{file_loc}: row {i + 2}: {table.at[i, 'Sensor']} ({table.at[i, 'Agency']}) is listed more than once")
+    limit_names = ['TWA', 'STEL', 'Ceiling']
+    limits = table[limit_names].apply(lambda column: pd.to_numeric(column.replace('None', ''), errors='coerce'))
+    for i, row in table.iterrows():
+        where = f"{file_loc}: row {i + 2} ({row['Sensor']}, {row['Agency']})"
+        for name in limit_names:
+            if row[name] not in ['', 'None'] and (np.isnan(limits.at[i, name]) or limits.at[i, name] <= 0):
+                errors.append(f"{where}: {name} '{row[name]}' is not a positive number")
+        if row['Units'] not in ['ppm', 'ppb', '%']:
+            errors.append(f"{where}: Units '{row['Units']}' is not ppm, ppb or %")
+
+    raise_errors(file_loc, errors)
+    table[limit_names] = limits
+    return(table.set_index(['Sensor', 'Agency']))
@@ -0,0 +1,302 @@
+# exp_processing.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Loads & processes data for a test once; used by plot.py (pdf),      #
+#       plot_html.py (html) & plot_both.py (both from one load)         #
+#       + test config (exclusions, channel list, delays) is compiled    #
+#           once from 03_Info by exp_config.py                          #
+#       + time index relative to ignition & sorted event index          #
+#       + sensor health screening (sensor_health.py): out-of-range      #
+#           samples are masked & failed sensors are not plotted         #
+#       + baseline statistics, delay-corrected gas & probe velocities   #
+#       + converted data for every plotted channel (SI units, same      #
+#           transforms for every chart backend)                         #
+#       + derived channels with their own chart groups: hot layer       #
+#           height & layer temperatures of TC trees (stratification.py) #
+#           & FED of asphyxiant gases at gas locations (fed_dose.py)    #
+#       + tables: Baselines.csv, Event_Windows.csv, summary.csv         #
+#           (summary_metrics.py), Vent_Flows.csv, Sensor_Health.csv,    #
+#           Derived_Channels.csv & FED_Summary.csv                      #
+# - Converted channel data is computed once & shared; backends only     #
+#       change display units (e.g. deg F in html charts)                #
+# - New .tdms files are converted to .csv before data is loaded         #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import pandas as pd
+
+from daq_loader import load_daq_data
+from event_index import EventIndex, window_stats
+from baseline_stats import compute_test_baselines
+from gas_alignment import align_gas_offset_views
+from bdp_flow import get_probe_pairs, compute_probe_velocities, compute_vent_flows
+from chunked_processing import convert_block
+from summary_metrics import compute_summary, save_table, default_thresholds
+from sensor_health import screen_channels, print_health_summary
+from stratification import get_tc_trees, compute_layers
+from fed_dose import compute_location_fed, default_fed_thresholds
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def timestamp_to_seconds(timestamp):
+    timestamp = timestamp.split(' ')[-1]
+    hh, mm, ss = timestamp.split(':')
+    return(3600 * int(hh) + 60 * int(mm) + int(ss))
+
+def convert_timestamps(timestamps, start_time):
+    raw_seconds = map(timestamp_to_seconds, timestamps)
+    return([s - start_time for s in list(raw_seconds)])
+
+def convert_new_tdms_files(tdms_dir, data_dir):
+    # Convert new .tdms Files to .csv Files (if on data computer)
+    if not os.path.exists(tdms_dir):
+        return
+    from nptdms import TdmsFile
+    print('Checking for new tdms files...')
+    for f in os.listdir(tdms_dir):
+        if f.endswith('.tdms'):
+            csv_name = f[:-21]
+
+            # Create new csv files if they don't exist in data dir
+            if not os.path.isfile(f'{data_dir}{csv_name}.csv'):
+                print(f'    Creating csv file for {csv_name}')
+
+                # Create dirs if necessary
+                if not os.path.exists(data_dir):
+                    os.makedirs(data_dir)
+
+                # Read tdms file & convert to dataframe
+                tdms_file = TdmsFile(f'{tdms_dir}{f}')
+                tdms_df = tdms_file.as_dataframe()
+
+                # Create empty dataframes for data & event info
+                data_df = pd.DataFrame()
+                # Loop through tdms file columns & populate dataframes
+                for column in tdms_df.columns:
+                    if column.split('/')[1] == "'Channels'":
+                        data_df[column.split('/')[-1][1:-1]] = tdms_df[column]
+
+                # Save data & event dataframes as csv files
+                data_df.to_csv(f'{data_dir}{csv_name}.csv', index=False)
+                print(f'    Saved {csv_name}.csv')
+                print()
+
+class ProcessedExp:
+    def __init__(self, config, data_dir, compact_dtypes=True, filter_data=False, screen_sensors=False):
+        # config: TestConfig of test (exp_config.read_exp_info(info_dir)[test_name]);
+        #   screen_sensors: mask out-of-range samples & skip failed sensors
+        test_name = config.test_name
+        self.test_name = test_name
+        self.config = config
+        self.filter_data = filter_data
+        self.excluded_groups = config.excluded_groups
+        self.excluded_channels = config.excluded_channels
+        self.channel_list = config.channel_list
+
+        # Read in data for active channels only (excluded groups/channels are not loaded)
+        self.active_channels = list(config.active_channels)
+        exp_data = load_daq_data(f'{data_dir}{test_name}.csv', self.active_channels, use_float32=compact_dtypes)
+        print (f'--- Loaded data file for {test_name} ---')
+
+        # Create index column of time relative to ignition in exp_data; events are
+        #   indexed once & ignition is located by its position in event list
+        exp_data.rename(columns={'Time':'Timestamp'}, inplace=True)
+        exp_data['Time'] = convert_timestamps(exp_data['Timestamp'], 0)
+        exp_data = exp_data.set_index('Time')
+        events = EventIndex.from_data(exp_data)
+        ignition_time = events.times[config.ignition_event]
+        exp_data.index = exp_data.index - ignition_time
+        self.exp_data = exp_data
+        self.events = events.shift(-ignition_time)
+
+        # Screen raw data of all channels against DAQ ranges & alarm limits;
+        #   out-of-range samples are set to nan before anything is computed
+        self.health = None
+        self.failed_channels = frozenset()
+        if screen_sensors:
+            data_channels = [c for c in self.active_channels if c in exp_data.columns]
+            self.health, out_of_range = screen_channels(exp_data, config.channels, data_channels, config.baseline_window)
+            exp_data[data_channels] = exp_data[data_channels].mask(out_of_range)
+            self.failed_channels = frozenset(self.health.index[~self.health['Plotted']])
+            print_health_summary(self.health)
+
+        # Compute baseline statistics for all channels in one pass
+        self.baseline_window = list(config.baseline_window)
+        self.baselines = compute_test_baselines(exp_data, self.channel_list, self.active_channels, self.baseline_window)
+
+        # Shift all gas analyzer channels by transport time of analyzer
+        self.gas_delays = config.gas_delays(self.active_channels)
+        self.aligned_gas = align_gas_offset_views(exp_data, self.channel_list, self.gas_delays)
+
+        # Compute velocities for all bidirectional probes at once
+        self.probe_pairs = get_probe_pairs(self.channel_list, self.active_channels)
+        if len(self.probe_pairs) > 0:
+            self.probe_velocities, self.probe_temperatures = compute_probe_velocities(exp_data, self.channel_list, self.probe_pairs, self.baselines)
+
+        # Converted data of each channel (filled by process_channels) & Label,
+        #   Type & Chart of derived channels (filled by add_* methods)
+        self.processed_data = {}
+        self.derived_channels = pd.DataFrame(columns=['Label', 'Type', 'Chart'])
+        self.fed_summary = None
+
+    def groups(self):
+        # Chart groups to plot (excluded groups & groups of only failed sensors
+        #   are skipped), then chart groups of derived channels
+        groups = [g for g in self.config.groups
+                  if any([c not in self.failed_channels for c in self.config.group_channels[g]])]
+        return(groups + list(dict.fromkeys(self.derived_channels['Chart'])))
+
+    def group_channels(self, group):
+        # Channels of group to plot (excluded channels, channels missing from
+        #   data file & failed sensors are skipped)
+        if group not in self.config.group_channels:
+            return(self.derived_channels.index[self.derived_channels['Chart'] == group].tolist())
+        return([c for c in self.config.group_channels[group]
+                if c in self.exp_data.columns and c not in self.failed_channels])
+
+    def channel_type(self, channel):
+        if channel in self.derived_channels.index:
+            return(self.derived_channels.at[channel, 'Type'])
+        return(self.config.channels.channel_type(channel))
+
+    def channel_label(self, channel):
+        if channel in self.derived_channels.index:
+            return(self.derived_channels.at[channel, 'Label'])
+        return(self.config.channels.label(channel))
+
+    def plot_channel_list(self):
+        # Channel list with rows for derived channels (e.g. for channel store)
+        if len(self.derived_channels) == 0:
+            return(self.channel_list)
+        return(pd.concat([self.channel_list, self.derived_channels]))
+
+    def add_layer_channels(self, method='integral', n_percent=20., ceiling_heights={}):
+        # Add hot layer height & upper/lower layer temperature of every TC tree
+        #   as derived channels (see stratification.py); ceiling_heights maps
+        #   tree's chart group to ceiling height (m)
+        tcs = [c for c in self.active_channels if c in self.exp_data.columns and c not in self.failed_channels]
+        trees = get_tc_trees(self.channel_list, tcs)
+        if len(trees) == 0:
+            return
+        layers, layer_info = compute_layers(self.exp_data, self.channel_list, trees, self.baselines,
+                                            method, n_percent, ceiling_heights)
+        for channel in layers.columns:
+            self.processed_data[channel] = layers[channel].dropna()
+        self.derived_channels = pd.concat([self.derived_channels[~self.derived_channels.index.isin(layer_info.index)], layer_info])
+
+    def add_fed_channels(self, fed_start=0., thresholds=default_fed_thresholds):
+        # Add FED of asphyxiant gases (from fed_start, s relative to ignition)
+        #   at every gas location as derived channels (see fed_dose.py);
+        #   summary of doses & times to FED thresholds is kept in fed_summary
+        data = self.converted_data()
+        gas_channels = [c for c in data.columns if c not in self.failed_channels]
+        fed, fed_info, self.fed_summary = compute_location_fed(data, self.channel_list, gas_channels,
+                                                               fed_start, thresholds)
+        if len(fed_info) == 0:
+            return
+        for channel in fed.columns:
+            self.processed_data[channel] = fed[channel]
+        self.derived_channels = pd.concat([self.derived_channels[~self.derived_channels.index.isin(fed_info.index)], fed_info])
+
+    def x_max(self):
+        # End of chart time axis (end of data or End_Time in exp_info)
+        return(min(self.exp_data.index.values[-1], self.config.end_time))
+
+    def process_channels(self):
+        # Convert data of every channel to plot once; results are shared by all backends
+        if self.filter_data:
+            from statsmodels.nonparametric.smoothers_lowess import lowess
+        channels = self.config.channels
+        for group in self.groups():
+            for channel in self.group_channels(group):
+                if channel in self.processed_data:
+                    continue
+                i = channels.index[channel]
+                data_type = channels.types[i]
+                scale_factor = channels.scale[i]
+                offset = channels.offset[i]
+                scaled_data = self.exp_data[channel] * scale_factor + offset
+
+                if data_type == 'Temperature':
+                    if self.filter_data:
+                        # Apply moving average
+                        plot_data = scaled_data.rolling(window=5, center=True).mean().dropna()
+                    else:
+                        plot_data = scaled_data.dropna()
+
+                elif data_type == 'Velocity':
+                    # Velocities for all probes computed once at load
+                    plot_data = self.probe_velocities[channel]
+                    if self.filter_data:
+                        filtered_data = lowess(plot_data, self.exp_data.index, frac=0.005)
+                        plot_data = pd.Series(filtered_data[:,1], index=filtered_data[:,0])
+
+                elif data_type == 'Percent':
+                    # Gas data shifted by transport time of analyzer
+                    if 'CO' in channel:
+                        plot_data = self.aligned_gas[channel] - self.baselines.at[channel, 'Mean']
+                    else:
+                        plot_data = self.aligned_gas[channel] - (self.baselines.at[channel, 'Mean'] - 20.95)
+
+                elif data_type in ['Heat_Flux', 'Pressure']:
+                    # Zero data & filter if flag set to True
+                    plot_data = scaled_data - self.baselines.at[channel, 'Mean']
+                    if self.filter_data:
+                        frac = 0.01 if data_type == 'Heat_Flux' else 0.005
+                        filtered_data = lowess(plot_data, self.exp_data.index, frac=frac)
+                        plot_data = pd.Series(filtered_data[:,1], index=filtered_data[:,0])
+
+                else:
+                    plot_data = scaled_data
+
+                self.processed_data[channel] = plot_data
+        return(self.processed_data)
+
+    def converted_data(self):
+        # Converted data of all channels in data file on test time grid (2-D,
+        #   gas channels interpolated to delay-corrected time, unfiltered)
+        data_channels = self.baselines.index.tolist()
+        return(convert_block(self.exp_data, self.channel_list, data_channels, self.baselines, self.gas_delays, self.probe_pairs))
+
+    def windows(self, event_windows={}):
+        # Intervals between consecutive events & event windows ({name: [start event, end event]})
+        windows = self.events.phases()
+        for window_name, (start_label, end_label) in event_windows.items():
+            windows[window_name] = self.events.interval(start_label, end_label)
+        return(windows)
+
+    def summary(self, event_windows={}, thresholds=default_thresholds, summary_start=0.):
+        # Summary metrics of converted data for every channel (see summary_metrics.py)
+        return(compute_summary(self.converted_data(), self.channel_list, self.baseline_window,
+                               self.windows(event_windows), thresholds, summary_start))
+
+    def write_tables(self, save_dir, event_windows={}, vent_dims={}, thresholds=default_thresholds):
+        # Save baseline statistics, event window statistics, summary metrics &
+        #   vent flows (& sensor health report if screened, derived channel
+        #   data & FED summary if added) to save_dir
+        self.baselines.to_csv(f'{save_dir}Baselines.csv')
+        if self.health is not None:
+            self.health.to_csv(f'{save_dir}Sensor_Health.csv')
+        if len(self.derived_channels) > 0:
+            derived_data = pd.DataFrame({c: self.processed_data[c] for c in self.derived_channels.index})
+            derived_data.to_csv(f'{save_dir}Derived_Channels.csv')
+        if self.fed_summary is not None:
+            self.fed_summary.to_csv(f'{save_dir}FED_Summary.csv')
+
+        # Compute peak, time to peak, mean & integral of every channel between
+        #   consecutive events & in event windows from the converted data
+        #   summary.csv is computed from
+        windows = self.windows(event_windows)
+        converted = self.converted_data()
+        window_stats(converted, windows).to_csv(f'{save_dir}Event_Windows.csv', index=False)
+
+        save_table(compute_summary(converted, self.channel_list, self.baseline_window, windows, thresholds),
+                   f'{save_dir}summary.csv')
+
+        if len(self.probe_pairs) > 0:
+            vent_flows = compute_vent_flows(self.probe_velocities, self.probe_temperatures, self.probe_pairs, vent_dims)
+            vent_flows.to_csv(f'{save_dir}Vent_Flows.csv')
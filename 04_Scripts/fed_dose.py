@@ -0,0 +1,220 @@
+# fed_dose.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Fractional effective dose (FED) of asphyxiant gases for every gas   #
+#       location (DAQ analyzers) or instrument (MultiRAE session) at    #
+#       once, on (time x location) arrays of aligned concentrations     #
+#       + CO & HCN (ISO 13571): CO ppm / 35000 & HCN ppm^2.36 / 1.2e6   #
+#           per min, both multiplied by CO2 hyperventilation factor     #
+#           exp(CO2 % / 5)                                              #
+#       + O2 depletion (Purser): 1 / exp(8.13 - 0.54 (20.9 - O2 %))     #
+#           per min                                                     #
+#       + FED = integral of (CO + HCN) x V_CO2 + integral of O2 term    #
+#       + gases not measured at a location add nothing (V_CO2 = 1       #
+#           without CO2, no O2 term without O2)                         #
+# - Doses & FED are cumulative trapezoidal integrals (min) from start   #
+#       of dose; gaps in a gas are interpolated, rates are 0 where a    #
+#       gas has no data & negative concentrations are clipped to 0      #
+# - Time to incapacitation: first time (min from start) FED reaches     #
+#       each threshold (0.3: sensitive occupants, 1.0: median person),  #
+#       interpolated between samples                                    #
+# - Summary (one row per location): peak concentrations, doses (ppm     #
+#       min), FED of each term, final FED & times to thresholds         #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import warnings
+import numpy as np
+import pandas as pd
+
+# --------------------------- #
+# Define FED Model Parameters #
+# --------------------------- #
+# CO & HCN rates: phi_CO / co_divisor & phi_HCN^hcn_exponent / hcn_divisor (per min, ppm)
+co_divisor = 35000.
+hcn_exponent = 2.36
+hcn_divisor = 1.2e6
+
+# CO2 hyperventilation factor: exp(phi_CO2 / co2_divisor) (% vol)
+co2_divisor = 5.
+
+# O2 depletion rate: 1 / exp(o2_a - o2_b (o2_ambient - phi_O2)) (per min, % vol)
+o2_a = 8.13
+o2_b = 0.54
+o2_ambient = 20.9
+
+# FED thresholds for time to incapacitation
+default_fed_thresholds = [0.3, 1.0]
+
+# Asphyxiant gases & units of concentrations passed to compute_fed
+fed_gases = {'CO': 'ppm', 'HCN': 'ppm', 'CO2': '%', 'O2': '%'}
+
+# Gas of DAQ channel labels (Percent channels) & MultiRAE sensor names
+gas_labels = {'Carbon Monoxide': 'CO', 'Hydrogen Cyanide': 'HCN', 'Carbon Dioxide': 'CO2', 'Oxygen': 'O2'}
+rae_sensors = {'CO': 'CO', 'HCN': 'HCN', 'CO2': 'CO2', 'OXY': 'O2', 'O2': 'O2'}
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def clipped(values, shape):
+    # Concentrations clipped to 0 or more, with 0 where there is no data
+    #   (zeros if gas is not measured)
+    if values is None:
+        return(np.zeros(shape))
+    return(np.nan_to_num(np.clip(values, 0., None)))
+
+def fed_rates(gases):
+    # FED rates (per min) of CO, HCN (without CO2 factor) & O2 depletion, &
+    #   CO2 hyperventilation factor; gases: {gas: (time x location) array
+    #   or None}, units in fed_gases
+    shape = next(v.shape for v in gases.values() if v is not None)
+    rates = {'CO': clipped(gases.get('CO'), shape) / co_divisor,
+             'HCN': clipped(gases.get('HCN'), shape)**hcn_exponent / hcn_divisor,
+             'V_CO2': np.exp(clipped(gases.get('CO2'), shape) / co2_divisor)}
+
+    # No O2 term where O2 is not measured (or has no data)
+    if gases.get('O2') is None:
+        rates['O2'] = np.zeros(shape)
+    else:
+        o2 = np.clip(gases['O2'], 0., o2_ambient)
+        rates['O2'] = np.nan_to_num(1. / np.exp(o2_a - o2_b * (o2_ambient - o2)))
+    return(rates)
+
+def cumulative_dose(values, time):
+    # Trapezoidal integral of each column of (time x location) values over
+    #   time (s) in min, from first row to each row
+    dt = np.diff(time)[:, np.newaxis] / 60.
+    segments = 0.5 * (values[1:] + values[:-1]) * dt
+    return(np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(segments, axis=0)], axis=0))
+
+def threshold_times(time, fed, thresholds=default_fed_thresholds):
+    # First time (s) each column of cumulative fed reaches each threshold
+    #   ({threshold: array}); nan if never reached
+    times = {}
+    for threshold in thresholds:
+        above = fed >= threshold
+        k = np.argmax(above, axis=0)
+        k0 = np.maximum(k - 1, 0)
+        columns = np.arange(fed.shape[1])
+        f0, f1 = fed[k0, columns], fed[k, columns]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.where(k > 0, time[k0] + (threshold - f0) / (f1 - f0) * (time[k] - time[k0]), time[k])
+        times[threshold] = np.where(above.any(axis=0), t, np.nan)
+    return(times)
+
+def compute_fed(time, gases):
+    # Cumulative doses (ppm min) & FED of each term for (time x location)
+    #   gas arrays (time in s from start of dose); returns dict of arrays
+    rates = fed_rates(gases)
+    shape = rates['CO'].shape
+    results = {'Dose_CO': cumulative_dose(clipped(gases.get('CO'), shape), time),
+               'Dose_HCN': cumulative_dose(clipped(gases.get('HCN'), shape), time),
+               'FED_CO': cumulative_dose(rates['CO'] * rates['V_CO2'], time),
+               'FED_HCN': cumulative_dose(rates['HCN'] * rates['V_CO2'], time),
+               'FED_O2': cumulative_dose(rates['O2'], time)}
+    results['FED'] = results['FED_CO'] + results['FED_HCN'] + results['FED_O2']
+    results['V_CO2'] = rates['V_CO2']
+    return(results)
+
+def column_extreme(values, function, n_columns):
+    # np.nanmax/np.nanmin of each column (nan for gas not measured or column without data)
+    if values is None:
+        return(np.full(n_columns, np.nan))
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return(function(values, axis=0))
+
+def fed_summary(time, gases, results, locations, thresholds=default_fed_thresholds):
+    # Summary table (one row per location) of peak concentrations, doses,
+    #   final FED of each term & time (min) to each FED threshold
+    summary = pd.DataFrame({'Duration': np.full(len(locations), (time[-1] - time[0]) / 60.),
+                            'Peak_CO': column_extreme(gases['CO'], np.nanmax, len(locations)),
+                            'Peak_HCN': column_extreme(gases['HCN'], np.nanmax, len(locations)),
+                            'Peak_CO2': column_extreme(gases['CO2'], np.nanmax, len(locations)),
+                            'Min_O2': column_extreme(gases['O2'], np.nanmin, len(locations)),
+                            'Max_V_CO2': np.max(results['V_CO2'], axis=0)},
+                           index=pd.Index(locations, name='Location'))
+    for key in ['Dose_CO', 'Dose_HCN', 'FED_CO', 'FED_HCN', 'FED_O2', 'FED']:
+        summary[key] = results[key][-1]
+    for threshold, t in threshold_times(time, results['FED'], thresholds).items():
+        summary[f'Time_FED_{threshold:g}'] = (t - time[0]) / 60.
+    return(summary)
+
+def get_gas_locations(channel_list, channels):
+    # Df indexed by gas location (chart group) with channel of each
+    #   asphyxiant gas (None if not measured) from labels of Percent channels
+    gas_list = channel_list[(channel_list['Type'] == 'Percent') & channel_list.index.isin(channels)]
+    gas_list = gas_list[gas_list['Label'].isin(list(gas_labels))]
+    locations = pd.DataFrame(None, index=pd.Index(list(dict.fromkeys(gas_list['Chart'])), name='Location'),
+                             columns=list(fed_gases), dtype=object)
+    for channel, row in gas_list.iterrows():
+        locations.at[row['Chart'], gas_labels[row['Label']]] = channel
+    return(locations)
+
+def location_gases(data, locations):
+    # (time x location) array of each gas from converted DAQ data (% vol,
+    #   CO & HCN converted to ppm); None for gases not measured anywhere
+    gases = {}
+    for gas, units in fed_gases.items():
+        channels = locations[gas]
+        if channels.isna().all():
+            gases[gas] = None
+            continue
+        values = np.full((len(data), len(locations)), np.nan)
+        for j, channel in enumerate(channels):
+            if channel is not None and not pd.isna(channel):
+                values[:, j] = data[channel].interpolate(method='index', limit_area='inside').to_numpy(dtype=np.float64)
+        gases[gas] = values * 1e4 if units == 'ppm' else values
+    return(gases)
+
+def compute_location_fed(data, channel_list, channels, start=0., thresholds=default_fed_thresholds):
+    # FED of every gas location of a test (data: converted data indexed by
+    #   time relative to ignition); returns df of derived channels
+    #   <location>_FED, table of their Label, Type & Chart & summary table
+    locations = get_gas_locations(channel_list, channels)
+    info = pd.DataFrame(columns=['Label', 'Type', 'Chart'])
+    if len(locations) == 0:
+        return(pd.DataFrame(index=data.index), info, None)
+    data = data[data.index >= start]
+    time = data.index.values.astype(np.float64)
+    gases = location_gases(data, locations)
+    results = compute_fed(time, gases)
+
+    fed_channels = [f'{l}_FED' for l in locations.index]
+    fed = pd.DataFrame(results['FED'], index=data.index, columns=fed_channels)
+    info = pd.DataFrame({'Label': [l.replace('_', ' ') for l in locations.index], 'Type': 'FED', 'Chart': 'FED'},
+                        index=pd.Index(fed_channels, name='Channel'))
+    summary = fed_summary(time, gases, results, locations.index.tolist(), thresholds)
+    summary.insert(0, 'Gases', ['|'.join(locations.columns[locations.loc[l].notna()]) for l in locations.index])
+    return(fed, info, summary)
+
+def rae_gases(log, measure='Avg'):
+    # (time x 1) array of each gas read by a MultiRAE session (RaeLog);
+    #   CO2 in ppm is converted to % vol
+    readings = log.readings(measure)
+    gases = {gas: None for gas in fed_gases}
+    for sensor in readings.columns:
+        gas = rae_sensors.get(sensor)
+        if gas is None or gases[gas] is not None:
+            continue
+        values = readings[sensor].astype(np.float64).interpolate(limit_area='inside').to_numpy()[:, np.newaxis]
+        if gas in ['CO2', 'O2'] and log.sensors.at[sensor, 'Units'] == 'ppm':
+            values = values / 1e4
+        gases[gas] = values
+    return(gases)
+
+def compute_rae_fed(log, measure='Avg', thresholds=default_fed_thresholds):
+    # FED of a MultiRAE session from its first reading; returns df of doses
+    #   & FED indexed by Date/Time & summary row (None if no asphyxiant gas)
+    gases = rae_gases(log, measure)
+    if all([v is None for v in gases.values()]):
+        return(None, None)
+    time = log.time()
+    results = compute_fed(time, gases)
+    keys = ['Dose_CO', 'Dose_HCN', 'FED_CO', 'FED_HCN', 'FED_O2', 'FED']
+    fed = pd.DataFrame({k: results[k][:, 0] for k in keys}, index=log.data.index)
+    summary = fed_summary(time, gases, results, [log.name], thresholds)
+    summary.insert(0, 'Gases', '|'.join([g for g, v in gases.items() if v is not None]))
+    return(fed, summary)
@@ -0,0 +1,67 @@
+# gas_alignment.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Corrects gas analyzer channels for transport delay between sample   #
+#       point & analyzer                                                #
+#       + delays come from 'Transport Time' column of exp_info.csv      #
+#           (s, one per analyzer), matched to channels through          #
+#           'Description' column & 'Chart' in channel list when test    #
+#           config is compiled (exp_config.TestConfig.gas_delays)       #
+#       + a value recorded at time t was sampled at time t - delay      #
+# - Two ways to align channels, both in one pass over all gas channels: #
+#       + offset views: each channel is a series whose index is shifted #
+#           by the delay; data is not copied (used for plots)           #
+#       + common grid: channels are linearly interpolated onto the time #
+#           index of the test; supports fractional-second delays (used  #
+#           for exposure calculations that combine channels)            #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+from daq_loader import scale_channels
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def align_gas_offset_views(exp_data, channel_list, delays):
+    # Return dict of series for each gas channel with index shifted by delay;
+    #   each series is a view of one column of the scaled data array
+    channels = delays.index.tolist()
+    scaled_data = scale_channels(exp_data, channel_list, channels)
+    time = exp_data.index.values
+
+    aligned = {}
+    for i, channel in enumerate(channels):
+        aligned[channel] = pd.Series(scaled_data[:, i], index=time - delays[channel], name=channel, copy=False)
+    return(aligned)
+
+def align_gas_to_grid(exp_data, channel_list, delays):
+    # Interpolate all delay-corrected gas channels onto time index of test;
+    #   values outside recorded data are nan
+    channels = delays.index.tolist()
+    scaled_data = scale_channels(exp_data, channel_list, channels)
+    time = exp_data.index.values.astype(np.float64)
+    n_rows, n_channels = scaled_data.shape
+
+    # Time each grid point was sampled at analyzer for every channel
+    query_time = time[:, np.newaxis] + delays.to_numpy()[np.newaxis, :]
+
+    # Locate bracketing samples & interpolation weights for all points at once
+    upper = np.searchsorted(time, query_time.ravel(), side='right').reshape(query_time.shape)
+    upper = np.clip(upper, 1, n_rows - 1)
+    lower = upper - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(time[upper] > time[lower], (query_time - time[lower]) / (time[upper] - time[lower]), 0.)
+    col = np.arange(n_channels)[np.newaxis, :]
+    aligned = scaled_data[lower, col] * (1 - weight) + scaled_data[upper, col] * weight
+
+    # Exact matches (e.g. integer delays at 1 Hz) take recorded value directly
+    exact = time[lower] == query_time
+    aligned[exact] = scaled_data[lower, col][exact]
+    aligned[(query_time < time[0]) | (query_time > time[-1])] = np.nan
+
+    return(pd.DataFrame(aligned, index=exp_data.index, columns=channels))
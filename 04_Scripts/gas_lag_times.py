@@ -13,7 +13,8 @@
 # - Script will find a gas detection time for each channel of each 
 #  analyzer. Threshold is based on a change in concentration greater
 #  than the range of noise during background
-# - Background is the data recorded for 10 seconds prior to gas on
+# - Background is the data recorded for 10 seconds prior to gas on;
+#  stats for all channels of an analyzer are computed in one pass
 # - The fastest detection time (usually CO) is used as the lag time
 # - All lag times are printed 
 # ********************************************************************* #
@@ -25,10 +26,14 @@ import os
 import pandas as pd
 import numpy as np
 
+from project_paths import data_dir
+from daq_loader import load_daq_data
+from baseline_stats import compute_baseline_stats
+
 # ---------------------------------- #
 # Define Subdirectories & Info Files #
 # ---------------------------------- #
-data_dir = '../02_Data/GasLagTimes/'
+gas_lag_dir = f'{data_dir}GasLagTimes/'
 
 # ------------------- #
 # Set Plot Parameters #
@@ -54,7 +59,7 @@ def convert_timestamps(timestamps):
 # Start Code Used to Generate Data Plots #
 # -------------------------------------- #
 data_file_ls = []
-for f in os.listdir(data_dir):
+for f in os.listdir(gas_lag_dir):
     if f.endswith('.csv'):
         data_file_ls.append(f)
 
@@ -63,15 +68,8 @@ for f in os.listdir(data_dir):
 # Loop through test data files & create plots
 for f in data_file_ls:
     lag_times = ''
-    # Read in data for experiment, replace blank rows with nan values
-    try:
-        exp_data = pd.read_csv(f'{data_dir}{f}')
-        # print('try')
-    except pd.errors.ParserError:
-        exp_data = pd.read_csv(f'{data_dir}{f}', header=4)
-        # print('except')
-
-    exp_data.replace(r'^\s*$', np.nan, regex=True, inplace=True)
+    # Read in data for experiment; blank cells are read as nan values
+    exp_data = load_daq_data(f'{gas_lag_dir}{f}')
 
     # Get test name from file
     test_name = f[:-13]
@@ -107,29 +105,30 @@ for f in data_file_ls:
         lag_time = 1000.
         time_detect2 = 1000.
 
-        for channel in [x for x in gas_channels if gas_number == int(x.split('GAS')[0])]:
-            
+        # look for event time of gas on (i.e. '1' or '1 ON')
+        try:
+            time_start = event_info[event_info == str(gas_number)+' ON'].index.values[0]
+        except:
+            time_start = event_info[event_info == str(gas_number)].index.values[0]
+
+        # background stats for all channels of analyzer over 10 s prior to gas on
+        analyzer_channels = [x for x in gas_channels if gas_number == int(x.split('GAS')[0])]
+        scale_factors = [5 if 'O2' in channel else 1 for channel in analyzer_channels]
+        background = compute_baseline_stats(exp_data[analyzer_channels], time_start-10, time_start,
+            scale_factors, include_end=True)
+
+        for channel, scale_factor in zip(analyzer_channels, scale_factors):
             # scale data
-            if 'O2' in channel:
-                scale_factor = 5
-            else: scale_factor = 1
             scaled_data = exp_data[channel] * scale_factor
+            background_avg = background.at[channel, 'Mean']
 
-            # look for event time of gas on (i.e. '1' or '1 ON')
-            try:
-                time_start = event_info[event_info == str(gas_number)+' ON'].index.values[0]
-            except:
-                time_start = event_info[event_info == str(gas_number)].index.values[0]
-            
-            background_avg = scaled_data.loc[time_start-10:time_start].mean()
-            
             # shift data based on background average
             if 'CO' in channel:
                 plot_data = scaled_data.loc[time_start:] - background_avg
-                background_range = max(scaled_data.loc[time_start-10:time_start] - background_avg)
+                background_range = background.at[channel, 'Max'] - background_avg
             else:
                 plot_data = scaled_data.loc[time_start:] - (background_avg - 20.95)
-                background_range = min(scaled_data.loc[time_start-10:time_start] - (background_avg - 20.95))
+                background_range = background.at[channel, 'Min'] - (background_avg - 20.95)
 
             # find gas detect times for each channel
             gas_type = channel.split('GAS')[-1]
@@ -0,0 +1,202 @@
+# html_dashboard.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Single-page html dashboard for a test (used by plot_html.py)        #
+#       + one tab per chart group; BokehJS is loaded once for the page  #
+#       + chart data is not embedded in the page; each group's data is  #
+#           written to data/<group>/ as a min/max pyramid               #
+#           (minmax_pyramid.py) & fetched by the browser when the tab   #
+#           is opened                                                   #
+#       + when a chart is zoomed or panned, tiles of the level that     #
+#           matches the visible x-range are fetched, so zooming in      #
+#           shows full resolution data & zooming out still shows peaks  #
+#       + heatmap groups (height x time image) write their grid to      #
+#           data/<group>/image.bin & it is fetched the same way         #
+#       + first tab is fetched as soon as the page is ready             #
+#       + tile loader script is defined once in page head; tab, zoom &  #
+#           page ready callbacks only call it                           #
+#       + used by plot_particulate_data.py for single chart pages       #
+#       + page & tiles are written in background if an OutputWriter is  #
+#           given (output_writer.py)                                    #
+# - Browsers block fetch for pages opened from disk (file://); serve    #
+#       chart dir locally, e.g. python -m http.server from 05_Charts    #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import gzip
+import numpy as np
+from bokeh.document import Document
+from bokeh.embed import file_html
+from bokeh.events import DocumentReady
+from bokeh.models import CustomJS
+from bokeh.resources import CDN
+try:
+    from bokeh.models import Tabs, TabPanel
+except ImportError:
+    from bokeh.models import Tabs, Panel as TabPanel
+
+from minmax_pyramid import write_pyramid
+
+# JavaScript loader, defined once in page head (dashboard_template);
+#   window.pyramid_loader fetches tiles of the pyramid level matching
+#   x-range of group k & fills sources of its channels (or image of a
+#   heatmap group, fetched once); tiles are cached & only the latest
+#   request for a group is drawn
+pyramid_js = """
+(function() {
+    const tile_cache = new Map();
+    const requests = {};
+    function fetch_tile(url) {
+        if (!tile_cache.has(url)) {
+            const tile = fetch(url)
+                .then(response => {
+                    if (!response.ok) { throw new Error(`HTTP ${response.status}`); }
+                    return new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).arrayBuffer();
+                })
+                .then(buffer => new Float32Array(buffer));
+            tile.catch(() => tile_cache.delete(url));
+            tile_cache.set(url, tile);
+        }
+        return tile_cache.get(url);
+    }
+    function choose_level(layout, start, end) {
+        for (let i = 0; i < layout.levels.length; i++) {
+            const level = layout.levels[i];
+            if ((end - start) / level.width * level.points_per_bin <= layout.target_points) { return i; }
+        }
+        return layout.levels.length - 1;
+    }
+    function image_array(values, shape, template) {
+        // BokehJS 3 images are ndarrays (same class as placeholder); older
+        //   versions take an array of rows
+        if (template != null && template.shape != null) { return new template.constructor(values, shape); }
+        return Array.from({length: shape[0]}, (_, i) => Array.from(values.subarray(i * shape[1], (i + 1) * shape[1])));
+    }
+    function load_image(k, sources, dirs, layout) {
+        if (requests[k] === 'image') { return; }
+        requests[k] = 'image';
+        const source = sources[k][0];
+        fetch_tile(`${dirs[k]}/image.bin`)
+            .then(values => {
+                const image = image_array(values, layout.image.shape, source.data.image[0]);
+                source.data = Object.assign({}, source.data, {image: [image]});
+            })
+            .catch(error => { delete requests[k]; console.error(`Unable to load data for ${dirs[k]}: ${error}`); });
+    }
+    window.pyramid_loader = function(k, start, end, sources, dirs, layouts) {
+        const layout = layouts[k];
+        if (layout.image) { load_image(k, sources, dirs, layout); return; }
+        if (layout.levels.length === 0) { return; }
+        const level_id = choose_level(layout, start, end);
+        const level = layout.levels[level_id];
+        // Visible tiles plus one on each side so short pans are already loaded
+        const first = Math.floor((start - layout.t0) / level.tile_width) - 1;
+        const last = Math.floor((end - layout.t0) / level.tile_width) + 1;
+        const tile_ids = level.tiles.filter(t => t >= first && t <= last);
+        const request = `${level_id}:${first}:${last}`;
+        if (requests[k] === request) { return; }
+        requests[k] = request;
+        Promise.all(tile_ids.map(t => fetch_tile(`${dirs[k]}/L${level_id}_${t}.bin`)))
+            .then(tiles => {
+                if (requests[k] !== request) { return; }
+                const n_channels = sources[k].length;
+                for (let i = 0; i < n_channels; i++) {
+                    const xs = [], ys = [];
+                    for (const values of tiles) {
+                        let position = n_channels;
+                        for (let j = 0; j < i; j++) { position += 2 * values[j]; }
+                        const n = values[i];
+                        xs.push(values.subarray(position, position + n));
+                        ys.push(values.subarray(position + n, position + 2 * n));
+                    }
+                    const x = new Float32Array(xs.reduce((a, b) => a + b.length, 0));
+                    const y = new Float32Array(x.length);
+                    let offset = 0;
+                    for (let j = 0; j < xs.length; j++) {
+                        x.set(xs[j], offset);
+                        y.set(ys[j], offset);
+                        offset += xs[j].length;
+                    }
+                    sources[k][i].data = {x: x, y: y};
+                }
+            })
+            .catch(error => { delete requests[k]; console.error(`Unable to load data for ${dirs[k]}: ${error}`); });
+    };
+})();
+"""
+
+# Page template (extends bokeh's file template) with loader in head;
+#   callbacks only call window.pyramid_loader
+dashboard_template = """
+{% block postamble %}
+<script type="text/javascript">
+{% raw %}""" + pyramid_js + """{% endraw %}
+</script>
+{% endblock %}
+"""
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def write_group_data(group_dir, channel_data, writer=None):
+    # Write min/max pyramid tiles of one chart group (list of (x, y) arrays
+    #   of each channel) to group_dir; returns layout for loader
+    return(write_pyramid(group_dir, channel_data, writer=writer))
+
+def write_image_data(group_dir, grid, writer=None):
+    # Write (height x time) grid of a heatmap group to group_dir as
+    #   image.bin (gzip compressed float32, rows from lowest height);
+    #   returns layout for loader
+    file_loc = os.path.join(group_dir, 'image.bin')
+    values = np.asarray(grid, dtype='<f4')
+    if writer is not None:
+        writer.save_bytes(file_loc, lambda: gzip.compress(values.tobytes()))
+    else:
+        if not os.path.exists(group_dir):
+            os.makedirs(group_dir)
+        with open(file_loc, 'wb') as f:
+            f.write(gzip.compress(values.tobytes()))
+    return({'t0': 0., 'target_points': 0, 'levels': [], 'image': {'shape': list(values.shape)}})
+
+def save_dashboard(file_loc, title, figures, group_names, sources, dirs, layouts, writer=None):
+    # Save single page with one tab per group (or just the chart if there is
+    #   one group); sources are empty ColumnDataSources (one per channel, in
+    #   channel data order) of each group; dirs are group data dirs relative
+    #   to page
+    args = dict(sources=sources, dirs=dirs, layouts=layouts)
+    if len(figures) == 1:
+        root = figures[0]
+        active = '0'
+    else:
+        root = Tabs(tabs=[TabPanel(child=p, title=g.replace('_', ' ')) for p, g in zip(figures, group_names)],
+                    sizing_mode='stretch_both')
+        active = 'tabs.active'
+        root.js_on_change('active', CustomJS(args=dict(figures=figures, **args), code="""
+const k = cb_obj.active;
+window.pyramid_loader(k, figures[k].x_range.start, figures[k].x_range.end, sources, dirs, layouts);
+"""))
+
+    # Reload data of group when its x-range changes (after zoom/pan settles)
+    for k, p in enumerate(figures):
+        callback = CustomJS(args=dict(x_range=p.x_range, k=k, **args), code="""
+window.pyramid_timers = window.pyramid_timers || {};
+clearTimeout(window.pyramid_timers[k]);
+window.pyramid_timers[k] = setTimeout(() => window.pyramid_loader(k, x_range.start, x_range.end, sources, dirs, layouts), 150);
+""")
+        p.x_range.js_on_change('start', callback)
+        p.x_range.js_on_change('end', callback)
+
+    doc = Document()
+    doc.add_root(root)
+    doc.js_on_event(DocumentReady, CustomJS(args=dict(tabs=root, figures=figures, **args), code=f"""
+const k = {active};
+window.pyramid_loader(k, figures[k].x_range.start, figures[k].x_range.end, sources, dirs, layouts);
+"""))
+    if writer is not None:
+        writer.save_text(file_loc, file_html(doc, resources=CDN, title=title, template=dashboard_template))
+    else:
+        with open(file_loc, 'w', encoding='utf-8') as f:
+            f.write(file_html(doc, resources=CDN, title=title, template=dashboard_template))
@@ -0,0 +1,112 @@
+# minmax_pyramid.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Multi-resolution min/max pyramid of chart data for deep zoom in     #
+#       html dashboards (html_dashboard.py)                             #
+#       + level 0 holds every sample; level k splits time into bins of  #
+#           sample interval * factor^k & keeps min & max of each bin    #
+#           (at their own times, in time order), so peaks are never    #
+#           lost at any zoom                                            #
+#       + levels are added until the whole test fits in target_points   #
+#       + each level is cut into tiles of tile_bins bins; a tile holds  #
+#           all channels of a chart group for its time range            #
+# - Tile file (gzip compressed float32): number of points of each       #
+#       channel, then x & y arrays of each channel                      #
+# - Tiles are encoded & written in background if an OutputWriter is    #
+#       given (output_writer.py)                                        #
+# - Browser picks the finest level with <= target_points points in the  #
+#       visible x-range & fetches only the tiles it needs               #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import gzip
+import numpy as np
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def bin_min_max(x, y, bins):
+    # Min & max point of each bin (x sorted, bins nondecreasing); returns x & y
+    #   of 2 points per bin in time order
+    first = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    min_idx = np.lexsort((y, bins))[first]
+    max_idx = np.lexsort((-y, bins))[first]
+    idx = np.sort(np.column_stack([min_idx, max_idx]), axis=1).ravel()
+    return(x[idx], y[idx])
+
+def get_level_widths(x_start, x_end, dt, factor=4, target_points=2000):
+    # Bin width of each level; level 0 (every sample) has width of sample interval
+    widths = [dt]
+    while (x_end - x_start) / widths[-1] * (1 if len(widths) == 1 else 2) > target_points:
+        widths.append(widths[-1] * factor)
+    return(widths)
+
+def build_pyramid(channel_data, factor=4, tile_bins=1024, target_points=2000):
+    # Levels of points for each channel of group (list of (x, y) arrays);
+    #   returns layout & dict of (level, tile): list of (x, y) per channel
+    channels = []
+    for x, y in channel_data:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        keep = ~np.isnan(x) & ~np.isnan(y)
+        x, y = x[keep], y[keep]
+        order = np.argsort(x, kind='stable')
+        channels.append((x[order], y[order]))
+
+    if not any([len(x) > 0 for x, y in channels]):
+        return({'t0': 0., 'target_points': target_points, 'levels': []}, {})
+    x_start = min([x[0] for x, y in channels if len(x) > 0])
+    x_end = max([x[-1] for x, y in channels if len(x) > 0])
+    intervals = np.concatenate([np.diff(x) for x, y in channels if len(x) > 1] + [[1.]])
+    dt = np.median(intervals[intervals > 0]) if np.any(intervals > 0) else 1.
+
+    layout = {'t0': float(x_start), 'target_points': target_points, 'levels': []}
+    tiles = {}
+    for level, width in enumerate(get_level_widths(x_start, x_end, dt, factor, target_points)):
+        points_per_bin = 1 if level == 0 else 2
+        tile_width = width * tile_bins * (2 if level == 0 else 1)
+
+        # Points of each channel at level & tile each point falls in
+        level_points = []
+        for x, y in channels:
+            if level > 0 and len(x) > 0:
+                x, y = bin_min_max(x, y, np.floor((x - x_start) / width).astype(np.int64))
+            level_points.append((x, y, np.floor((x - x_start) / tile_width).astype(np.int64)))
+
+        tile_ids = np.unique(np.concatenate([t for x, y, t in level_points]))
+        for tile in tile_ids:
+            tile_points = []
+            for x, y, t in level_points:
+                i0, i1 = np.searchsorted(t, [tile, tile + 1])
+                tile_points.append((x[i0:i1], y[i0:i1]))
+            tiles[(level, int(tile))] = tile_points
+
+        layout['levels'].append({'width': float(width), 'points_per_bin': points_per_bin,
+                                 'tile_width': float(tile_width), 'tiles': tile_ids.tolist()})
+    return(layout, tiles)
+
+def encode_tile(tile_points):
+    # Pack points of every channel in tile into compressed float32 bytes
+    counts = np.array([len(x) for x, y in tile_points], dtype=np.float64)
+    blocks = [counts] + [a for x, y in tile_points for a in (x, y)]
+    return(gzip.compress(np.concatenate(blocks).astype('<f4').tobytes()))
+
+def write_pyramid(group_dir, channel_data, factor=4, tile_bins=1024, target_points=2000, writer=None):
+    # Write tiles of all levels for one chart group to group_dir as
+    #   L<level>_<tile>.bin (in background if writer is given); returns
+    #   layout for browser loader
+    layout, tiles = build_pyramid(channel_data, factor, tile_bins, target_points)
+    if writer is not None:
+        for (level, tile), tile_points in tiles.items():
+            writer.save_bytes(os.path.join(group_dir, f'L{level}_{tile}.bin'), lambda t=tile_points: encode_tile(t))
+        return(layout)
+
+    if not os.path.exists(group_dir):
+        os.makedirs(group_dir)
+    for (level, tile), tile_points in tiles.items():
+        with open(os.path.join(group_dir, f'L{level}_{tile}.bin'), 'wb') as f:
+            f.write(encode_tile(tile_points))
+    return(layout)
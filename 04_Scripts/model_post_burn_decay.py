@@ -0,0 +1,86 @@
+# model_post_burn_decay.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Post-burn decay (decay_models.py) of DustTrak DRX size fractions    #
+#       (02_Data/Particulate) & MultiRAE gases (02_Data/RAE) across the #
+#       burn day & Day 1/3/5 AM/PM sessions of every burn               #
+#       + sessions stitched on one timeline per burn from TrakPro &     #
+#           MultiRAE start date/time headers                            #
+#       + exponential & power law fits of every series, with SE & 95%   #
+#           intervals; rates compared across burns & fuel packages      #
+#       + rows in Skip_Lines of Particulate_Info.csv are dropped        #
+#       + exports are read & binned in parallel (workers processes;     #
+#           None = one per CPU)                                         #
+# - fuel_packages: {burn dir: fuel package} to pool burns in comparison #
+#       (burns not listed are compared on their own)                    #
+# - Saved to 05_Charts/Decay/:                                          #
+#       + Decay_Sessions.csv: instrument, day, session, first & last    #
+#           reading of each session & start of its burn's timeline      #
+#       + Decay_Series.csv: binned readings on each burn's timeline     #
+#       + Decay_Fits.csv: fit of each series & model (Best = lowest     #
+#           RMSE of log readings)                                       #
+#       + Decay_Comparison.csv: weighted mean rate of each group        #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+
+from project_paths import info_dir, data_dir, chart_dir
+from exp_config import read_particulate_info
+from summary_metrics import save_table
+from decay_models import load_session_bins, stitch_sessions, fit_decay, compare_decay
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+save_dir = f'{chart_dir}Decay/'
+particulate_dir = f'{data_dir}Particulate/'
+rae_dir = f'{data_dir}RAE/'
+
+# -------------------- #
+# Set Decay Parameters #
+# -------------------- #
+bin_minutes = 15. # readings of each session reduced to medians of bins (min)
+min_points = 6 # bins a series needs to be fit
+min_sessions = 2 # sessions a series needs to be fit
+rae_measure = 'Avg' # MultiRAE reading used (Min, Avg, Max or Real)
+include_rae = True # if true, fit MultiRAE gases as well as DRX size fractions
+fuel_packages = {} # burn dir: fuel package, e.g. {'Burn_05': 'Package_A', 'Burn_06': 'Package_A'}
+workers = None # processes reading & binning exports (None: one per CPU, 1: no worker processes)
+
+# ------------------------------ #
+# Start Code Used to Model Decay #
+# ------------------------------ #
+if __name__ == '__main__':
+    # Read in & check particulate info (rows to skip)
+    skip_lines = dict(read_particulate_info(info_dir))
+    options = {'bin_minutes': bin_minutes, 'min_points': min_points, 'min_sessions': min_sessions,
+               'rae_measure': rae_measure}
+
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+
+    print('Reading DRX & MultiRAE sessions...')
+    sessions = load_session_bins(particulate_dir if os.path.exists(particulate_dir) else None,
+                                 rae_dir if include_rae and os.path.exists(rae_dir) else None,
+                                 options, skip_lines, workers)
+    series, session_info = stitch_sessions(sessions)
+    if len(series) == 0:
+        print('No post-burn sessions found')
+    else:
+        fits = fit_decay(series, options)
+        comparison = compare_decay(fits, fuel_packages)
+
+        save_table(session_info.set_index(['Source', 'Burn', 'Log']), f'{save_dir}Decay_Sessions.csv')
+        save_table(series.set_index(['Source', 'Burn', 'Instrument', 'Channel']), f'{save_dir}Decay_Series.csv')
+        save_table(fits, f'{save_dir}Decay_Fits.csv')
+        save_table(comparison, f'{save_dir}Decay_Comparison.csv')
+
+        # Print best model of each series
+        best = fits[fits['Best']] if len(fits) > 0 else fits
+        for (source, burn, instrument, channel, units, model), row in best.iterrows():
+            rate = f'rate {row["Rate"]:.4f} +/- {row["Rate_SE"]:.4f}' + (' 1/h' if model == 'Exponential' else '')
+            print(f'    {burn} {source} {instrument} {channel}: {model} {rate}, R^2 {row["R2"]:.2f}')
+        print(f'Fit {len(best)} series from {len(session_info)} sessions; tables saved to {save_dir}')
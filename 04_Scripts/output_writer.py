@@ -0,0 +1,123 @@
+# output_writer.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Background writer for chart & data output files, so plotting loops  #
+#       hand off a finished chart & go on to the next group while the   #
+#       file is compressed & written (e.g. to a network chart dir)      #
+#       + bounded queue; save calls block only when max_pending files   #
+#           are already waiting to be written                           #
+#       + each file is written to a temp file in its dir & renamed into #
+#           place, so a half-written pdf is never left behind           #
+#       + dirs are created once per run (cached makedirs)               #
+#       + errors are collected & raised together by close()             #
+# - matplotlib is not thread-safe, so figures are drawn to memory in    #
+#       the calling thread (save_figure, open_report) & only the bytes  #
+#       are handed off                                                  #
+# - Payloads given as functions (e.g. tile compression) are called by   #
+#       the writer; they must only read data that is not changed later  #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import io
+import queue
+import threading
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def atomic_write(file_loc, data):
+    # Write bytes to temp file in dir of file_loc & rename it into place
+    #   (temp name is unique to process & thread; file gets usual permissions)
+    file_dir, file_name = os.path.split(os.path.abspath(file_loc))
+    temp_loc = os.path.join(file_dir, f'.{file_name}.{os.getpid()}_{threading.get_ident()}.tmp')
+    try:
+        with open(temp_loc, 'wb') as f:
+            f.write(data)
+        os.replace(temp_loc, file_loc)
+    except BaseException:
+        if os.path.exists(temp_loc):
+            os.remove(temp_loc)
+        raise
+
+class ReportPages:
+    # Multi-page pdf drawn to memory & written by an OutputWriter on close;
+    #   same savefig/close calls as PdfPages
+    def __init__(self, writer, file_loc):
+        self.writer = writer
+        self.file_loc = file_loc
+        self.buffer = io.BytesIO()
+        self.pages = PdfPages(self.buffer)
+
+    def savefig(self, fig, **kwargs):
+        self.pages.savefig(fig, **kwargs)
+
+    def close(self):
+        self.pages.close()
+        self.writer.save_bytes(self.file_loc, self.buffer.getvalue())
+
+class OutputWriter:
+    def __init__(self, workers=1, max_pending=8):
+        # workers: writer threads; max_pending: files waiting to be written
+        #   before save calls block (bounds memory held by queued outputs)
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.threads = [threading.Thread(target=self.run, daemon=True) for _ in range(workers)]
+        self.errors = []
+        self.made_dirs = set()
+        self.lock = threading.Lock()
+        for thread in self.threads:
+            thread.start()
+
+    def run(self):
+        # Worker loop: write queued files until None
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            file_loc, data = task
+            try:
+                atomic_write(file_loc, data() if callable(data) else data)
+            except Exception as e:
+                with self.lock:
+                    self.errors.append(f'{file_loc}: {type(e).__name__}: {e}')
+
+    def make_dir(self, dir_loc):
+        # Create dir (& parents) once per writer
+        if dir_loc not in self.made_dirs:
+            os.makedirs(dir_loc, exist_ok=True)
+            with self.lock:
+                self.made_dirs.add(dir_loc)
+
+    def save_bytes(self, file_loc, data):
+        # Write data (bytes, or function returning bytes called by writer) to
+        #   file_loc in background; blocks while queue is full
+        self.make_dir(os.path.dirname(os.path.abspath(file_loc)))
+        self.queue.put((file_loc, data))
+
+    def save_text(self, file_loc, text):
+        self.save_bytes(file_loc, text.encode('utf-8'))
+
+    def save_figure(self, fig, file_loc, **kwargs):
+        # Draw fig to memory (format from file extension), close it & write
+        #   file in background; kwargs go to fig.savefig
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=os.path.splitext(file_loc)[1][1:], **kwargs)
+        plt.close(fig)
+        self.save_bytes(file_loc, buffer.getvalue())
+
+    def open_report(self, file_loc):
+        # Multi-page pdf (PdfPages replacement) written by this writer on close
+        return(ReportPages(self, file_loc))
+
+    def close(self):
+        # Wait for all queued files & stop workers; raise any write errors together
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.errors:
+            raise RuntimeError(f'Failed to write {len(self.errors)} output(s):\n    ' + '\n    '.join(self.errors))
@@ -0,0 +1,104 @@
+# pfe_cli.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Command line entry point for scripts (installed as 'pfe'):          #
+#       pfe plot                charts for DAQ tests (plot.py)          #
+#       pfe plot-html           html dashboards (plot_html.py)          #
+#       pfe plot-both           pdf & html from one data load           #
+#       pfe summary             summary metrics (summarize_tests.py)    #
+#       pfe exposure            FED of gases (analyze_exposure.py)      #
+#       pfe rae-alarms          MultiRAE STEL/TWA & alarm limit checks  #
+#       pfe decay               post-burn decay fits of DRX & MultiRAE  #
+#       pfe chunked             large tests in blocks (process_chunked) #
+#       pfe overlay             cross-test overlays (plot_overlay.py)   #
+#       pfe gas-lag             gas analyzer lag times                  #
+#       pfe particulate plot    particulate charts                      #
+#       pfe particulate summary peak particulate summary table          #
+#       pfe pxi-config          PXI .chcfg & NI MAX config files        #
+#       pfe serve               on-demand chart service (chart_service) #
+# - Only the script for the chosen command is imported, so heavy        #
+#       packages (matplotlib, seaborn, bokeh, ...) are loaded only by   #
+#       commands that use them                                          #
+# - Dirs default to project layout (see project_paths.py); override     #
+#       with --root, --info-dir, --data-dir & --chart-dir               #
+# - Without installing, run from any dir as:                            #
+#       python 04_Scripts/pfe_cli.py plot                               #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import sys
+import runpy
+import argparse
+
+# Script module run by each command
+commands = {'plot': 'plot',
+            'plot-html': 'plot_html',
+            'plot-both': 'plot_both',
+            'summary': 'summarize_tests',
+            'exposure': 'analyze_exposure',
+            'rae-alarms': 'evaluate_rae_alarms',
+            'decay': 'model_post_burn_decay',
+            'chunked': 'process_chunked',
+            'overlay': 'plot_overlay',
+            'gas-lag': 'gas_lag_times',
+            'pxi-config': 'create_channel_config_file_pxi',
+            'serve': 'chart_service'}
+particulate_commands = {'plot': 'plot_particulate_data',
+                        'summary': 'analyze_particulate_data'}
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_parser():
+    parser = argparse.ArgumentParser(prog='pfe', description='Post Fire Exposure data processing')
+    parser.add_argument('--root', help='project dir holding 02_Data, 03_Info & 05_Charts')
+    parser.add_argument('--info-dir', help='dir with exp_info.csv & channel lists (default: <root>/03_Info)')
+    parser.add_argument('--data-dir', help='dir with test data (default: <root>/02_Data)')
+    parser.add_argument('--chart-dir', help='dir for charts & results (default: <root>/05_Charts)')
+
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+    subparsers.add_parser('plot', help='pdf charts for each test')
+    subparsers.add_parser('plot-html', help='html dashboard for each test')
+    subparsers.add_parser('plot-both', help='pdf charts & html dashboard from one load of each test')
+    subparsers.add_parser('summary', help='summary metrics table for each test & all tests')
+    subparsers.add_parser('exposure', help='FED of asphyxiant gases for DAQ tests & MultiRAE sessions')
+    subparsers.add_parser('rae-alarms', help='rolling STEL & TWA, alarm & exposure limit checks of MultiRAE logs')
+    subparsers.add_parser('decay', help='decay fits of post-burn DRX & MultiRAE sessions across days & burns')
+    subparsers.add_parser('chunked', help='baselines, window stats & converted data of tests read in blocks')
+    subparsers.add_parser('overlay', help='overlay charts of channels across tests')
+    subparsers.add_parser('gas-lag', help='gas analyzer transport times')
+    subparsers.add_parser('pxi-config', help='PXI channel config files from channel lists')
+    subparsers.add_parser('serve', help='local http service rendering charts & data on demand')
+    particulate = subparsers.add_parser('particulate', help='particulate data')
+    particulate.add_argument('action', choices=list(particulate_commands.keys()))
+    return(parser)
+
+def set_paths(args):
+    # Pass dirs to project_paths through environment (read when scripts import it)
+    for env_var, path in [('PFE_ROOT', args.root), ('PFE_INFO_DIR', args.info_dir),
+                          ('PFE_DATA_DIR', args.data_dir), ('PFE_CHART_DIR', args.chart_dir)]:
+        if path:
+            os.environ[env_var] = os.path.abspath(path)
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    set_paths(args)
+
+    if args.command == 'particulate':
+        module = particulate_commands[args.action]
+    else:
+        module = commands[args.command]
+
+    # Scripts import sibling modules by name
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+    return(0)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# plot_both.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Generates pdf charts (plot.py) & html dashboard (plot_html.py) for  #
+#       each test from one load of the data file                        #
+#       + test data is read, indexed & converted once (exp_processing)  #
+#           & both backends plot the same converted arrays              #
+#       + plot parameters are set in plot.py & plot_html.py             #
+# - If run_parallel = True, html dashboard is built in a worker thread  #
+#       while pdf charts are drawn (matplotlib stays in main thread);   #
+#       both read the shared data in memory, nothing is copied          #
+# - If async_writes is set in plot.py, charts, pages & data tiles of    #
+#       both backends are written by one background OutputWriter       #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from project_paths import info_dir, data_dir, chart_dir, store_dir
+from exp_processing import ProcessedExp, convert_new_tdms_files
+from exp_config import read_exp_info
+from channel_store import write_test
+import plot
+import plot_html
+from output_writer import OutputWriter
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+tdms_dir = f'{data_dir}TDMS/'
+pdf_dir = chart_dir
+html_dir = f'{chart_dir}HTML/'
+
+# Read in & check exp info file & channel lists
+exp_info = read_exp_info(info_dir)
+
+# -------------- #
+# Set Parameters #
+# -------------- #
+run_parallel = True # if true, build html dashboard in a thread while pdf charts are drawn
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_save_dir(plot_dir, test_name):
+    save_dir = f'{plot_dir}{test_name}/'
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    return(save_dir)
+
+# -------------------------------------- #
+# Start Code Used to Generate Data Plots #
+# -------------------------------------- #
+convert_new_tdms_files(tdms_dir, data_dir)
+
+# Tests missing from either chart dir are plotted (or all if plot_all is set in plot.py)
+data_file_ls = list(dict.fromkeys(plot.get_data_files(exp_info, pdf_dir) + plot_html.get_data_files(exp_info, html_dir)))
+
+# Background writer shared by both backends & all tests (write errors are raised after last test)
+writer = OutputWriter(max(plot.writer_threads, plot_html.writer_threads)) if plot.async_writes else None
+
+for f in data_file_ls:
+    # Load & process test data once for both backends
+    test_name = f[:-4]
+    test = ProcessedExp(exp_info[test_name], data_dir, plot.compact_dtypes, plot.filter_data, plot.screen_sensors)
+    if plot.layer_analysis:
+        test.add_layer_channels(plot.layer_method, plot.layer_percent, plot.ceiling_heights)
+    if plot.fed_analysis:
+        test.add_fed_channels(plot.fed_start)
+    test.process_channels()
+
+    pdf_save_dir = get_save_dir(pdf_dir, test_name)
+    html_save_dir = get_save_dir(html_dir, test_name)
+    test.write_tables(pdf_save_dir, plot.event_windows, plot.vent_dims, plot.summary_thresholds)
+    test.baselines.to_csv(f'{html_save_dir}Baselines.csv')
+    if test.health is not None:
+        test.health.to_csv(f'{html_save_dir}Sensor_Health.csv')
+    if test.fed_summary is not None:
+        test.fed_summary.to_csv(f'{html_save_dir}FED_Summary.csv')
+
+    if run_parallel:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            html_job = executor.submit(plot_html.save_html_dashboard, test, html_save_dir, writer)
+            plot.save_pdf_charts(test, pdf_save_dir, writer)
+            # Raises any error from html backend
+            html_job.result()
+    else:
+        plot.save_pdf_charts(test, pdf_save_dir, writer)
+        plot_html.save_html_dashboard(test, html_save_dir, writer)
+
+    # Save processed channel data to cross-test channel store
+    if plot.store_channels:
+        write_test(store_dir, test_name, test.exp_data.index.values, test.processed_data, test.plot_channel_list())
+
+    print()
+
+if writer is not None:
+    writer.close()
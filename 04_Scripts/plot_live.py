@@ -0,0 +1,222 @@
+# plot_live.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Live dashboard for a burn in progress; run from 04_Scripts with a   #
+#       local Bokeh server:                                             #
+#           bokeh serve --show plot_live.py --args PFE_2                #
+#       + test name is used to find data file (02_Data/<test>.csv) &    #
+#           channel list/exclusions in exp_info.csv; if the test isn't  #
+#           in exp_info yet, default_channel_list is used               #
+# - One tab per chart group in channel list (same groups as             #
+#       plot_html.py); new samples are pushed to the browser with       #
+#       ColumnDataSource.stream & only the last window_length seconds   #
+#       are kept in each chart (rows kept follow Time column, so any    #
+#       sample rate works)                                              #
+# - Times are relative to ignition (Ignition_Event of exp_info, or      #
+#       first 'Ignition' event if the test isn't in exp_info yet)       #
+# - Events are added as vertical spans as they are recorded             #
+# - Updates are throttled to one batch every update_interval ms         #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import sys
+import numpy as np
+from itertools import cycle
+
+from bokeh.io import curdoc
+from bokeh.plotting import figure, ColumnDataSource
+from bokeh.models import HoverTool, Span, Label
+try:
+    from bokeh.models import Tabs, TabPanel
+except ImportError:
+    from bokeh.models import Tabs, Panel as TabPanel
+
+from project_paths import info_dir, data_dir
+from daq_loader import get_active_channels
+from daq_tail import DAQTail
+from exp_config import read_exp_info, read_channel_list
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+# Read in & check exp info file & channel lists
+exp_info = read_exp_info(info_dir)
+
+# Channel list used if test isn't listed in exp_info.csv yet
+default_channel_list = 'channel_list_1894D.csv'
+
+TOOLS = "pan,wheel_zoom,box_zoom,reset,save"
+
+# ------------------- #
+# Set Plot Parameters #
+# ------------------- #
+update_interval = 1000  # time between dashboard updates (ms)
+window_length = 1800    # length of rolling window shown in charts (s)
+
+tableau20 = ([(31, 119, 180),  (255,  27, 14), 	(44, 160, 44),  (214, 39, 40),
+    (148, 103, 189),  (140, 86, 75), (227, 119, 194),  (127, 127, 127),
+    (188, 189, 34),  (23, 190, 207), (174, 199, 232), (255, 187, 120),
+    (152, 223, 138), (255, 152, 150), (197, 176, 213), (196, 156, 148),
+    (247, 182, 210), (199, 199, 199), (219, 219, 141), (158, 218, 229)])
+
+# y-axis labels based on data type
+y_labels = {'Temperature': 'Temperature (F)',
+            'Velocity': 'Velocity (m/s)',
+            'Percent': 'Concentration (% vol)',
+            'Heat_Flux': 'Heat Flux (kW/m^2)',
+            'Pressure': 'Pressure (Pa)',
+            'Wind Velocity': 'Wind Speed (m/s)',
+            'Wind Direction': 'Wind Direction'}
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def convert_data(tail, channels, start, stop):
+    # Scale & zero rows [start, stop) of stored data for given channels;
+    #   zeroing uses baselines (mean before ignition) tracked by tail
+    baselines = tail.get_baselines()
+    converted = {}
+    for channel in channels:
+        i = channel_config.index[channel]
+        data_type = channel_config.types[i]
+        scale_factor = channel_config.scale[i]
+        offset = channel_config.offset[i]
+        raw_data = tail.get_channel(channel)[start:stop]
+        scaled_data = raw_data * scale_factor + offset
+        baseline = baselines[channel] * scale_factor + offset
+        if np.isnan(baseline):
+            baseline = 0
+
+        if data_type == 'Temperature':
+            plot_data = (scaled_data * 9./5.) + 32.
+        elif data_type == 'Velocity':
+            TC_data = tail.get_channel(channel.replace('BDPV', 'BDPT', 1))[start:stop] + 273.15
+            zeroed_data = scaled_data - baseline
+            plot_data = np.sign(zeroed_data) * 0.0698 * (TC_data * np.abs(zeroed_data))**0.5
+        elif data_type == 'Percent':
+            if 'CO' in channel:
+                plot_data = scaled_data - baseline
+            else:
+                plot_data = scaled_data - (baseline - 20.95)
+        elif data_type in ['Heat_Flux', 'Pressure']:
+            plot_data = scaled_data - baseline
+        else:
+            plot_data = scaled_data
+
+        converted[channel] = plot_data
+    return(converted)
+
+def get_time_reference():
+    # Times are relative to ignition; before ignition, relative to first row
+    if not np.isnan(tail.ignition_time):
+        return(tail.ignition_time)
+    elif tail.n_rows > 0:
+        return(tail.time[0])
+    return(0)
+
+def get_source_data(group, start, stop):
+    # Data dict for rows [start, stop) in format of group's ColumnDataSource
+    data = convert_data(tail, group_channels[group], start, stop)
+    data['x'] = tail.get_time(relative_to_ignition=False)[start:stop] - get_time_reference()
+    return(data)
+
+def add_event_spans(events):
+    # Add vertical line & label for each event to every chart
+    for event_time, label in events:
+        x = event_time - get_time_reference()
+        for p in figures.values():
+            event_line = Span(location=x, dimension='height', line_color='black', line_width=3)
+            event_label = Label(x=x, y=5, y_units='screen', text=label, angle=1.57, text_font_size='10pt')
+            p.add_layout(event_line)
+            p.add_layout(event_label)
+            event_renderers.extend([(p, event_line), (p, event_label)])
+
+def refresh_all():
+    # Replace all chart data with last window of stored data (ignition
+    #   found or first update); relocates event spans relative to ignition
+    start = tail.window_start(window_length)
+    for group in figures.keys():
+        sources[group].data = get_source_data(group, start, tail.n_rows)
+    for p, renderer in event_renderers:
+        p.center.remove(renderer)
+    event_renderers.clear()
+    add_event_spans(tail.events)
+
+def update():
+    # Ingest new rows from data file & stream them to charts
+    n_events = len(tail.events)
+    ignition_time = tail.ignition_time
+    n_new = tail.update()
+    if n_new == 0:
+        return
+
+    # Ignition found in latest rows; x data shifts so redraw everything
+    if np.isnan(ignition_time) and not np.isnan(tail.ignition_time):
+        refresh_all()
+        return
+
+    start = tail.n_rows - n_new
+    window_rows = tail.n_rows - tail.window_start(window_length)
+    for group in figures.keys():
+        sources[group].stream(get_source_data(group, start, tail.n_rows), rollover=window_rows)
+    add_event_spans(tail.events[n_events:])
+
+# ------------------------- #
+# Start Code for Dashboard  #
+# ------------------------- #
+test_name = sys.argv[1] if len(sys.argv) > 1 else exp_info.test_names[-1]
+
+# Read in channel list & exclusions for test
+if test_name in exp_info:
+    channel_config = exp_info[test_name].channels
+    excluded_groups = exp_info[test_name].excluded_groups
+    excluded_channels = exp_info[test_name].excluded_channels
+    ignition_event = exp_info[test_name].ignition_event
+else:
+    channel_config = read_channel_list(f'{info_dir}{default_channel_list}')
+    excluded_groups, excluded_channels = frozenset(), frozenset()
+    ignition_event = None
+channel_list = channel_config.table
+
+# Follow data file; only active channels are stored
+active_channels = get_active_channels(channel_list, excluded_groups, excluded_channels)
+tail = DAQTail(f'{data_dir}{test_name}.csv', active_channels, ignition_event=ignition_event)
+
+# Create one chart per group with one line per channel
+figures, sources, group_channels, event_renderers = {}, {}, {}, []
+for group, positions in channel_config.group_index.items():
+    if group in excluded_groups:
+        continue
+    channels = [channel_config.names[i] for i in positions]
+    channels = [c for c in channels if c in tail.channels and c not in excluded_channels]
+    if not channels:
+        continue
+    group_channels[group] = channels
+
+    sources[group] = ColumnDataSource(data={c: [] for c in ['x'] + channels})
+    p = figure(x_axis_label='Time (s)', sizing_mode='stretch_both', tools=TOOLS)
+    p.yaxis.axis_label = y_labels.get(channel_config.channel_type(channels[0]), 'Voltage')
+
+    colors = cycle(tableau20)
+    for channel in channels:
+        r1 = p.line('x', channel, line_width=2, line_color=next(colors), source=sources[group],
+            legend_label=channel_config.label(channel))
+        p.add_tools(HoverTool(renderers=[r1], tooltips=[('Channel', channel_config.label(channel)),
+            ('Time', '@x{1}'), ('Value', f'@{{{channel}}}{{0.00}}')]))
+
+    p.legend.location = 'top_left'
+    p.legend.click_policy = 'hide'
+    p.legend.background_fill_alpha = 1.0
+    p.legend.border_line_alpha = 1.0
+    figures[group] = p
+
+# Load data already in file, then stream new rows at set interval
+tail.update()
+refresh_all()
+
+doc = curdoc()
+doc.title = f'{test_name} Live'
+doc.add_root(Tabs(tabs=[TabPanel(child=figures[g], title=g.replace('_', ' ')) for g in figures.keys()]))
+doc.add_periodic_callback(update, update_interval)
@@ -0,0 +1,108 @@
+# plot_overlay.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Script will generate overlay plots comparing the same channel       #
+#       across tests (e.g. 1TC1 for every PFE burn)                     #
+# - Data is read from the channel store written by plot.py              #
+#       (store_channels = True), so tests are not reprocessed           #
+# - One pdf per channel is saved in 05_Charts/Overlay/                  #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import matplotlib.pyplot as plt
+import seaborn as sns
+# Set seaborn as default plot config
+sns.set()
+sns.set_style("darkgrid", {"axes.facecolor": ".88"})
+from itertools import cycle
+
+from project_paths import chart_dir, store_dir
+from channel_store import ChannelStore
+from output_writer import OutputWriter
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+plot_dir = f'{chart_dir}Overlay/'
+# Create plot dir if necessary
+if not os.path.exists(plot_dir):
+    os.makedirs(plot_dir)
+
+# ------------------- #
+# Set Plot Parameters #
+# ------------------- #
+overlay_tests = []     # tests to compare; if empty, every test in store
+overlay_channels = []  # channels to plot; if empty, every channel in overlay_groups
+overlay_groups = []    # chart groups to plot; if both lists are empty, every channel in store
+x_lims = [0, 1000]     # time range relative to ignition (s)
+
+# y-axis labels based on data type (data in store is in plot.py units)
+y_labels = {'Temperature': 'Temperature ($^\circ$C)',
+            'Velocity': 'Velocity (m/s)',
+            'Percent': 'Concentration (% vol)',
+            'Heat_Flux': 'Heat Flux (kW/m$^2$)',
+            'Pressure': 'Pressure (Pa)',
+            'Layer_Height': 'Layer Height (m)',
+            'FED': 'Fractional Effective Dose',
+            'Wind Velocity': 'Wind Speed (m/s)',
+            'Wind Direction': 'Wind Direction'}
+
+# Define other general plot parameters
+label_size = 18
+tick_size = 16
+line_width = 1.5
+legend_font = 10
+fig_width = 10
+fig_height = 8
+
+# -------------------------------------- #
+# Start Code Used to Generate Data Plots #
+# -------------------------------------- #
+store = ChannelStore(store_dir)
+tests = overlay_tests if overlay_tests else store.tests()
+
+# Determine channels to plot
+if overlay_channels:
+    channels = overlay_channels
+elif overlay_groups:
+    channels = [c for g in overlay_groups for c in store.channels(tests, group=g)]
+else:
+    channels = store.channels(tests)
+
+# Query all tests & channels at once; arrays are views of stored data
+results = store.get(tests, channels, x_lims[0], x_lims[1])
+
+# Chart files are written by a background thread while next channel is plotted
+writer = OutputWriter()
+
+for channel in channels:
+    print (f'  Plotting {channel}')
+    fig, ax1 = plt.subplots(figsize=(fig_width, fig_height))
+    sns.set_palette(sns.color_palette('deep', 8))
+    plot_markers = cycle(['s', 'o', '^', 'd', 'h', 'p','v', '8', 'D', '*', '<', '>', 'H'])
+
+    for test_name in tests:
+        time, data = results[test_name]
+        if channel not in data:
+            continue
+        ax1.plot(time, data[channel], lw=line_width,
+            marker=next(plot_markers), markevery=30, mew=3, mec='none', ms=7,
+            label=test_name)
+
+    # Label axes using channel info from store
+    channel_info = store.index[store.index['Channel'] == channel].iloc[0]
+    ax1.set_ylabel(y_labels.get(channel_info['Type'], 'Voltage (V)'), fontsize=label_size)
+    ax1.set_xlabel('Time (s)', fontsize=label_size)
+    ax1.set_title(f"{channel} - {channel_info['Label']}", fontsize=label_size)
+    ax1.tick_params(labelsize=tick_size, length=0, width=0)
+    ax1.set_xlim(x_lims[0] - x_lims[1] / 400, x_lims[1])
+
+    handles1, labels1 = ax1.get_legend_handles_labels()
+    ax1.legend(handles1, labels1, loc='best', fontsize=legend_font, handlelength=3, frameon=True, framealpha=0.75)
+    fig.tight_layout()
+    writer.save_figure(fig, f'{plot_dir}{channel}.pdf')
+writer.close()
+print()
@@ -4,6 +4,10 @@
 # - Generate plots for particulate data 
 # 	- Individual pdf and html plots for each test are saved in 
 # 		/05_Charts/Particulate/
+# 	- html data is saved as a min/max pyramid in <test>_data/ 
+# 		(see html_dashboard.py) if html_pyramid = True
+# 	- pdf plots, reports & html pyramid data are written by a background
+# 		thread (output_writer.py) if async_writes = True
 # ********************************************************************* #
 
 # -------------- #
@@ -13,31 +17,33 @@ import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
 import seaborn as sns
 # Set seaborn as default plot config
 sns.set()
 from cycler import cycler
-from scipy.signal import butter, filtfilt
 from itertools import cycle
 
-from bokeh.plotting import figure, output_file, show, save, ColumnDataSource, reset_output
-from bokeh.models import HoverTool, Range1d, Span, LinearAxis,LabelSet, Label, BoxAnnotation
+from bokeh.plotting import figure, output_file, save, ColumnDataSource, reset_output
+from bokeh.models import HoverTool, Range1d
 
-from bokeh.models.glyphs import Line, Text
+from project_paths import info_dir, data_dir, chart_dir
+from exp_config import read_particulate_info
+from html_dashboard import write_group_data, save_dashboard
+from output_writer import OutputWriter
 
 # ---------------------------------- #
 # Define Subdirectories & Info Files #
 # ---------------------------------- #
-info_dir = '../03_Info/'
-data_dir = '../02_Data/Particulate/'
-results_dir = '../05_Charts/'
+particulate_dir = f'{data_dir}Particulate/'
+results_dir = chart_dir
 
 # Create results directory if necessary
 if not os.path.exists(results_dir):
 	os.makedirs(results_dir)
 
-# Read in exp info file
-exp_info = pd.read_csv(info_dir + 'Particulate_Info.csv', index_col='Test_Name')
+# Read in & check particulate info file (rows to skip in each test)
+skip_lines = read_particulate_info(info_dir)
 
 # define tools for html plots
 TOOLS = "pan,wheel_zoom,box_zoom,reset,save"
@@ -48,6 +54,11 @@ TOOLS = "pan,wheel_zoom,box_zoom,reset,save"
 # ------------------- #
 plot_all = True 	 # if true, generate plots for every test
 equal_scales = False # Use same y_max/y_min value for every plot
+rasterize_data = True # if true, data lines are rasterized in pdf plots (axes & labels stay vector)
+raster_dpi = 150 # resolution of rasterized data lines
+pdf_report = False # if true, save plots for all tests in a directory as pages of one pdf (Particulate_Report.pdf)
+async_writes = True # if true, pdf plot & html files are written in background (output_writer.py) while next test is processed
+html_pyramid = True # if true, html data is saved as min/max pyramid in <test>_data/ & loaded for visible range (serve chart dir to view); false embeds data in page
 
 # Define 20 color pallet using RGB values
 tableau20 = [(31, 119, 180), (174, 199, 232), (255, 127, 14), (255, 187, 120),
@@ -105,9 +116,18 @@ def format_and_save_plot(y_lims, x_lims, file_loc):
 	# Clean up whitespace padding
 	fig.tight_layout()
 
-	# Save plot to file
-	plt.savefig(file_loc)
-	plt.close()
+	# Save plot to file (or add page to report for dir)
+	if pdf_report:
+		save_dir = os.path.dirname(file_loc) + '/'
+		if save_dir not in report_pages:
+			report_file = save_dir + 'Particulate_Report.pdf'
+			report_pages[save_dir] = writer.open_report(report_file) if writer is not None else PdfPages(report_file)
+		report_pages[save_dir].savefig(fig, dpi=raster_dpi)
+	elif writer is not None:
+		writer.save_figure(fig, file_loc, dpi=raster_dpi)
+	else:
+		plt.savefig(file_loc, dpi=raster_dpi)
+	plt.close(fig)
 
 # -------------------------------------- #
 # Start Code Used to Generate Data Plots #
@@ -116,11 +136,11 @@ def format_and_save_plot(y_lims, x_lims, file_loc):
 # Determine which test data to plot
 data_file_ls = []
 # loop through 02_Data/Particulate/ directory
-for f in os.listdir(data_dir):
+for f in os.listdir(particulate_dir):
 	if not f.startswith('Burn'): continue
 
 	# file path to sub directories (i.e. 02_Data/Particulate/Burn1_29SEP2020/)
-	exp_dir = os.path.join(data_dir,f)
+	exp_dir = os.path.join(particulate_dir,f)
 
 	# loop through subdirectory
 	for ff in os.listdir(exp_dir):
@@ -142,48 +162,33 @@ for f in os.listdir(data_dir):
 
 if plot_all is False: # then skip any data files that already have plots in 05_Charts directory
 	for f in list(data_file_ls):
-		pdf_filepath = results_dir + '/'.join(f.split('/')[2:])[:-5] + '.pdf'
-		html_filepath = results_dir + '/'.join(f.split('/')[2:])[:-5] + '.html'
+		pdf_filepath = results_dir + os.path.relpath(f, data_dir)[:-5] + '.pdf'
+		html_filepath = results_dir + os.path.relpath(f, data_dir)[:-5] + '.html'
 		if os.path.exists(pdf_filepath) and os.path.exists(html_filepath):
 			data_file_ls.remove(f)
 
 
 # data_file_ls = ['../02_Data/Particulate/Burn6_10OCT2020/1 Day Post/11_OCT_Burn_06_DRX_1Day_PM.xlsx']
 
+# Multi-page pdf for each output dir (used if pdf_report)
+report_pages = {}
+writer = OutputWriter() if async_writes else None
+
 # Loop through test data files & create plots
 for f in data_file_ls:
-	# remove '../02_Data/' and file name from file path to be used when saving to '../05_Charts/' later
-	filepath = f.split('/')[2:-1]
-	filepath = '/'.join(filepath)
+	# remove data dir & file name from file path to be used when saving to chart dir later
+	filepath = os.path.relpath(os.path.dirname(f), data_dir)
 
 	# Get test name from file
-	Test_Name = f.split('/')[-1][:-5]
+	Test_Name = os.path.basename(f)[:-5]
 
 	# Read in data for experiment
 	Exp_Data = pd.read_excel(f, skiprows=28, usecols=[1,2,3,4,5,6], names=['Timestamp','PM1','PM2.5','RESP','PM10','TOTAL'])
 	print ('--- Loaded data file for '+Test_Name+' ---')
 
-	# check exp_info file to see if need to skip lines in data 
-	# skip_lines format must be comma separated and splices separated by colon
-	if Test_Name in exp_info.index.values:
-		# import Skip_Lines values from exp_info file
-		skip_str = exp_info['Skip_Lines'][Test_Name]
-
-		# split comma separated values if possible
-		try: skip_list = skip_str.split(',')
-		except: skip_list = [skip_str]
-
-		# loop through Skip_Lines values
-		for i in skip_list:
-			# split colon separated values if possible
-			try: 
-				j,k = i.split(':')
-				skip_idx = list(range(int(j),int(k)+1))
-			except:
-				skip_idx = [int(i)]
-			
-			# remove rows from data frame according to Skip_Lines values
-			Exp_Data.drop(skip_idx, inplace=True)
+	# Remove rows listed in Skip_Lines of particulate info file
+	if Test_Name in skip_lines:
+		Exp_Data.drop(sorted(set(skip_lines[Test_Name])), inplace=True)
 
 	### PLOTTING  ###
 	# Set dir name for experiment's plots
@@ -199,7 +204,9 @@ for f in data_file_ls:
 	tableau20_cycle=cycle(tableau20)
 
 	# initialize html plotting parameters
-	output_file(save_dir + Test_Name + '.html', mode='cdn')
+	if not html_pyramid:
+		output_file(save_dir + Test_Name + '.html', mode='cdn')
+	html_sources, html_data = [], []
 	p = figure( x_axis_label='Time (s)', sizing_mode='stretch_both', tools=TOOLS,x_range = Range1d(0,max(Exp_Data.index.values)))
 
 	# loop through each channel in data frame
@@ -218,17 +225,26 @@ for f in data_file_ls:
 		# Plot to pdf plot
 		ax1.plot(Exp_Data.index.values, plot_data, lw=line_width,
 			marker=next(plot_markers), markevery=30, mew=3, mec='none', ms=7,
-			label=channel)
+			label=channel, rasterized=rasterize_data)
 
 		# Plot to html plot
-		source = ColumnDataSource(data=dict(
-			x = Exp_Data.index.values,
-			y = plot_data,
-			channels = np.tile(channel,[len(Exp_Data),1]),))
+		if html_pyramid:
+			# Source is empty in page; data is loaded from pyramid for visible range
+			source = ColumnDataSource(data=dict(x=[], y=[]))
+			html_sources.append(source)
+			html_data.append((Exp_Data.index.values, plot_data.values))
+		else:
+			source = ColumnDataSource(data=dict(
+				x = Exp_Data.index.values,
+				y = plot_data,
+				channels = np.tile(channel,[len(Exp_Data),1]),))
 		r1 = p.line('x', 'y', line_width=2, line_color=next(tableau20_cycle),source=source,legend_label=channel)
-		p.add_tools(HoverTool(renderers=[r1], tooltips=[
-							("Channel Name", "@channels"),
-							("Value", "@y"),]))
+		if html_pyramid:
+			p.add_tools(HoverTool(renderers=[r1], tooltips=[('Time','$x{1}'),(hover_value,'$y{0.000}'),('Channel',channel)]))
+		else:
+			p.add_tools(HoverTool(renderers=[r1], tooltips=[
+								("Channel Name", "@channels"),
+								("Value", "@y"),]))
 
 		if not equal_scales:
 			# Check if y min/max need to be updated
@@ -250,11 +266,24 @@ for f in data_file_ls:
 	
 	# format and save html plot
 	p.yaxis.axis_label = y_label
-	hover = p.select(dict(type=HoverTool))
-	hover.tooltips = [('Time','$x{1}'),(hover_value,'$y{0.000}'),('Channel','@channels')]
 	p.legend.click_policy= 'hide'
 	p.legend.background_fill_alpha = 1.0
 	p.legend.border_line_alpha = 1.0
 	p.legend.label_standoff = 5
-	save(p)	
-	reset_output()
+	if html_pyramid:
+		layout = write_group_data(f'{save_dir}{Test_Name}_data/Particulate', html_data, writer)
+		save_dashboard(save_dir + Test_Name + '.html', Test_Name, [p], ['Particulate'], [html_sources],
+			[f'{Test_Name}_data/Particulate'], [layout], writer)
+	else:
+		hover = p.select(dict(type=HoverTool))
+		hover.tooltips = [('Time','$x{1}'),(hover_value,'$y{0.000}'),('Channel','@channels')]
+		save(p)	
+		reset_output()
+
+# Close multi-page pdf reports
+for pages in report_pages.values():
+	pages.close()
+
+# Wait for background writes (raises any write errors)
+if writer is not None:
+	writer.close()
@@ -0,0 +1,114 @@
+# process_chunked.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Converts & summarizes DAQ tests without loading whole data file     #
+#       (see chunked_processing.py); for tests too large for plot.py    #
+# - Saves to 05_Charts/<test>/:                                         #
+#       + Baselines.csv & Event_Windows.csv (same as plot.py)           #
+#       + Channel_Stats.csv: count, mean, min, max, time of max &       #
+#           integral of converted data of each channel over test        #
+#       + Converted_Data.csv: converted data of every active channel    #
+#           (written block by block if write_converted = True)          #
+# - chunk_rows sets rows read per block (peak memory); filter_rows > 0  #
+#       applies a centered rolling mean of filter_rows rows             #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import pandas as pd
+
+from project_paths import info_dir, data_dir, chart_dir
+from daq_loader import iter_daq_chunks
+from exp_config import read_exp_info
+from bdp_flow import get_probe_pairs
+from chunked_processing import (read_chunked_events, read_chunked_baselines, chunk_time, iter_blocks,
+    get_context_rows, convert_block, RunningStats, running_window_table)
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+plot_dir = chart_dir
+
+# Read in & check exp info file & channel lists
+exp_info = read_exp_info(info_dir)
+
+# ------------------------- #
+# Set Processing Parameters #
+# ------------------------- #
+chunk_rows = 50000 # rows read per block
+compact_dtypes = True # if true, load channel data as float32
+filter_rows = 0 # if > 0, apply centered rolling mean of filter_rows rows to converted data
+write_converted = True # if true, save converted data of all channels to Converted_Data.csv
+
+# Tests to process; None processes every test in exp_info with a data file
+test_names = None
+
+# Windows between labeled events for per-window channel statistics: {name: [start event, end event]}
+event_windows = {'Ignition to Suppression': ['Ignition', 'Suppression']}
+
+# -------------------------------- #
+# Start Code Used to Process Tests #
+# -------------------------------- #
+if test_names is None:
+    test_names = [t for t in exp_info.test_names if os.path.exists(f'{data_dir}{t}.csv')]
+
+for test_name in test_names:
+    file_loc = f'{data_dir}{test_name}.csv'
+    print(f'--- Processing {test_name} in blocks of {chunk_rows} rows ---')
+
+    # Channel list & active channels from test config
+    config = exp_info[test_name]
+    channel_list = config.channel_list
+    active_channels = list(config.active_channels)
+
+    save_dir = f'{plot_dir}{test_name}/'
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+
+    # Pass 1: events & ignition time
+    events, day_start, sample_dt = read_chunked_events(file_loc, chunk_rows)
+    ignition_time = events.times[config.ignition_event]
+    events = events.shift(-ignition_time)
+
+    # Pass 2: baseline statistics
+    baseline_window = list(config.baseline_window)
+    baselines = read_chunked_baselines(file_loc, channel_list, active_channels, baseline_window,
+                                       day_start, ignition_time, chunk_rows, compact_dtypes)
+    baselines.to_csv(f'{save_dir}Baselines.csv')
+    data_channels = baselines.index.tolist()
+
+    gas_delays = config.gas_delays(data_channels)
+    probe_pairs = get_probe_pairs(channel_list, data_channels)
+    before, after = get_context_rows(filter_rows, gas_delays, sample_dt)
+
+    # Running statistics of converted data in each event window & over test
+    windows = events.phases()
+    for window_name, (start_label, end_label) in event_windows.items():
+        windows[window_name] = events.interval(start_label, end_label)
+    window_stats = {name: RunningStats(len(data_channels), start, end) for name, (start, end) in windows.items()}
+    channel_stats = RunningStats(len(data_channels))
+
+    # Pass 3: stream overlapping blocks through transforms & reductions
+    converted_loc = f'{save_dir}Converted_Data.csv'
+    if write_converted and os.path.exists(converted_loc):
+        os.remove(converted_loc)
+    chunks = iter_daq_chunks(file_loc, active_channels, chunk_rows, compact_dtypes)
+    for block, i0, i1 in iter_blocks(chunks, before, after):
+        block.index = chunk_time(block['Time'], day_start) - ignition_time
+        converted = convert_block(block, channel_list, data_channels, baselines, gas_delays, probe_pairs, filter_rows).iloc[i0:i1]
+
+        time, values = converted.index.values, converted.to_numpy()
+        for stats in window_stats.values():
+            stats.update(time, values)
+        channel_stats.update(time, values)
+
+        if write_converted:
+            converted.to_csv(converted_loc, mode='a', header=not os.path.exists(converted_loc), index_label='Time')
+
+    running_window_table(window_stats, data_channels).to_csv(f'{save_dir}Event_Windows.csv', index=False)
+    channel_table = pd.DataFrame(channel_stats.results(), index=pd.Index(data_channels, name='Channel'))
+    channel_table.to_csv(f'{save_dir}Channel_Stats.csv')
+    print(f'    Saved results to {save_dir}')
+    print()
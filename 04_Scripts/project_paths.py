@@ -0,0 +1,41 @@
+# project_paths.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Locations of info, data & chart dirs used by every script           #
+#       + default is project layout (03_Info, 02_Data, 05_Charts) under #
+#           project root, so scripts can be run from any dir            #
+#       + project root is PFE_ROOT if set; otherwise the dir above      #
+#           04_Scripts if it holds 03_Info, else current dir            #
+#       + each dir can be set separately with PFE_INFO_DIR,             #
+#           PFE_DATA_DIR & PFE_CHART_DIR (set by pfe_cli.py options)    #
+# - Channel store (processed data of every test, channel_store.py) is   #
+#       derived output, so it is kept in chart dir, not data dir        #
+# - Paths end with '/' so they can be joined like '../03_Info/' was     #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_root_dir():
+    # Project root dir (holds 02_Data, 03_Info & 05_Charts)
+    if os.environ.get('PFE_ROOT'):
+        return(os.environ['PFE_ROOT'])
+    script_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if os.path.isdir(os.path.join(script_root, '03_Info')):
+        return(script_root)
+    return(os.getcwd())
+
+def get_dir(env_var, default_name):
+    # Dir from environment variable or default dir under project root
+    path = os.environ.get(env_var) or os.path.join(get_root_dir(), default_name)
+    return(os.path.join(path, ''))
+
+info_dir = get_dir('PFE_INFO_DIR', '03_Info')
+data_dir = get_dir('PFE_DATA_DIR', '02_Data')
+chart_dir = get_dir('PFE_CHART_DIR', '05_Charts')
+store_dir = f'{chart_dir}Channel_Store/'
@@ -0,0 +1,374 @@
+# pxi_config.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Builds PXI DAQ config files from a hardware model & channel lists   #
+#       (used by create_channel_config_file_pxi.py)                     #
+# - Hardware model is two tables in 03_Info:                            #
+#       + pxi_devices.csv: one row per module (System, Slot, Bus_Type,  #
+#           Serial_Num, Product_Num, Product_Type, Chassis)             #
+#       + pxi_panels.csv: one row per terminal panel (Panel, System,    #
+#           Slot, Type, Inputs, Terminal_Config, Voltage_Inputs)        #
+#           > Inputs: device channels wired to panel channels 0, 1, ... #
+#               as ranges separated by '|' (e.g. 16-23|32-39)           #
+#           > Voltage_Inputs: panel channels of a Temperature panel     #
+#               wired for voltage (TC-2095 heat flux inputs)            #
+#       + panel numbers are unique across all systems (chassis)         #
+# - Channel lists are checked against model before files are written:  #
+#       duplicate channels, panels/channels not in model, sensor type   #
+#       on wrong kind of input & voltage range outside module range    #
+# - Existing .chcfg & NI MAX .txt files (e.g. NI MAX exports) can be    #
+#       read back into tables & compared with generated files           #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+# Sensor types measured on 0-5 V (-1 to 6 V range) inputs
+zero_to_five_types = ['Percent', 'Pressure', 'Velocity', 'Oxygen', 'Carbon Monoxide', 'Carbon Dioxide']
+
+# Sensor types with high alarm only
+high_only_types = ['Oxygen', 'Carbon_Monoxide', 'Carbon_Dioxide']
+
+# Voltage input range of each module type [min, max] (V)
+module_V_ranges = {'PXIe-4353': [-0.08, 0.08],
+                   'PXIe-6365': [-10, 10]}
+
+# Input type of panel channel ('Temperature' panels can have voltage inputs)
+panel_types = ['Temperature', 'Voltage']
+terminal_configs = ['RSE', 'NRSE', 'Differential', 'Pseudodifferential']
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+# Get headers for NI Max config file based on channel type
+def get_DAQmxChannel_headers(ch_type):
+    if ch_type == 'Temperature':
+        return(['[DAQmxChannel]', 'AI.AutoZeroMode', 'AI.Max', 'AI.MeasType', 'AI.Min',
+                'AI.OpenThrmcplDetectEnable', 'AI.Temp.Units', 'AI.Thrmcpl.CJCChan', 'AI.Thrmcpl.CJCSrc',
+                'AI.Thrmcpl.CJCVal', 'AI.Thrmcpl.Type', 'ChanType', 'Descr', 'PhysicalChanName', ''])
+
+    elif ch_type == 'Voltage':
+        return(['[DAQmxChannel]', 'AI.AutoZeroMode', 'AI.Max', 'AI.MeasType', 'AI.Min', 'AI.OpenThrmcplDetectEnable', 'AI.TermCfg',
+                'AI.Voltage.Units', 'ChanType', 'Descr', 'PhysicalChanName', ''])
+
+def get_V_range(data_type):
+    if data_type == 'Heat_Flux' or data_type == 'Heat Flux':
+        return([-0.08, 0.08])
+    elif data_type in zero_to_five_types:
+        return([-1, 6])
+    elif data_type.startswith('Wind'):
+        return([0, 10])
+    else:
+        return([-10, 10])
+
+# Function to get alarm ranges and units for different channel types
+def get_channel_vars(ch_type):
+    if ch_type == 'Temperature':
+        function = '"Thermocouple (K)"'
+        units = '"C"'
+        low_alarm_str = '"-17.777800"'
+        high_alarm_str = '"1230.00000"'
+        min_value_str = '"-245.729755"'
+        max_value_str = '"1232.065825"'
+    elif ch_type == 'Heat_Flux':
+        function = '"Voltage"'
+        units = '"V"'
+        low_alarm_str = '"-0.079000"'
+        high_alarm_str = '"0.079000"'
+        min_value_str = '"-0.080000"'
+        max_value_str = '"0.080000"'
+    elif ch_type in zero_to_five_types:
+        function = '"Voltage"'
+        units = '"V"'
+        low_alarm_str = '"-0.099000"'
+        high_alarm_str = '"4.999000"'
+        min_value_str = '"-1.00000"'
+        max_value_str = '"6.00000"'
+    elif ch_type.startswith('Wind'):
+        function = '"Voltage"'
+        units = '"V"'
+        low_alarm_str = '"1.999000"'
+        high_alarm_str = '"9.999000"'
+        min_value_str = '"0.00000"'
+        max_value_str = '"10.00000"'
+    else:
+        function = '"Voltage"'
+        units = '"V"'
+        low_alarm_str = '"-9.9990000"'
+        high_alarm_str = '"9.999000"'
+        min_value_str = '"-10.000000"'
+        max_value_str = '"10.000000"'
+
+    return(function, units, low_alarm_str, high_alarm_str, min_value_str, max_value_str)
+
+def parse_inputs(spec):
+    # Expand '0-31' or '16-23|32-39' into list of channel numbers
+    if pd.isna(spec) or str(spec).strip() == '':
+        return([])
+    channels = []
+    for part in str(spec).split('|'):
+        if '-' in part:
+            start, end = part.split('-')
+            channels.extend(range(int(start), int(end) + 1))
+        else:
+            channels.append(int(part))
+    return(channels)
+
+def read_hardware_model(panels_file, devices_file):
+    # Read & check hardware model; returns panels, devices & inputs (see
+    #   expand_inputs) dfs
+    panels = pd.read_csv(panels_file, dtype={'System': str, 'Type': str, 'Inputs': str,
+                                             'Terminal_Config': str, 'Voltage_Inputs': str})
+    devices = pd.read_csv(devices_file, dtype=str)
+    devices['Slot'] = devices['Slot'].astype(int)
+
+    errors = []
+    for i in np.flatnonzero(panels['Panel'].duplicated(keep='first')):
+        errors.append(f"{panels_file}: row {i + 2}: panel {panels.at[i, 'Panel']} is defined more than once")
+    for i in np.flatnonzero(devices.duplicated(['System', 'Slot'], keep='first')):
+        errors.append(f"{devices_file}: row {i + 2}: {devices.at[i, 'System']} slot {devices.at[i, 'Slot']} is defined more than once")
+
+    device_keys = set(zip(devices['System'], devices['Slot']))
+    for i, panel in panels.iterrows():
+        row = f"{panels_file}: row {i + 2} (panel {panel['Panel']})"
+        if (panel['System'], panel['Slot']) not in device_keys:
+            errors.append(f"{row}: no module in {panel['System']} slot {panel['Slot']}")
+        if panel['Type'] not in panel_types:
+            errors.append(f"{row}: type '{panel['Type']}' is not one of {', '.join(panel_types)}")
+        if panel['Type'] == 'Voltage' and panel['Terminal_Config'] not in terminal_configs:
+            errors.append(f"{row}: voltage panel needs Terminal_Config ({', '.join(terminal_configs)})")
+        n_inputs = len(parse_inputs(panel['Inputs']))
+        bad_voltage_inputs = [c for c in parse_inputs(panel['Voltage_Inputs']) if c >= n_inputs]
+        if bad_voltage_inputs:
+            errors.append(f"{row}: voltage inputs {bad_voltage_inputs} are outside panel's {n_inputs} inputs")
+    if errors:
+        raise ValueError('Errors in hardware model:\n    ' + '\n    '.join(errors))
+
+    inputs = expand_inputs(panels)
+    wired_twice = inputs[inputs.duplicated('Physical_Channel', keep=False)]
+    if len(wired_twice) > 0:
+        errors = [f"{c} is wired to panels {', '.join(str(p) for p in g['Panel'])}"
+                  for c, g in wired_twice.groupby('Physical_Channel', sort=False)]
+        raise ValueError('Errors in hardware model:\n    ' + '\n    '.join(errors))
+
+    return(panels, devices, inputs)
+
+def expand_inputs(panels):
+    # Table with one row per panel input (in panel order) of hardware model
+    tables = []
+    for _, panel in panels.iterrows():
+        device_channels = np.array(parse_inputs(panel['Inputs']), dtype=int)
+        panel_channels = np.arange(len(device_channels))
+        voltage_inputs = np.isin(panel_channels, parse_inputs(panel['Voltage_Inputs']))
+
+        if panel['Type'] == 'Temperature':
+            input_type = np.where(voltage_inputs, 'Voltage', 'Temperature')
+            default_type = np.where(voltage_inputs, 'Heat_Flux', 'Temperature')
+            terminal_config = np.where(voltage_inputs, 'Differential', '')
+        else:
+            input_type = default_type = 'Voltage'
+            terminal_config = panel['Terminal_Config']
+
+        tables.append(pd.DataFrame({'Panel': panel['Panel'], 'Panel_Channel': panel_channels,
+            'System': panel['System'], 'Slot': panel['Slot'], 'Device_Channel': device_channels,
+            'Panel_Type': panel['Type'], 'Input_Type': input_type, 'Default_Type': default_type,
+            'Terminal_Config': terminal_config}))
+
+    inputs = pd.concat(tables, ignore_index=True)
+    inputs['Label'] = ('Pan' + inputs['Panel'].map('{:02d}'.format) + 'Ch' + inputs['Panel_Channel'].map('{:02d}'.format))
+    inputs['Physical_Channel'] = (inputs['System'] + 'Slot' + inputs['Slot'].astype(str) + '/ai' + inputs['Device_Channel'].astype(str))
+    return(inputs)
+
+def validate_channel_list(channel_list, inputs, devices, list_name='channel list'):
+    # Check channel list (df as read from csv) against hardware model;
+    #   returns list of errors naming row of channel list
+    errors = []
+    rows = channel_list.reset_index(drop=True)
+    row_names = [f"{list_name}: row {i + 2} ({rows.at[i, 'Channel_Name']})" for i in range(len(rows))]
+
+    for i in np.flatnonzero(rows['Channel_Name'].duplicated(keep='first')):
+        errors.append(f'{row_names[i]}: channel name is used more than once')
+    for i in np.flatnonzero(rows.duplicated(['Panel', 'Channel'], keep='first')):
+        errors.append(f"{row_names[i]}: panel {rows.at[i, 'Panel']} channel {rows.at[i, 'Channel']} is used more than once")
+
+    # Match every channel to its input in one merge
+    product_types = dict(zip(zip(devices['System'], devices['Slot']), devices['Product_Type']))
+    matched = rows.merge(inputs, how='left', left_on=['Panel', 'Channel'], right_on=['Panel', 'Panel_Channel'])
+    panel_sizes = inputs.groupby('Panel').size()
+    for i, row in matched.iterrows():
+        if row['Panel'] not in panel_sizes.index:
+            errors.append(f"{row_names[i]}: panel {row['Panel']} is not in hardware model")
+            continue
+        if pd.isna(row['Panel_Channel']):
+            errors.append(f"{row_names[i]}: channel {row['Channel']} is outside panel {row['Panel']} inputs (0-{panel_sizes[row['Panel']] - 1})")
+            continue
+
+        # Sensor type must match kind of input it is wired to
+        data_type = str(row['Type'])
+        if data_type == 'Temperature' and row['Input_Type'] != 'Temperature':
+            errors.append(f"{row_names[i]}: temperature channel on voltage input {row['Physical_Channel']}")
+            continue
+        if data_type != 'Temperature' and row['Input_Type'] == 'Temperature':
+            errors.append(f"{row_names[i]}: {data_type} channel on thermocouple input {row['Physical_Channel']}")
+            continue
+
+        # Voltage range for sensor type must be within module range
+        module_range = module_V_ranges.get(product_types.get((row['System'], row['Slot'])))
+        if data_type != 'Temperature' and module_range is not None:
+            V_range = get_V_range(data_type)
+            if V_range[0] < module_range[0] or V_range[1] > module_range[1]:
+                errors.append(f"{row_names[i]}: {data_type} range {V_range[0]} to {V_range[1]} V is outside "
+                              f"{row['Physical_Channel']} module range {module_range[0]} to {module_range[1]} V")
+    return(errors)
+
+def get_channel_types(channel_lists):
+    # Series of channel type indexed by (Panel, Channel) from list of channel
+    #   lists; first list with a channel sets its type
+    combined = pd.concat([c[['Panel', 'Channel', 'Type']] for c in channel_lists], ignore_index=True)
+    combined = combined.drop_duplicates(['Panel', 'Channel'], keep='first')
+    return(pd.Series(combined['Type'].values, index=pd.MultiIndex.from_frame(combined[['Panel', 'Channel']])))
+
+def build_nimax_config(system, inputs, devices, channel_types, DAQmx_version):
+    # Lines of NI MAX config (.txt) for one system; voltage ranges of voltage
+    #   inputs are set from channel_types ((Panel, Channel) -> type)
+    system_inputs = inputs[inputs['System'] == system]
+    lines = ['\t'.join(['[DAQmx]', 'MajorVersion', 'MinorVersion', '']),
+             '\t'.join(['', str(DAQmx_version[0]), str(DAQmx_version[1]), ''])]
+
+    # Heat flux (TC-2095) inputs on temperature panels are listed with voltage channels
+    tc_voltage_rows = ['\t'.join([row.Label, 'Every Sample', '0.08', 'Voltage', '-0.08', '1', 'Differential',
+                                  'Volts', 'Analog Input', '', row.Physical_Channel, ''])
+                       for row in system_inputs[(system_inputs['Panel_Type'] == 'Temperature') &
+                                                (system_inputs['Input_Type'] == 'Voltage')].itertuples()]
+
+    # Write section header whenever panel type changes
+    V_ranges = {}
+    last_type = 'None'
+    for panel, panel_inputs in system_inputs.groupby('Panel', sort=False):
+        ch_type = panel_inputs['Panel_Type'].iloc[0]
+        if ch_type != last_type:
+            lines.extend(['', '\t'.join(get_DAQmxChannel_headers(ch_type))])
+            if ch_type == 'Voltage':
+                lines.extend(tc_voltage_rows)
+                tc_voltage_rows = []
+
+        for row in panel_inputs.itertuples():
+            if ch_type == 'Voltage':
+                data_type = str(channel_types.get((row.Panel, row.Panel_Channel), 'Voltage'))
+                if data_type not in V_ranges:
+                    V_ranges[data_type] = get_V_range(data_type)
+                V_range = V_ranges[data_type]
+                lines.append('\t'.join([row.Label, '', f'{V_range[1]}', ch_type, f'{V_range[0]}', '', row.Terminal_Config,
+                                        'Volts', 'Analog Input', '', row.Physical_Channel, '']))
+            elif row.Input_Type == 'Temperature':
+                lines.append('\t'.join([row.Label, 'Every Sample', '1372', f'{ch_type}:Thermocouple', '-200', '1', 'Deg C', '',
+                                        'Built-In', '25', 'K', 'Analog Input', '', row.Physical_Channel, '']))
+        last_type = ch_type
+
+    # Heat flux inputs on a system without voltage panels get their own section
+    if tc_voltage_rows:
+        lines.extend(['', '\t'.join(get_DAQmxChannel_headers('Voltage'))] + tc_voltage_rows)
+
+    # Add DAQmxDevice headers & rows for modules in system
+    lines.extend(['', '\t'.join(['[DAQmxDevice]', 'BusType', 'DevSerialNum', 'ProductNum', 'ProductType', 'PXI.ChassisNum', 'PXI.SlotNum', ''])])
+    for device in devices[devices['System'] == system].itertuples():
+        lines.append('\t'.join([f'{system}Slot{device.Slot}', device.Bus_Type, device.Serial_Num, device.Product_Num,
+                                device.Product_Type, device.Chassis, str(device.Slot), '']))
+    lines.append('')
+    return(lines)
+
+def build_chcfg(inputs, channel_list):
+    # Lines of .chcfg file for channel list (df as read from csv); every input in model is listed,
+    #   inputs without a channel in list are set to not used
+    active = channel_list[['Panel', 'Channel', 'Channel_Name', 'Type']]
+    rows = inputs.merge(active, how='left', left_on=['Panel', 'Panel_Channel'], right_on=['Panel', 'Channel'])
+    is_active = rows['Channel_Name'].notna().values
+    names = np.where(is_active, rows['Channel_Name'], rows['Label'])
+    types = np.where(is_active, rows['Type'], rows['Default_Type'])
+    use = np.where(is_active, 'TRUE', 'FALSE')
+
+    # Channel variables for each type are looked up once
+    channel_vars = {t: get_channel_vars(t) for t in pd.unique(types)}
+
+    lines = ['[Saved Channels IN]', f'Valid Channel Arrray.<size(s)> = "{len(rows)}"']
+    for i, (name, ch_type, use_str, phys_chan, label) in enumerate(zip(names, types, use, rows['Physical_Channel'], rows['Label'])):
+        function, units, low_alarm, high_alarm, min_value, max_value = channel_vars[ch_type]
+        alarm = 'High Only' if ch_type in high_only_types else 'High and Low'
+        line_start = f'Valid Channel Arrray {i}.'
+        lines.extend([f'{line_start}Use? = "{use_str}"',
+                      f'{line_start}Channel Name = "{name}"',
+                      f'{line_start}Channel Function = {function}',
+                      f'{line_start}Units = {units}',
+                      f'{line_start}Physical Channel = "{phys_chan}"',
+                      f'{line_start}DAQmx Global Channel = "\\00\\00\\00\t{label}"',
+                      f'{line_start}Alarm Info.Alarm = "{alarm}"',
+                      f'{line_start}Alarm Info.Low Limit = {low_alarm}',
+                      f'{line_start}Alarm Info.High Limit = {high_alarm}',
+                      f'{line_start}Min = {min_value}',
+                      f'{line_start}Max = {max_value}'])
+    return(lines)
+
+def write_lines(file_loc, lines):
+    with open(file_loc, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def read_chcfg(file_loc):
+    # Read .chcfg file into df with one row per channel array entry & one
+    #   column per field (values without quotes)
+    entries = {}
+    with open(file_loc) as f:
+        for line in f:
+            if not line.startswith('Valid Channel Arrray ') or ' = ' not in line:
+                continue
+            key, value = line.rstrip('\n').split(' = ', 1)
+            index, field = key[len('Valid Channel Arrray '):].split('.', 1)
+            entries.setdefault(int(index), {})[field] = value.strip('"')
+    channels = pd.DataFrame.from_dict(entries, orient='index').sort_index()
+    channels.index.name = 'Array_Index'
+    return(channels)
+
+def read_nimax_config(file_loc):
+    # Read NI MAX config (.txt) into dict of {section: df}; sections with
+    #   the same name (e.g. one [DAQmxChannel] per channel type) are combined
+    sections = {}
+    with open(file_loc, encoding='utf-8-sig') as f:
+        blocks = f.read().replace('\r\n', '\n').split('\n\n')
+    for block in blocks:
+        lines = [l for l in block.split('\n') if l.strip() != '']
+        if not lines:
+            continue
+        header = lines[0].split('\t')
+        name = header[0]
+        rows = [l.split('\t') for l in lines[1:]]
+        table = pd.DataFrame([r[1:len(header)] + [''] * (len(header) - len(r)) for r in rows],
+                             index=[r[0] for r in rows], columns=header[1:])
+        table = table.loc[:, [c for c in table.columns if c != '']]
+        table.index.name = name
+        if name in sections:
+            sections[name] = pd.concat([sections[name], table]).fillna('')
+        else:
+            sections[name] = table
+    return(sections)
+
+def diff_tables(old, new, key_name='Key'):
+    # Compare two tables on index & common columns; returns df of differences
+    #   (missing & extra rows have a Field of '<row>')
+    old = old.fillna('').astype(str)
+    new = new.fillna('').astype(str)
+    differences = []
+    for key in old.index.difference(new.index, sort=False):
+        differences.append([key, '<row>', 'present', 'missing'])
+    for key in new.index.difference(old.index, sort=False):
+        differences.append([key, '<row>', 'missing', 'present'])
+
+    common_rows = old.index.intersection(new.index, sort=False)
+    common_columns = [c for c in old.columns if c in new.columns]
+    old_values = old.loc[common_rows, common_columns]
+    new_values = new.loc[common_rows, common_columns]
+    changed = (old_values.to_numpy(dtype=object) != new_values.to_numpy(dtype=object))
+    for r, c in zip(*np.nonzero(changed)):
+        differences.append([common_rows[r], common_columns[c], old_values.iat[r, c], new_values.iat[r, c]])
+    return(pd.DataFrame(differences, columns=[key_name, 'Field', 'Old', 'New']))
@@ -0,0 +1,221 @@
+# rae_alarms.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Alarm & exposure limit evaluation of MultiRAE sessions (rae_loader) #
+#       for every sensor of every log                                   #
+#       + rolling STEL (15 min) & TWA (8 h) of Avg readings from one    #
+#           cumulative integral per sensor (O(n)): average over window  #
+#           = (I(t) - I(t - window)) / window; time before the first    #
+#           reading counts as zero exposure (full window divides)       #
+#       + instrument limits from the log's sensor table: Low, High &    #
+#           Over alarms against Max readings (Low alarm of O2 against   #
+#           falling Min readings), STEL & TWA alarms against rolling    #
+#           STEL & TWA                                                  #
+#       + agency limits (Exposure_Limits.csv): Ceiling against Max      #
+#           readings, STEL & TWA against rolling STEL & TWA; repeated   #
+#           sensors (e.g. H2S_2) use limits of their gas                #
+# - Readings at or above a limit (at or below for falling alarms)      #
+#       exceed it; each check reports peak, peak-to-limit ratio, time   #
+#       over limit & exceedance intervals (start, end & peak of each    #
+#       run of samples over the limit)                                  #
+# - Calibration age (days from Calibration Time to first reading) of    #
+#       each sensor; warning if older than calibration_days, missing or #
+#       after the log                                                   #
+# - evaluate_rae_logs reads & evaluates each export in its own process  #
+#       (workers); copies of a session (same unit & first reading) are  #
+#       kept once, in file order                                        #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from rae_loader import find_rae_files, read_rae_file
+
+# ---------------------------- #
+# Define Default Alarm Options #
+# ---------------------------- #
+# stel_window/twa_window: rolling average windows (s)
+# calibration_days: calibration age (days) before warning
+default_alarm_options = {'stel_window': 15 * 60., 'twa_window': 8 * 3600., 'calibration_days': 30.}
+
+# Instrument alarms: {alarm column: reading compared}; rolling averages for STEL & TWA
+instrument_alarms = {'Low_Alarm': 'Max', 'High_Alarm': 'Max', 'Over_Alarm': 'Max',
+                     'STEL_Alarm': 'STEL', 'TWA_Alarm': 'TWA'}
+agency_limits = {'Ceiling': 'Max', 'STEL': 'STEL', 'TWA': 'TWA'}
+
+# Sensors with Low alarm on falling readings (compared with Min readings)
+falling_sensors = ['OXY', 'O2']
+
+# Factor converting limits to reading units: {(limit units, reading units): factor}
+unit_factors = {('ppm', 'ppm'): 1., ('ppb', 'ppb'): 1., ('%', '%'): 1., ('ppb', 'ppm'): 1e-3,
+                ('ppm', 'ppb'): 1e3, ('ppm', '%'): 1e-4, ('%', 'ppm'): 1e4}
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def rolling_average(time, values, window):
+    # Average of each column of (time x sensor) values over trailing window
+    #   (s) at every row, from cumulative trapezoidal integral; nan readings
+    #   count as zero
+    if len(time) < 2:
+        return(np.nan_to_num(values) * 0.)
+    values = np.nan_to_num(values)
+    segments = 0.5 * (values[1:] + values[:-1]) * np.diff(time)[:, np.newaxis]
+    integral = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(segments, axis=0)], axis=0)
+
+    # Integral at t - window, linear between rows (zero before first row)
+    t_back = time - window
+    k = np.clip(np.searchsorted(time, t_back, side='right') - 1, 0, len(time) - 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        w = np.clip((t_back - time[k]) / (time[k + 1] - time[k]), 0., 1.)[:, np.newaxis]
+    integral_back = np.where((t_back < time[0])[:, np.newaxis], 0., (1. - w) * integral[k] + w * integral[k + 1])
+    return((integral - integral_back) / window)
+
+def exceedance_runs(exceed):
+    # First & last row of each run of True in each column of (time x sensor)
+    #   exceed; returns arrays of column, first row & last row of each run
+    padded = np.concatenate([np.zeros((1, exceed.shape[1]), dtype=np.int8), exceed.astype(np.int8),
+                             np.zeros((1, exceed.shape[1]), dtype=np.int8)], axis=0)
+    edges = np.diff(padded, axis=0).T
+    columns, first_rows = np.nonzero(edges == 1)
+    last_rows = np.nonzero(edges == -1)[1] - 1
+    return(columns, first_rows, last_rows)
+
+def get_gas(sensor):
+    # Gas of sensor name (suffix of repeated sensors removed, e.g. H2S_2 -> H2S)
+    return(re.sub(r'_\d+$', '', sensor))
+
+def get_checks(log, limits):
+    # Df of limit checks of a log: Sensor, Source (Instrument or agency),
+    #   Limit (alarm or limit name), Value (in sensor units), Reading
+    #   (Max, Min, STEL or TWA) & Falling
+    checks = []
+    for sensor, row in log.sensors.iterrows():
+        gas = get_gas(sensor)
+        for alarm, reading in instrument_alarms.items():
+            value = row.get(alarm, np.nan)
+            if pd.isna(value) or value <= 0:
+                continue
+            falling = gas in falling_sensors and alarm == 'Low_Alarm'
+            checks.append([sensor, 'Instrument', alarm, float(value), 'Min' if falling else reading, falling])
+
+        if limits is None or gas not in limits.index.get_level_values('Sensor'):
+            continue
+        for agency, limit_row in limits.loc[gas].iterrows():
+            factor = unit_factors.get((limit_row['Units'], row['Units']))
+            if factor is None:
+                continue
+            for limit, reading in agency_limits.items():
+                if not pd.isna(limit_row[limit]):
+                    checks.append([sensor, agency, limit, limit_row[limit] * factor, reading, False])
+    return(pd.DataFrame(checks, columns=['Sensor', 'Source', 'Limit', 'Value', 'Reading', 'Falling']))
+
+def sensor_readings(log, measure):
+    # (time x sensor) array of readings of measure (interpolated over gaps);
+    #   Avg readings are used where a log has no measure column
+    readings = log.readings(measure if measure in log.data.columns.get_level_values('Measure') else 'Avg')
+    readings = readings.astype(np.float64).interpolate(limit_area='inside')
+    return(readings.reindex(columns=log.sensors.index).to_numpy())
+
+def calibration_ages(log, calibration_days):
+    # Df of calibration time, age (days at first reading) & warning of each sensor
+    ages = (log.begin - log.sensors['Calibration_Time']).dt.total_seconds() / 86400.
+    warnings = np.where(ages.isna(), 'no calibration time',
+                        np.where(ages < 0, 'calibrated after log start',
+                                 np.where(ages > calibration_days, f'calibration older than {calibration_days:g} days', '')))
+    return(pd.DataFrame({'Calibration_Time': log.sensors['Calibration_Time'], 'Calibration_Age': ages,
+                         'Warning': warnings}, index=log.sensors.index))
+
+def evaluate_log(log, limits=None, options=default_alarm_options):
+    # Rolling STEL & TWA (df indexed by Date/Time), limit checks, exceedance
+    #   intervals & calibration ages of a MultiRAE session (RaeLog)
+    time = log.time()
+    sample_period = log.sample_period if not np.isnan(log.sample_period) else np.median(np.diff(time))
+    avg = sensor_readings(log, 'Avg')
+    values = {'Max': sensor_readings(log, 'Max'), 'Min': sensor_readings(log, 'Min'),
+              'STEL': rolling_average(time, avg, options['stel_window']),
+              'TWA': rolling_average(time, avg, options['twa_window'])}
+    sensors = log.sensors.index.tolist()
+    rolling = pd.DataFrame(np.concatenate([values['STEL'], values['TWA']], axis=1), index=log.data.index,
+                           columns=pd.MultiIndex.from_product([['STEL', 'TWA'], sensors], names=['Average', 'Sensor']))
+
+    # All checks of log at once as (time x check) arrays
+    checks = get_checks(log, limits)
+    if len(checks) == 0:
+        return(rolling, checks, pd.DataFrame(), calibration_ages(log, options['calibration_days']))
+    columns = np.array([sensors.index(s) for s in checks['Sensor']])
+    compared = np.stack([values[r][:, c] for r, c in zip(checks['Reading'], columns)], axis=1)
+    limit = checks['Value'].to_numpy()
+    falling = checks['Falling'].to_numpy()
+    with np.errstate(invalid='ignore'):
+        exceed = np.where(falling, compared <= limit, compared >= limit)
+        peak_rows = np.where(falling, np.argmin(np.where(np.isnan(compared), np.inf, compared), axis=0),
+                             np.argmax(np.where(np.isnan(compared), -np.inf, compared), axis=0))
+    peak = compared[peak_rows, np.arange(len(checks))]
+
+    checks['Peak'] = peak
+    checks['Peak_Time'] = log.data.index[peak_rows]
+    checks['Peak_Ratio'] = peak / limit
+    checks['Time_Over'] = exceed.sum(axis=0) * sample_period / 60.
+
+    # Exceedance intervals (start & end of each run over the limit)
+    run_checks, first_rows, last_rows = exceedance_runs(exceed)
+    run_peaks = [np.nanmin(compared[f:l + 1, c]) if falling[c] else np.nanmax(compared[f:l + 1, c])
+                 for c, f, l in zip(run_checks, first_rows, last_rows)]
+    intervals = checks.loc[run_checks, ['Sensor', 'Source', 'Limit', 'Value', 'Reading']].reset_index(drop=True)
+    intervals['Start'] = log.data.index[first_rows]
+    intervals['End'] = log.data.index[last_rows]
+    intervals['Duration'] = (time[last_rows] - time[first_rows] + sample_period) / 60.
+    intervals['Peak'] = run_peaks
+    checks['Exceedances'] = np.bincount(run_checks, minlength=len(checks))
+    first_checks, first_runs = np.unique(run_checks, return_index=True)
+    checks['First_Exceedance'] = pd.Series(intervals['Start'].to_numpy()[first_runs], index=first_checks).reindex(checks.index)
+    return(rolling, checks.drop(columns='Falling'), intervals, calibration_ages(log, options['calibration_days']))
+
+def evaluate_rae_file(name, file_loc, limits=None, options=default_alarm_options):
+    # Read & evaluate every session of an export (run in worker processes);
+    #   returns list of (unit & first reading, log name, begin, unit, results)
+    results = []
+    for log in read_rae_file(file_loc, name):
+        unit = log.info.get('Unit SN', '')
+        results.append(((unit, log.begin), log.name, log.begin, unit, evaluate_log(log, limits, options)))
+    return(results)
+
+def evaluate_rae_logs(rae_dir, limits=None, options=default_alarm_options, workers=None, skip_dirs=['OLDignore']):
+    # Evaluate every session under rae_dir with workers processes (None: one
+    #   per CPU, 1: in this process); returns dict of rolling averages of each
+    #   log & tables of checks, exceedance intervals & calibration ages of
+    #   all logs (with Log, Begin & Unit_SN columns)
+    files = find_rae_files(rae_dir, skip_dirs)
+    if workers == 1:
+        file_results = [evaluate_rae_file(n, f, limits, options) for n, f in files.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(evaluate_rae_file, n, f, limits, options) for n, f in files.items()]
+            file_results = [future.result() for future in futures]
+
+    rolling, tables, seen = {}, {'checks': [], 'intervals': [], 'calibration': []}, set()
+    all_results = [r for results in file_results for r in results]
+    for key, name, begin, unit, (log_rolling, checks, intervals, calibration) in all_results:
+        if key in seen:
+            continue
+        seen.add(key)
+        rolling[name] = log_rolling
+        for table_name, table in [('checks', checks), ('intervals', intervals), ('calibration', calibration.reset_index())]:
+            if len(table) > 0:
+                tables[table_name].append(table.assign(Log=name, Begin=begin, Unit_SN=unit))
+
+    index_columns = {'checks': ['Log', 'Sensor', 'Source', 'Limit'], 'intervals': ['Log', 'Sensor', 'Source', 'Limit'],
+                     'calibration': ['Log', 'Sensor']}
+    for table_name, parts in tables.items():
+        if parts:
+            table = pd.concat(parts, ignore_index=True)
+            tables[table_name] = table.set_index(index_columns[table_name])
+        else:
+            tables[table_name] = pd.DataFrame()
+    return(rolling, tables['checks'], tables['intervals'], tables['calibration'])
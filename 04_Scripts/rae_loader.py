@@ -0,0 +1,208 @@
+# rae_loader.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Reads MultiRAE datalog exports (02_Data/RAE/<date>_Burn_<n>/...)    #
+#       + text exports (.txt/.csv, UTF-16) & Excel copies (.xlsx) have  #
+#           the same rows: Summary (unit, Begin, Sample Period, ...),   #
+#           sensor table (alarm limits, Calibration Time, ...),         #
+#           Datalog (Min/Avg/Max/Real of each sensor) & on some units   #
+#           TWA/STEL (instrument's own running TWA & STEL)              #
+#       + a file can hold several logging sessions; sessions without    #
+#           data ('Data has not been downloaded.') are skipped          #
+#       + '---' readings (sensor warming up/off) are nan                #
+#       + repeated sensor names get a suffix (e.g. H2S, H2S_2)          #
+# - find_rae_logs loads every session under RAE dir once: text export   #
+#       is used if a file was also saved as .xlsx, & copies of the same #
+#       session (same unit & Begin) are dropped                         #
+# - Logs are named <burn>/<day dir>/<file name> (e.g.                   #
+#       Burn_05/1 Day Post/10_OCT_Burn_05_RAE_1Day_AM)                  #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import re
+import datetime
+import numpy as np
+import pandas as pd
+
+# Sensor table rows kept for each sensor (row name: column name)
+sensor_rows = {'Sensor SN': 'Sensor_SN', 'Span': 'Span', 'Low Alarm': 'Low_Alarm', 'High Alarm': 'High_Alarm',
+               'Over Alarm': 'Over_Alarm', 'STEL Alarm': 'STEL_Alarm', 'TWA Alarm': 'TWA_Alarm',
+               'Calibration Time': 'Calibration_Time'}
+alarm_columns = ['Span', 'Low_Alarm', 'High_Alarm', 'Over_Alarm', 'STEL_Alarm', 'TWA_Alarm']
+
+# File types read (text exports are preferred over Excel copies)
+rae_extensions = ['.txt', '.csv', '.xlsx']
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def read_rows(file_loc):
+    # Rows of cells of text (UTF-16, tab separated) or Excel export
+    if file_loc.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_loc, read_only=True, data_only=True)
+        rows = [list(row) for row in workbook.worksheets[0].iter_rows(values_only=True)]
+        workbook.close()
+        return(rows)
+    with open(file_loc, encoding='utf-16') as f:
+        return([line.rstrip('\r\n').split('\t') for line in f])
+
+def cell_text(cell):
+    if cell is None:
+        return('')
+    return(str(cell).replace('\ufeff', '').strip())
+
+def to_datetimes(cells):
+    # Datetimes from Excel cells or text such as '10/21/2020 12:21:37' (parsed
+    #   at once; text without seconds, e.g. Calibration Time, is also read)
+    if all([isinstance(c, datetime.datetime) for c in cells]):
+        return(pd.DatetimeIndex(cells))
+    text = [cell_text(c) for c in cells]
+    times = pd.to_datetime(text, format='%m/%d/%Y %H:%M:%S', errors='coerce')
+    if times.isna().any():
+        times = times.where(~times.isna(), pd.to_datetime(text, format='%m/%d/%Y %H:%M', errors='coerce'))
+    return(pd.DatetimeIndex(times))
+
+def sensor_names(cells):
+    # Sensor names & units from cells such as 'CO(ppm)'; repeated names get a suffix
+    names, units = [], []
+    for cell in cells:
+        match = re.match(r'([^(]+)\(([^)]*)\)', cell)
+        name, unit = (match.group(1).strip(), match.group(2)) if match else (cell, '')
+        count = sum([n == name or n.startswith(f'{name}_') for n in names])
+        names.append(name if count == 0 else f'{name}_{count + 1}')
+        units.append(unit)
+    return(names, units)
+
+def read_table(rows, i, names):
+    # Data table starting at row i (after 2 header rows); returns df indexed
+    #   by Date/Time with (sensor, measure) columns & row after table
+    measures = [cell_text(c).strip('()') for c in rows[i + 1][2:]]
+    n_measures = len([m for m in measures if m]) // len(names)
+    j = i + 2
+    while j < len(rows) and re.fullmatch(r'\d+', cell_text(rows[j][0]) if rows[j] else ''):
+        j += 1
+    block = [row[1:2 + n_measures * len(names)] for row in rows[i + 2:j]]
+    columns = pd.MultiIndex.from_tuples([(names[k // n_measures], measures[k]) for k in range(n_measures * len(names))],
+                                        names=['Sensor', 'Measure'])
+    table = pd.DataFrame([row[1:] for row in block], columns=columns)
+    table = table.apply(lambda c: pd.to_numeric(c, errors='coerce'))
+    table.index = to_datetimes([row[0] for row in block]).rename('Date/Time')
+    return(table, j)
+
+class RaeLog:
+    # One logging session of a MultiRAE: info (Summary values), sensors
+    #   (table indexed by sensor), data (Datalog readings) & twa_stel
+    #   (instrument TWA/STEL, None if not logged)
+    def __init__(self, name, file_loc, info, sensors, data, twa_stel=None):
+        self.name = name
+        self.file_loc = file_loc
+        self.info = info
+        self.sensors = sensors
+        self.data = data
+        self.twa_stel = twa_stel
+
+    @property
+    def begin(self):
+        return(self.data.index[0])
+
+    @property
+    def sample_period(self):
+        return(float(self.info.get('Sample Period(s)', np.nan)))
+
+    def time(self):
+        # Seconds from first reading
+        return((self.data.index - self.begin).total_seconds().to_numpy())
+
+    def readings(self, measure='Avg'):
+        # Readings of every sensor (one column per sensor) for measure (Min, Avg, Max or Real)
+        return(self.data.xs(measure, axis=1, level='Measure'))
+
+def parse_rae_rows(rows, name, file_loc):
+    # Split rows of an export into sessions & parse each one
+    starts = [i for i, row in enumerate(rows) if row and cell_text(row[0]).startswith('=====')]
+    logs = []
+    for k, start in enumerate(starts):
+        end = starts[k + 1] if k + 1 < len(starts) else len(rows)
+        info, sensors, data, twa_stel = {}, None, None, None
+        i = start + 1
+        while i < end:
+            row = rows[i]
+            key = cell_text(row[0]) if row else ''
+            if key == 'Sensor':
+                names, units = sensor_names([cell_text(c) for c in row[1:] if cell_text(c)])
+                sensors = pd.DataFrame({'Units': units}, index=pd.Index(names, name='Sensor'))
+            elif key in sensor_rows and sensors is not None:
+                values = list(row[1:1 + len(sensors)])
+                sensors[sensor_rows[key]] = values + [None] * (len(sensors) - len(values))
+            elif key in ['Datalog', 'TWA/STEL'] and sensors is not None and i + 3 < end:
+                table, i = read_table(rows, i + 1, sensors.index.tolist())
+                if key == 'Datalog':
+                    data = table
+                else:
+                    twa_stel = table
+                continue
+            elif len(row) > 1 and key and sensors is None:
+                info[key] = cell_text(row[1])
+            i += 1
+
+        if data is None or len(data) == 0:
+            continue
+        for column in alarm_columns:
+            sensors[column] = pd.to_numeric(sensors[column].map(cell_text), errors='coerce')
+        sensors['Calibration_Time'] = to_datetimes(sensors['Calibration_Time'].tolist())
+        logs.append(RaeLog(name, file_loc, info, sensors, data, twa_stel))
+
+    # Sessions of one file are numbered
+    if len(logs) > 1:
+        for k, log in enumerate(logs):
+            log.name = f'{name}_{k + 1}'
+    return(logs)
+
+def read_rae_file(file_loc, name=None):
+    # Sessions (RaeLog) in one export file
+    if name is None:
+        name = os.path.basename(file_loc).split('.')[0]
+    return(parse_rae_rows(read_rows(file_loc), name, file_loc))
+
+def get_burn_name(dir_name):
+    # 'Burn_05' from dir such as '09OCT2020_Burn_05'; dir name if no burn number
+    match = re.search(r'Burn_?(\d+)', dir_name, re.IGNORECASE)
+    return(f'Burn_{int(match.group(1)):02d}' if match else dir_name)
+
+def find_rae_files(rae_dir, skip_dirs=['OLDignore'], extensions=rae_extensions):
+    # Log name & file of every export under rae_dir (one file per name;
+    #   text export is used if the file was also saved as .xlsx); also used
+    #   for TrakPro exports (trakpro_loader.py)
+    files = {}
+    for root, dirs, file_names in os.walk(rae_dir):
+        dirs[:] = sorted([d for d in dirs if d not in skip_dirs])
+        rel_dir = os.path.relpath(root, rae_dir)
+        if rel_dir == '.':
+            continue
+        parts = rel_dir.split(os.sep)
+        for file_name in sorted(file_names):
+            stem, extension = file_name.split('.')[0], os.path.splitext(file_name)[1].lower()
+            if extension not in extensions or file_name.startswith('~$'):
+                continue
+            name = '/'.join([get_burn_name(parts[0])] + parts[1:] + [stem])
+            rank = extensions.index(extension)
+            if name not in files or rank < files[name][0]:
+                files[name] = (rank, os.path.join(root, file_name))
+    return({name: file_loc for name, (rank, file_loc) in sorted(files.items())})
+
+def find_rae_logs(rae_dir, skip_dirs=['OLDignore']):
+    # Every logging session under rae_dir; copies of the same session (same
+    #   unit & first reading) are loaded once
+    logs, seen = [], set()
+    for name, file_loc in find_rae_files(rae_dir, skip_dirs).items():
+        for log in read_rae_file(file_loc, name):
+            key = (log.info.get('Unit SN'), log.begin)
+            if key in seen:
+                continue
+            seen.add(key)
+            logs.append(log)
+    return(logs)
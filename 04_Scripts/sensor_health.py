@@ -0,0 +1,138 @@
+# sensor_health.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Sensor health screening of raw DAQ data (before scale & offset) for #
+#       every channel of a test at once, using the alarm limits & valid #
+#       ranges of each sensor type from pxi_config.py (same values the  #
+#       DAQ config files are built with)                                #
+#       + out of range: samples outside type's range or on its rails    #
+#           (open thermocouples, clipped voltages, DAQ glitches)        #
+#       + alarm: in-range samples outside type's alarm limits           #
+#       + flat: longest time a channel holds exactly the same value     #
+#       + noise: baseline std compared to median baseline std of all    #
+#           channels of same type                                       #
+# - Flags: missing (no valid samples), open/railed (most samples out of #
+#       range), clipped, alarm, flat & noisy; channels with a flag in   #
+#       drop_flags are not plotted                                      #
+# - Out-of-range samples are masked (set to nan) before baselines &     #
+#       converted data are computed (exp_processing.py)                 #
+# - Report is saved as Sensor_Health.csv with the test's other tables   #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+from pxi_config import get_V_range, get_channel_vars
+
+# ----------------------------- #
+# Define Default Health Options #
+# ----------------------------- #
+# clip_fraction/alarm_fraction: fraction of samples out of range/in alarm to flag channel
+# dead_fraction: fraction of samples out of range for open thermocouple or railed voltage
+# rail_tolerance: distance from range limit counted as on the rail (fraction of range)
+# flat_time: longest time (s) with unchanged value before channel is flat
+# noise_factor: baseline std over median baseline std of type before channel is noisy
+#   (only for types with at least noise_min_channels channels)
+default_health_limits = {'clip_fraction': 0.01, 'alarm_fraction': 0.01, 'dead_fraction': 0.5,
+                         'rail_tolerance': 0.001, 'flat_time': 60., 'noise_factor': 20.,
+                         'noise_min_channels': 3}
+
+# Flags of channels skipped by charts
+drop_flags = ['missing', 'open', 'railed', 'flat']
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_type_limits(data_type):
+    # [range min, range max, low alarm, high alarm] of raw DAQ values for sensor
+    #   type; voltage ranges from get_V_range, thermocouple range & alarms from
+    #   get_channel_vars
+    function, units, low_alarm, high_alarm, min_value, max_value = get_channel_vars(data_type)
+    if data_type != 'Temperature':
+        min_value, max_value = get_V_range(data_type)
+    return([float(str(v).strip('"')) for v in [min_value, max_value, low_alarm, high_alarm]])
+
+def longest_flat_runs(time, values):
+    # Longest time each column of values holds exactly the same value (nan
+    #   ends a run); time in every run is summed from a running total that
+    #   restarts at each change
+    same = values[1:] == values[:-1]
+    held_time = np.cumsum(np.where(same, np.diff(time)[:, np.newaxis], 0.), axis=0)
+    run_start = np.maximum.accumulate(np.where(same, 0., held_time), axis=0)
+    return(np.max(held_time - run_start, axis=0, initial=0.))
+
+def screen_channels(exp_data, channels, data_channels, baseline_window, limits=default_health_limits):
+    # Screen raw data of data_channels (exp_data indexed by time relative to
+    #   ignition; channels: ChannelConfig); returns report (one row per
+    #   channel) & mask of out-of-range samples (time x channel)
+    time = exp_data.index.values.astype(np.float64)
+    values = exp_data[data_channels].to_numpy(dtype=np.float64)
+    types = [channels.channel_type(c) for c in data_channels]
+
+    # Limits of each channel's type as rows of (channel x 4) array
+    type_limits = {t: get_type_limits(t) for t in set(types)}
+    range_min, range_max, alarm_low, alarm_high = np.array([type_limits[t] for t in types]).T
+    rail = limits['rail_tolerance'] * (range_max - range_min)
+
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        out_of_range = valid & ((values <= range_min + rail) | (values >= range_max - rail))
+        in_alarm = valid & ~out_of_range & ((values < alarm_low) | (values > alarm_high))
+
+    # Fractions of valid samples; flat runs & baseline noise use in-range samples only
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out_of_range_fraction = out_of_range.sum(axis=0) / count
+        alarm_fraction = in_alarm.sum(axis=0) / count
+    in_range = np.where(out_of_range, np.nan, values)
+    flat_time = longest_flat_runs(time, in_range)
+
+    in_window = (time >= baseline_window[0]) & (time < baseline_window[1])
+    window_values = in_range[in_window]
+    window_count = (~np.isnan(window_values)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        window_mean = np.nansum(window_values, axis=0) / window_count
+        baseline_std = np.sqrt(np.nansum((window_values - window_mean)**2, axis=0) / window_count)
+
+    report = pd.DataFrame({'Type': types,
+                           'Chart': [channels.chart(c) for c in data_channels],
+                           'Range_Min': range_min, 'Range_Max': range_max,
+                           'Alarm_Low': alarm_low, 'Alarm_High': alarm_high,
+                           'Count': count,
+                           'Out_of_Range': out_of_range.sum(axis=0),
+                           'Out_of_Range_Fraction': out_of_range_fraction,
+                           'Alarm_Fraction': alarm_fraction,
+                           'Longest_Flat': flat_time,
+                           'Baseline_Std': baseline_std},
+                          index=pd.Index(data_channels, name='Channel'))
+
+    # Median baseline std of each type (types with too few channels are not compared)
+    by_type = report.groupby('Type')['Baseline_Std']
+    type_std = by_type.transform('median').where(by_type.transform('count') >= limits['noise_min_channels'])
+    report['Type_Baseline_Std'] = type_std
+
+    # Flags of each channel
+    is_temperature = report['Type'] == 'Temperature'
+    dead = report['Out_of_Range_Fraction'] >= limits['dead_fraction']
+    flags = pd.DataFrame({'missing': report['Count'] == 0,
+                          'open': dead & is_temperature,
+                          'railed': dead & ~is_temperature,
+                          'clipped': ~dead & (report['Out_of_Range_Fraction'] >= limits['clip_fraction']),
+                          'alarm': report['Alarm_Fraction'] >= limits['alarm_fraction'],
+                          'flat': report['Longest_Flat'] >= limits['flat_time'],
+                          'noisy': report['Baseline_Std'] > limits['noise_factor'] * type_std})
+    report['Flags'] = ['|'.join(flags.columns[row]) or 'OK' for row in flags.to_numpy()]
+    report['Plotted'] = ~flags[drop_flags].any(axis=1)
+    return(report, out_of_range)
+
+def print_health_summary(report):
+    # Print flagged channels & count of masked samples
+    flagged = report[report['Flags'] != 'OK']
+    print(f'    Sensor health: {len(flagged)} of {len(report)} channels flagged, '
+          f'{int(report["Out_of_Range"].sum())} out-of-range samples masked')
+    for channel, row in flagged.iterrows():
+        skipped = '' if row['Plotted'] else ' (not plotted)'
+        print(f'        {channel}: {row["Flags"]}{skipped}')
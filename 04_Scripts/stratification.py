@@ -0,0 +1,159 @@
+# stratification.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Hot layer interface height & upper/lower layer temperatures for     #
+#       every thermocouple tree of a test, computed for all time steps  #
+#       at once on the (time x height) array of each tree               #
+#       + trees: Temperature channels of a chart group with heights in  #
+#           their labels (e.g. '7ft 11in Above Floor'); groups with     #
+#           fewer than min_tcs heights are skipped                      #
+#       + profile runs from floor (lowest TC extended to 0) to ceiling  #
+#           (top TC, or height in ceiling_heights for tree's group)     #
+# - Interface height methods:                                           #
+#       + 'integral': integral ratio method (He et al., 1998) from      #
+#           integrals of T & 1/T (K) over the profile & lowest TC       #
+#       + 'n_percent': height where profile, coming down from ceiling,  #
+#           falls below T_amb + N% of (T_max - T_amb); T_amb is tree's  #
+#           baseline mean                                               #
+#       + while spread of tree temperatures is below min_rise (deg C)   #
+#           there is no layer & interface is at ceiling                 #
+# - Upper/lower layer temperatures are means of the profile above &     #
+#       below the interface                                             #
+# - Derived channels (ProcessedExp.add_layer_channels):                 #
+#       <tree>_Layer_Height (m) in chart group Layer_Height &           #
+#       <tree>_Upper_Temp, <tree>_Lower_Temp (deg C) in                 #
+#       Layer_Temperature; tree name is chart group without             #
+#       '_Temperature' (e.g. Side_A)                                    #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import numpy as np
+import pandas as pd
+
+from daq_loader import scale_channels
+from bdp_flow import label_to_height
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_tc_trees(channel_list, channels=None, min_tcs=3):
+    # Return df indexed by TC channel with tree name & height (m); TCs sorted
+    #   by tree & height, trees with fewer than min_tcs heights are dropped
+    tc_list = channel_list[channel_list['Type'] == 'Temperature']
+    if channels is not None:
+        tc_list = tc_list[tc_list.index.isin(channels)]
+
+    trees = pd.DataFrame({'Tree': [c[:-len('_Temperature')] if c.endswith('_Temperature') else c
+                                   for c in tc_list['Chart'].values],
+                          'Height': [label_to_height(l) for l in tc_list['Label'].values]},
+                         index=pd.Index(tc_list.index.values, name='Channel'))
+    trees = trees.dropna(subset=['Height'])
+    trees = trees[trees.groupby('Tree')['Height'].transform('nunique') >= min_tcs]
+
+    return(trees.sort_values(['Tree', 'Height']))
+
+def extend_profile(temperature, heights, ceiling):
+    # Add floor (z = 0) & ceiling points to (time x height) profile; values
+    #   at lowest/highest TC are extended to them
+    z = heights
+    if z[0] > 0:
+        z = np.concatenate([[0.], z])
+        temperature = np.concatenate([temperature[:, :1], temperature], axis=1)
+    if ceiling > z[-1]:
+        z = np.concatenate([z, [ceiling]])
+        temperature = np.concatenate([temperature, temperature[:, -1:]], axis=1)
+    return(temperature, z)
+
+def cumulative_integral(values, z):
+    # Trapezoidal integral of each row of (time x height) values from floor to each height
+    segments = 0.5 * (values[:, 1:] + values[:, :-1]) * np.diff(z)
+    return(np.concatenate([np.zeros((len(values), 1)), np.cumsum(segments, axis=1)], axis=1))
+
+def integral_below(values, z, cum_integral, height):
+    # Integral of each row from floor to height (one height per row), with
+    #   profile linear between points
+    k = np.searchsorted(z, np.nan_to_num(height), side='right') - 1
+    k = np.clip(k, 0, len(z) - 2)[:, np.newaxis]
+    z0, z1 = z[k[:, 0]], z[k[:, 0] + 1]
+    v0 = np.take_along_axis(values, k, axis=1)[:, 0]
+    v1 = np.take_along_axis(values, k + 1, axis=1)[:, 0]
+    v_height = v0 + (v1 - v0) * (height - z0) / (z1 - z0)
+    return(np.take_along_axis(cum_integral, k, axis=1)[:, 0] + 0.5 * (v0 + v_height) * (height - z0))
+
+def integral_ratio_height(temperature, z):
+    # Interface height of each row by integral ratio method (temperature in deg C)
+    T = temperature + 273.15
+    H = z[-1]
+    I1 = cumulative_integral(T, z)[:, -1]
+    I2 = cumulative_integral(1. / T, z)[:, -1]
+    T_l = T[:, 0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        height = T_l * (I1 * I2 - H**2) / (I1 + I2 * T_l**2 - 2 * T_l * H)
+    return(np.clip(height, 0., H))
+
+def n_percent_height(temperature, z, t_amb, n_percent=20.):
+    # Interface height of each row: highest point (coming down from ceiling)
+    #   where profile falls below t_amb + n_percent of rise of hottest point
+    t_n = t_amb + n_percent / 100. * (np.max(temperature, axis=1) - t_amb)
+    above = temperature >= t_n[:, np.newaxis]
+
+    # Last point below t_n; layer reaches floor if every point is above
+    n = len(z)
+    j = n - 1 - np.argmax(~above[:, ::-1], axis=1)
+    j_safe = np.minimum(j, n - 2)[:, np.newaxis]
+    T0 = np.take_along_axis(temperature, j_safe, axis=1)[:, 0]
+    T1 = np.take_along_axis(temperature, j_safe + 1, axis=1)[:, 0]
+    z0, z1 = z[j_safe[:, 0]], z[j_safe[:, 0] + 1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        height = z0 + (t_n - T0) / (T1 - T0) * (z1 - z0)
+    height = np.where(j == n - 1, z[-1], height)
+    height = np.where(np.all(above, axis=1), 0., height)
+    return(np.clip(height, 0., z[-1]))
+
+def compute_layers(exp_data, channel_list, trees, baselines, method='integral', n_percent=20.,
+                   ceiling_heights={}, min_rise=10.):
+    # Layer height (m) & upper/lower layer temperatures (deg C) for each tree;
+    #   returns df of derived channels (indexed by time) & table of their
+    #   Label, Type & Chart
+    if method not in ['integral', 'n_percent']:
+        raise ValueError(f"Unknown layer method '{method}' (use 'integral' or 'n_percent')")
+
+    # Gaps in TC data (e.g. masked samples) are interpolated in time
+    temperatures = pd.DataFrame(scale_channels(exp_data, channel_list, trees.index.tolist()),
+                                index=exp_data.index, columns=trees.index)
+    temperatures = temperatures.interpolate(method='index', limit_area='inside')
+
+    layers, info = {}, []
+    for tree, tree_tcs in trees.groupby('Tree', sort=False):
+        heights = tree_tcs['Height'].to_numpy()
+        ceiling = ceiling_heights.get(f'{tree}_Temperature', ceiling_heights.get(tree, heights[-1]))
+        T, z = extend_profile(temperatures[tree_tcs.index].to_numpy(dtype=np.float64), heights, ceiling)
+
+        if method == 'integral':
+            height = integral_ratio_height(T, z)
+        else:
+            t_amb = np.nanmean(baselines.loc[tree_tcs.index, 'Mean'].to_numpy())
+            height = n_percent_height(T, z, t_amb, n_percent)
+
+        # No layer until tree is stratified; no result where any TC has no data
+        height = np.where(np.ptp(T, axis=1) < min_rise, z[-1], height)
+        height = np.where(np.any(np.isnan(T), axis=1), np.nan, height)
+
+        cum_integral = cumulative_integral(T, z)
+        below = integral_below(T, z, cum_integral, height)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            upper = np.where(z[-1] - height > 0, (cum_integral[:, -1] - below) / (z[-1] - height), T[:, -1])
+            lower = np.where(height > 0, below / height, T[:, 0])
+
+        tree_label = tree.replace('_', ' ')
+        layers[f'{tree}_Layer_Height'] = height
+        layers[f'{tree}_Upper_Temp'] = upper
+        layers[f'{tree}_Lower_Temp'] = lower
+        info += [[f'{tree}_Layer_Height', tree_label, 'Layer_Height', 'Layer_Height'],
+                 [f'{tree}_Upper_Temp', f'{tree_label} Upper Layer', 'Temperature', 'Layer_Temperature'],
+                 [f'{tree}_Lower_Temp', f'{tree_label} Lower Layer', 'Temperature', 'Layer_Temperature']]
+
+    info = pd.DataFrame(info, columns=['Channel', 'Label', 'Type', 'Chart']).set_index('Channel')
+    return(pd.DataFrame(layers, index=exp_data.index), info)
@@ -0,0 +1,66 @@
+# summarize_tests.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Summary metrics (summary_metrics.py) for DAQ tests without plotting #
+#       + 05_Charts/<test>/summary.csv (& .parquet) for each test       #
+#       + 05_Charts/<test>/Sensor_Health.csv if screen_sensors is set   #
+#       + 05_Charts/summary_all.csv (& .parquet): all tests in one      #
+#           table with a Test column                                    #
+# - Thresholds & event windows are set below; plot.py writes the same  #
+#       per-test summary with its own settings                          #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import pandas as pd
+
+from project_paths import info_dir, data_dir, chart_dir
+from exp_processing import ProcessedExp
+from exp_config import read_exp_info
+from summary_metrics import save_table
+
+# ---------------------------------- #
+# Define Subdirectories & Info Files #
+# ---------------------------------- #
+plot_dir = chart_dir
+
+# Read in & check exp info file & channel lists
+exp_info = read_exp_info(info_dir)
+
+# ---------------------- #
+# Set Summary Parameters #
+# ---------------------- #
+compact_dtypes = True # if true, load channel data as float32
+screen_sensors = True # if true, mask samples outside DAQ range before summary (sensor_health.py)
+summary_start = 0 # start of summary metrics (s, relative to ignition)
+
+# Thresholds for time above: {type or channel: [thresholds]} (deg C, kW/m^2, ...)
+summary_thresholds = {'Temperature': [100, 300, 600], 'Heat_Flux': [2.5, 5, 20]}
+
+# Windows between labeled events for window means: {name: [start event, end event]}
+event_windows = {'Ignition to Suppression': ['Ignition', 'Suppression']}
+
+# ---------------------------------- #
+# Start Code Used to Summarize Tests #
+# ---------------------------------- #
+test_names = [t for t in exp_info.test_names if os.path.exists(f'{data_dir}{t}.csv')]
+
+summaries = []
+for test_name in test_names:
+    test = ProcessedExp(exp_info[test_name], data_dir, compact_dtypes, screen_sensors=screen_sensors)
+    summary = test.summary(event_windows, summary_thresholds, summary_start)
+
+    save_dir = f'{plot_dir}{test_name}/'
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    save_table(summary, f'{save_dir}summary.csv')
+    if test.health is not None:
+        test.health.to_csv(f'{save_dir}Sensor_Health.csv')
+    summaries.append(summary.reset_index().assign(Test=test_name))
+
+if summaries:
+    all_tests = pd.concat(summaries, ignore_index=True).set_index(['Test', 'Channel'])
+    save_table(all_tests, f'{plot_dir}summary_all.csv')
+    print(f'Saved summary of {len(summaries)} tests to {plot_dir}summary_all.csv')
@@ -0,0 +1,142 @@
+# summary_metrics.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Summary metrics for every channel of a test computed at once on the #
+#       2-D array of converted data (time x channel, SI units)          #
+#       + Peak & time of peak, min & time of min, mean                  #
+#       + Integral (trapezoidal, units*s; e.g. heat flux dose, kJ/m^2)  #
+#       + time above each threshold for channel's type (s, each sample  #
+#           counts for half the interval to each neighbor)              #
+#       + mean over each event window (from cumulative sums, so each    #
+#           window costs one subtraction per channel)                   #
+#       + baseline-corrected: baseline mean & std of converted data,    #
+#           peak rise above baseline & rise in baseline std units       #
+# - Metrics are computed from summary_start (s, relative to ignition)   #
+#       to end of data; baseline uses test's baseline window            #
+# - Thresholds are given per channel type or per channel (channel       #
+#       overrides type): {'Temperature': [100, 300, 600], ...}          #
+# - Tables are saved as .csv & as .parquet if pyarrow or fastparquet is #
+#       installed                                                       #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import importlib.util
+import numpy as np
+import pandas as pd
+
+from baseline_stats import compute_baseline_stats
+
+# ------------------------------ #
+# Define Default Summary Options #
+# ------------------------------ #
+# Thresholds for time above (converted units): deg C, kW/m^2
+default_thresholds = {'Temperature': [100, 300, 600],
+                      'Heat_Flux': [2.5, 5, 20]}
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def get_threshold_array(channels, types, thresholds):
+    # 2-D array (channel x threshold) of thresholds for each channel; padded with nan
+    channel_thresholds = [thresholds.get(c, thresholds.get(t, [])) for c, t in zip(channels, types)]
+    n_thresholds = max([len(t) for t in channel_thresholds] + [0])
+    threshold_array = np.full((len(channels), n_thresholds), np.nan)
+    for i, t in enumerate(channel_thresholds):
+        threshold_array[i, :len(t)] = t
+    return(threshold_array)
+
+def sample_durations(time):
+    # Time represented by each sample: half the interval to each neighbor
+    dt = np.diff(time)
+    durations = np.zeros(len(time))
+    durations[:-1] += 0.5 * dt
+    durations[1:] += 0.5 * dt
+    return(durations)
+
+def window_means(time, values, windows):
+    # Mean of every column in each window ({name: [start, end]}, both ends
+    #   included) from cumulative sums of values & valid counts
+    valid = ~np.isnan(values)
+    cum_sum = np.vstack([np.zeros(values.shape[1]), np.cumsum(np.where(valid, values, 0.), axis=0)])
+    cum_count = np.vstack([np.zeros(values.shape[1]), np.cumsum(valid, axis=0)])
+
+    means = {}
+    for name, (start, end) in windows.items():
+        if np.isnan(start) or np.isnan(end):
+            continue
+        i0 = np.searchsorted(time, start, side='left')
+        i1 = np.searchsorted(time, end, side='right')
+        count = cum_count[i1] - cum_count[i0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[name] = np.where(count > 0, (cum_sum[i1] - cum_sum[i0]) / count, np.nan)
+    return(means)
+
+def compute_summary(data, channel_list, baseline_window, windows={}, thresholds=default_thresholds, summary_start=0.):
+    # Summary table (one row per channel) for converted data (df indexed by
+    #   time relative to ignition, one column per channel)
+    channels = data.columns.tolist()
+    types = channel_list.loc[channels, 'Type'].tolist()
+    time = data.index.values.astype(np.float64)
+    values = data.to_numpy(dtype=np.float64)
+
+    # Baseline of converted data (e.g. ambient temperature, zeroed gas noise)
+    baselines = compute_baseline_stats(data, baseline_window[0], baseline_window[1])
+
+    # Rows from summary_start to end of data
+    i0 = np.searchsorted(time, summary_start, side='left')
+    t = time[i0:]
+    y = values[i0:]
+    valid = ~np.isnan(y)
+    count = valid.sum(axis=0)
+    has_data = count > 0
+    columns = np.arange(y.shape[1])
+
+    peak_row = np.argmax(np.where(valid, y, -np.inf), axis=0)
+    min_row = np.argmin(np.where(valid, y, np.inf), axis=0)
+    peak = np.where(has_data, y[peak_row, columns], np.nan)
+    minimum = np.where(has_data, y[min_row, columns], np.nan)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(y, axis=0) / count
+        segments = 0.5 * (y[1:] + y[:-1]) * np.diff(t)[:, np.newaxis]
+        integral = np.where(has_data, np.nansum(segments, axis=0), np.nan)
+        peak_rise = peak - baselines['Mean'].to_numpy()
+        peak_rise_std = peak_rise / baselines['Std'].to_numpy()
+
+    summary = pd.DataFrame({'Type': types,
+                            'Label': channel_list.loc[channels, 'Label'].values,
+                            'Chart': channel_list.loc[channels, 'Chart'].values,
+                            'Count': count,
+                            'Peak': peak,
+                            'Time_of_Peak': np.where(has_data, t[peak_row], np.nan),
+                            'Min': minimum,
+                            'Time_of_Min': np.where(has_data, t[min_row], np.nan),
+                            'Mean': mean,
+                            'Integral': integral,
+                            'Baseline_Mean': baselines['Mean'].to_numpy(),
+                            'Baseline_Std': baselines['Std'].to_numpy(),
+                            'Peak_Rise': peak_rise,
+                            'Peak_Rise_Std': peak_rise_std},
+                           index=pd.Index(channels, name='Channel'))
+
+    # Time above thresholds for all channels at once (one pass per threshold column)
+    threshold_array = get_threshold_array(channels, types, thresholds)
+    durations = sample_durations(t)
+    for k in range(threshold_array.shape[1]):
+        time_above = durations @ (y > threshold_array[:, k])
+        summary[f'Threshold_{k + 1}'] = threshold_array[:, k]
+        summary[f'Time_Above_{k + 1}'] = np.where(np.isnan(threshold_array[:, k]), np.nan, time_above)
+
+    # Mean over each event window
+    for name, window_mean in window_means(time, values, windows).items():
+        summary[f'Mean ({name})'] = window_mean
+
+    return(summary)
+
+def save_table(table, file_loc, index=True):
+    # Save table to file_loc (.csv) & to .parquet if a parquet engine is installed
+    table.to_csv(file_loc, index=index)
+    if importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet'):
+        table.to_parquet(f'{file_loc[:-4]}.parquet', index=index)
@@ -0,0 +1,119 @@
+# trakpro_loader.py
+#   by: N. Dow
+# ***************************** Run Notes ***************************** #
+# - Reads DustTrak DRX (TrakPro) exports (02_Data/Particulate/<burn>/   #
+#       ...) on an absolute timeline                                    #
+#       + text exports (.txt/.csv, comma or tab separated) & Excel      #
+#           copies (.xlsx) have the same rows: header (Serial Number,   #
+#           Start Date, Start Time, Log Interval, ...), statistics,     #
+#           calibration & data (Date, Time, PM1 ... TOTAL in mg/m^3)    #
+#       + time of each reading is Start Date & Start Time + (row + 1)   #
+#           Log Intervals (first reading is one interval after start)   #
+#       + rows in Skip_Lines of Particulate_Info.csv (data rows, first  #
+#           reading is row 0) are dropped after times are set           #
+#       + files that are not TrakPro exports (e.g. a MultiRAE log saved #
+#           in a particulate dir) are skipped                           #
+# - Logs are named like MultiRAE logs (rae_loader.py): <burn>/<day      #
+#       dir>/<file name>; text export is used if a file was also saved  #
+#       as .xlsx                                                        #
+# ********************************************************************* #
+
+# --------------- #
+# Import Packages #
+# --------------- #
+import os
+import datetime
+import numpy as np
+import pandas as pd
+
+from rae_loader import read_rows, cell_text, find_rae_files
+
+# Size fractions logged by DRX
+fraction_columns = ['PM1', 'PM2.5', 'RESP', 'PM10', 'TOTAL']
+
+# File types read (text exports are preferred over Excel copies)
+trakpro_extensions = ['.txt', '.csv', '.xlsx']
+
+# ---------------------- #
+# User-Defined Functions #
+# ---------------------- #
+def read_trakpro_rows(file_loc):
+    # Rows of cells of text (comma or tab separated) or Excel export
+    if file_loc.lower().endswith('.xlsx'):
+        return(read_rows(file_loc))
+    with open(file_loc, 'rb') as f:
+        encoding = 'utf-16' if f.read(2) in [b'\xff\xfe', b'\xfe\xff'] else 'utf-8-sig'
+    with open(file_loc, encoding=encoding) as f:
+        lines = [line.rstrip('\r\n') for line in f]
+    return([line.split('\t' if '\t' in line else ',') for line in lines])
+
+def header_seconds(cell):
+    # Seconds of Log Interval (mm:ss); Excel reads '00:01' as a time of hh:mm
+    if isinstance(cell, datetime.time):
+        return(60 * cell.hour + cell.minute)
+    minutes, seconds = cell_text(cell).split(':')
+    return(60 * int(minutes) + int(seconds))
+
+def header_start(date_cell, time_cell):
+    # Start Date & Start Time as one datetime (Excel cells or text)
+    date = date_cell.date() if isinstance(date_cell, datetime.datetime) else \
+        datetime.datetime.strptime(cell_text(date_cell), '%m/%d/%Y').date()
+    time = time_cell if isinstance(time_cell, datetime.time) else \
+        datetime.datetime.strptime(cell_text(time_cell), '%H:%M:%S').time()
+    return(pd.Timestamp(datetime.datetime.combine(date, time)))
+
+class DrxLog:
+    # One DustTrak DRX session: info (header values) & data (readings of
+    #   each size fraction indexed by Date/Time)
+    def __init__(self, name, file_loc, info, data):
+        self.name = name
+        self.file_loc = file_loc
+        self.info = info
+        self.data = data
+
+    @property
+    def begin(self):
+        return(self.data.index[0])
+
+def parse_trakpro_rows(rows, name, file_loc, skip_lines=()):
+    # DrxLog of export rows; None if rows are not a TrakPro export
+    if not rows or not cell_text(rows[0][0]).startswith('TrakPro'):
+        return(None)
+    header = {}
+    for i, row in enumerate(rows):
+        key = cell_text(row[0]) if row else ''
+        if key == 'Date' and len(row) > 1 and cell_text(row[1]) == 'Time':
+            break
+        if key.endswith(':') and len(row) > 1:
+            header[key[:-1]] = row[1]
+    else:
+        raise ValueError(f'{file_loc}: no Date/Time data table')
+
+    # Data rows end at first row without a date
+    columns = [cell_text(c) for c in rows[i][2:2 + len(fraction_columns)]]
+    j = i + 2
+    while j < len(rows) and rows[j] and cell_text(rows[j][0]):
+        j += 1
+    data = pd.DataFrame([row[2:2 + len(columns)] for row in rows[i + 2:j]], columns=columns)
+    data = data.apply(lambda c: pd.to_numeric(c, errors='coerce'))
+
+    start = header_start(header['Start Date'], header['Start Time'])
+    interval = header_seconds(header['Log Interval (mm:ss)'])
+    data.index = pd.DatetimeIndex(start + pd.to_timedelta((np.arange(len(data)) + 1) * interval, unit='s'), name='Date/Time')
+    if skip_lines:
+        data = data.drop(data.index[[k for k in sorted(set(skip_lines)) if k < len(data)]])
+
+    info = {key: cell_text(value) for key, value in header.items()}
+    info['Start'] = start
+    info['Log Interval (s)'] = interval
+    return(DrxLog(name, file_loc, info, data))
+
+def read_trakpro_file(file_loc, name=None, skip_lines=()):
+    # DrxLog of one export (None if file is not a TrakPro export)
+    if name is None:
+        name = os.path.basename(file_loc).split('.')[0]
+    return(parse_trakpro_rows(read_trakpro_rows(file_loc), name, file_loc, skip_lines))
+
+def find_trakpro_files(particulate_dir, skip_dirs=['OLDignore']):
+    # Log name & file of every export under particulate_dir
+    return(find_rae_files(particulate_dir, skip_dirs, trakpro_extensions))